@@ -0,0 +1,62 @@
+# AsyncPipeline.py
+# Author: Marcus D. Bloice <https://github.com/mdbloice> and contributors
+# Licensed under the terms of the MIT Licence.
+"""
+The AsyncPipeline module contains the asyncio implementation behind
+:func:`~Augmentor.Pipeline.Pipeline.aiter_batches`.
+
+It is kept separate from the :mod:`~Augmentor.Pipeline` module as it uses
+``async``/``await`` syntax and :func:`asyncio.get_running_loop`, which
+require Python 3.7 or later, and is only imported when
+:func:`~Augmentor.Pipeline.Pipeline.aiter_batches` is called.
+"""
+import asyncio
+import collections
+import random
+
+
+async def _batch(pipeline, executor, augmentor_images, save_to_disk):
+    """
+    Pass each of :attr:`augmentor_images` through :attr:`pipeline` on
+    :attr:`executor`, returning the augmented images and their labels once
+    all of them have completed.
+    """
+    loop = asyncio.get_running_loop()
+
+    images = await asyncio.gather(*[loop.run_in_executor(executor, pipeline._execute, augmentor_image, save_to_disk)
+                                    for augmentor_image in augmentor_images])
+    labels = [augmentor_image.categorical_label for augmentor_image in augmentor_images]
+
+    return list(images), labels
+
+
+async def aiter_batches(pipeline, batch_size, prefetch=2, save_to_disk=False):
+    """
+    Asynchronous generator yielding batches of augmented images sampled,
+    with replacement, from :attr:`pipeline`.
+
+    Each image of a batch is read, augmented and optionally saved on the
+    pipeline's worker pool, while up to :attr:`prefetch` batches are kept
+    in flight. No further batches are scheduled until the consumer asks
+    for the next batch, and batches still in flight are cancelled when the
+    generator is closed or the consuming task is cancelled.
+
+    :param pipeline: The pipeline to sample from.
+    :param batch_size: The number of images per batch.
+    :param prefetch: The number of batches to keep in flight.
+    :param save_to_disk: Whether to also save the augmented images to disk.
+    :return: An asynchronous generator yielding tuples containing a list of
+     augmented images and a list of their labels.
+    """
+    executor = pipeline._get_executor("thread")
+    pending = collections.deque()
+
+    try:
+        while True:
+            while len(pending) < prefetch:
+                augmentor_images = [random.choice(pipeline.augmentor_images) for _ in range(batch_size)]
+                pending.append(asyncio.ensure_future(_batch(pipeline, executor, augmentor_images, save_to_disk)))
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
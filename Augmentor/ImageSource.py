@@ -3,7 +3,8 @@ from __future__ import (absolute_import, division,
 from builtins import *
 
 import os
-import glob
+
+from .ImageUtilities import scan_directory
 
 
 class ImageSource(object):
@@ -17,13 +18,4 @@ class ImageSource(object):
         self.largest_file_dimensions = (800, 600)
 
     def scan_directory(self, source_directory, recusrive_scan=False):
-        # TODO: Make this a static member somewhere later
-        file_types = ['*.jpg', '*.bmp', '*.jpeg', '*.gif', '*.img', '*.png']
-        file_types.extend([str.upper(x) for x in file_types])
-
-        list_of_files = []
-
-        for file_type in file_types:
-            list_of_files.extend(glob.glob(os.path.join(os.path.abspath(source_directory), file_type)))
-
-        return list_of_files
+        return scan_directory(source_directory, recursive=recusrive_scan)
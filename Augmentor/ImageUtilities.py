@@ -11,11 +11,21 @@ from __future__ import (absolute_import, division,
 from builtins import *
 
 import os
-import glob
+import json
+import uuid
 import numbers
 import random
+import weakref
 import warnings
+import threading
+import collections
 import numpy as np
+from PIL import Image
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir  # Python 2
 
 
 class AugmentorImage(object):
@@ -59,6 +69,7 @@ class AugmentorImage(object):
         self._pil_images = None
 
         self._file_format = None
+        self._image_size = None
         self._class_label = None
         self._class_label_int = None
         self._label = None
@@ -158,6 +169,23 @@ class AugmentorImage(object):
         """
         return os.path.basename(self._image_path)
 
+    @property
+    def image_size(self):
+        """
+        The :attr:`image_size` property contains the dimensions of the image,
+        as a ``(width, height)`` tuple, once the image has been checked by
+        the pipeline.
+
+        :getter: Returns this image's dimensions.
+        :setter: Sets this image's dimensions.
+        :type: Tuple
+        """
+        return self._image_size
+
+    @image_size.setter
+    def image_size(self, value):
+        self._image_size = value
+
     @property
     def class_label(self):
         return self._class_label
@@ -212,6 +240,323 @@ class AugmentorImage(object):
         self._file_format = value
 
 
+class ImageCache(object):
+    """
+    A cache of decoded images, keyed by their file paths, holding at most
+    :attr:`max_bytes` bytes of pixel data. When the cache is full, the least
+    recently used images are evicted. The cache can be shared by several
+    threads.
+
+    Used by :class:`~Augmentor.Pipeline.Pipeline` to avoid decoding the
+    same source image each time it is sampled, see
+    :func:`~Augmentor.Pipeline.Pipeline.set_image_cache`. The images are
+    not pickled. Instead, unpickling a cache, for example in a worker
+    process that is sent a copy of the pipeline with every task, returns
+    the cache with the same :attr:`cache_id` that the process already
+    holds, or a new, empty one that the process keeps from then on, see
+    :func:`_restore_image_cache`. Every process therefore keeps its own
+    cache, which is reused by every task it executes.
+    """
+    def __init__(self, max_bytes, cache_id=None):
+        """
+        :param max_bytes: The maximum number of bytes of pixel data to hold.
+        :param cache_id: The identifier of the cache, shared by its copies
+         in other processes. Defaults to a new random identifier.
+        :type max_bytes: Integer
+        :type cache_id: String
+        """
+        self.max_bytes = max_bytes
+        self.cache_id = cache_id if cache_id is not None else uuid.uuid4().hex
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        with _image_caches_lock:
+            _image_caches[(os.getpid(), self.cache_id)] = self
+
+    def __len__(self):
+        return len(self._images)
+
+    def __reduce__(self):
+        return _restore_image_cache, (self.cache_id, self.max_bytes)
+
+    def record(self, hits, misses):
+        """
+        Adds :attr:`hits` and :attr:`misses` counted by a copy of the cache
+        in another process to the cache's counters.
+
+        :param hits: The number of hits to add.
+        :param misses: The number of misses to add.
+        :return: None
+        """
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def open(self, image_path):
+        """
+        Returns the decoded image at :attr:`image_path`, from the cache if
+        it is held there, otherwise from disk, in which case it is added to
+        the cache. As operations may modify the images passed to them, a
+        copy of the cached image is returned.
+
+        :param image_path: The path to the image.
+        :type image_path: String
+        :return: The image, as a PIL.Image object.
+        """
+        with self._lock:
+            image = self._images.pop(image_path, None)
+            if image is not None:
+                # Mark as most recently used.
+                self._images[image_path] = image
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if image is not None:
+            return image.copy()
+
+        image = Image.open(image_path)
+        image.load()
+
+        size = _image_bytes(image)
+
+        if size <= self.max_bytes:
+            with self._lock:
+                if image_path not in self._images:
+                    self._images[image_path] = image
+                    self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    _, evicted = self._images.popitem(last=False)
+                    self.current_bytes -= _image_bytes(evicted)
+
+        return image.copy()
+
+    def clear(self):
+        """
+        Removes all images from the cache and resets its counters.
+
+        :return: None
+        """
+        with self._lock:
+            self._images.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class DatasetCache(object):
+    """
+    A store of decoded images on disk, which is memory mapped so that the
+    pixels are read directly from the operating system's page cache rather
+    than decoded from their original files each time they are used. The
+    page cache is shared by all processes reading the store.
+
+    The store is a directory holding a single flat ``data.npy`` file of
+    8-bit pixel data, and an ``index.json`` file recording the offset,
+    shape, and mode of each image, along with the modification time and
+    size of its original file. Images whose files have since changed are
+    ignored. Only images of modes ``L``, ``LA``, ``RGB``, and ``RGBA`` are
+    stored; other images are read from their original files.
+
+    Stores are created by :func:`build`, usually through
+    :func:`~Augmentor.Pipeline.Pipeline.build_cache`.
+    """
+    _data_file = "data.npy"
+    _index_file = "index.json"
+    _modes = ("L", "LA", "RGB", "RGBA")
+
+    def __init__(self, path):
+        """
+        Opens an existing store.
+
+        :param path: The directory holding the store.
+        :type path: String
+        """
+        self.path = path
+
+        with open(os.path.join(path, DatasetCache._index_file)) as index_file:
+            index = json.load(index_file)
+
+        # Entries whose files have changed since the store was built are
+        # dropped.
+        self._index = dict((image_path, entry) for image_path, entry in index["images"].items()
+                           if _file_signature(image_path) == (entry["mtime"], entry["size"]))
+
+        self._data = np.load(os.path.join(path, DatasetCache._data_file), mmap_mode="r")
+
+    def __contains__(self, image_path):
+        """
+        Returns whether :attr:`image_path` was unchanged when the store was
+        opened. Images which could not be stored, due to their mode, are
+        also contained.
+        """
+        return os.path.abspath(image_path) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getstate__(self):
+        # The data is mapped again, rather than copied, in other processes.
+        state = self.__dict__.copy()
+        del state["_data"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._data = np.load(os.path.join(self.path, DatasetCache._data_file), mmap_mode="r")
+
+    def open(self, image_path):
+        """
+        Returns the image stored for :attr:`image_path`, which shares its
+        memory with the store where possible, or ``None`` if it is not
+        stored.
+
+        :param image_path: The path to the image's original file.
+        :type image_path: String
+        :return: The image, as a read only PIL.Image object, or ``None``.
+        """
+        entry = self._index.get(os.path.abspath(image_path))
+
+        if entry is None or entry["mode"] is None:
+            return None
+
+        height, width, bands = entry["shape"]
+        pixels = self._data[entry["offset"]:entry["offset"] + height * width * bands]
+
+        return Image.frombuffer(entry["mode"], (width, height), pixels, "raw", entry["mode"], 0, 1)
+
+    @staticmethod
+    def build(path, image_paths):
+        """
+        Decodes every image in :attr:`image_paths` into a new store in the
+        directory :attr:`path`, replacing any store already there.
+
+        :param path: The directory to create the store in.
+        :param image_paths: The paths of the images to store.
+        :type path: String
+        :type image_paths: List of strings
+        :return: The new store, as a :class:`DatasetCache`.
+        """
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        index_path = os.path.join(path, DatasetCache._index_file)
+
+        # Without an index, a partially written store is never opened.
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+        image_paths = sorted(set(os.path.abspath(image_path) for image_path in image_paths))
+
+        # The sizes are read from the headers, without decoding the images.
+        entries = {}
+        offset = 0
+
+        for image_path in image_paths:
+            mtime, size = _file_signature(image_path)
+            entry = {"mtime": mtime, "size": size, "offset": None, "shape": None, "mode": None}
+
+            with Image.open(image_path) as image:
+                if image.mode in DatasetCache._modes:
+                    bands = len(image.getbands())
+                    entry.update(offset=offset, shape=[image.size[1], image.size[0], bands], mode=image.mode)
+                    offset += image.size[0] * image.size[1] * bands
+
+            entries[image_path] = entry
+
+        # The data is written to a new file, so that processes still
+        # mapping a previous store are unaffected.
+        data_path = os.path.join(path, DatasetCache._data_file)
+        data = np.lib.format.open_memmap(data_path + ".tmp", mode="w+", dtype=np.uint8, shape=(offset,))
+
+        for image_path in image_paths:
+            entry = entries[image_path]
+            if entry["mode"] is None:
+                continue
+
+            with Image.open(image_path) as image:
+                pixels = np.asarray(image.convert(entry["mode"]), dtype=np.uint8)
+
+            data[entry["offset"]:entry["offset"] + pixels.size] = pixels.ravel()
+
+        data.flush()
+        del data
+
+        if os.path.exists(data_path):
+            os.remove(data_path)
+        os.rename(data_path + ".tmp", data_path)
+
+        with open(index_path, "w") as index_file:
+            json.dump({"images": entries}, index_file)
+
+        return DatasetCache(path)
+
+
+_image_extensions = frozenset(['.jpg', '.jpeg', '.bmp', '.gif', '.img', '.png', '.tif', '.tiff'])
+
+
+def _file_signature(image_path):
+    """
+    Returns the modification time and size of the file at
+    :attr:`image_path`, or ``None`` if it does not exist.
+    """
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+
+    return stat.st_mtime, stat.st_size
+
+
+# The image caches of this process, by process id and cache identifier. The
+# process id ensures that a process started by forking this one does not use
+# a copy of one of this process's caches, whose lock may be held.
+_image_caches = weakref.WeakValueDictionary()
+_image_caches_lock = threading.RLock()
+
+# The caches restored when unpickling, see _restore_image_cache(), which are
+# kept for the lifetime of the process.
+_restored_image_caches = []
+
+
+def _restore_image_cache(cache_id, max_bytes):
+    """
+    Returns this process's :class:`ImageCache` with the identifier
+    :attr:`cache_id`, creating an empty cache holding at most
+    :attr:`max_bytes` bytes if there is none. Used when unpickling a cache.
+    Do not call directly.
+
+    :param cache_id: The identifier of the cache.
+    :param max_bytes: The maximum number of bytes of pixel data to hold.
+    :return: The cache.
+    """
+    with _image_caches_lock:
+        cache = _image_caches.get((os.getpid(), cache_id))
+        if cache is None:
+            cache = ImageCache(max_bytes, cache_id)
+            _restored_image_caches.append(cache)
+
+    return cache
+
+
+def _image_bytes(image):
+    """
+    Returns the approximate number of bytes of pixel data held by a
+    decoded :attr:`image`.
+    """
+    if image.mode in ("I", "F"):
+        bytes_per_band = 4
+    elif image.mode.startswith("I;16"):
+        bytes_per_band = 2
+    else:
+        bytes_per_band = 1
+
+    return image.size[0] * image.size[1] * len(image.getbands()) * bytes_per_band
+
+
 def parse_user_parameter(user_param):
 
     if isinstance(user_param, numbers.Real):
@@ -238,23 +583,18 @@ def extract_paths_and_extensions(image_path):
     return file_name, extension, root_path
 
 
-def scan(source_directory, output_directory):
+def scan(source_directory, output_directory, recursive=False):
 
     abs_output_directory = os.path.abspath(output_directory)
-    files_and_directories = glob.glob(os.path.join(os.path.abspath(source_directory), '*'))
 
-    directory_count = 0
-    directories = []
+    # Hidden directories were never matched by the glob this replaced.
+    directories = sorted(entry.path for entry in scandir(os.path.abspath(source_directory))
+                         if not entry.name.startswith(".") and entry.is_dir()
+                         and entry.path != abs_output_directory)
+    directory_count = len(directories)
 
     class_labels = []
 
-    for f in files_and_directories:
-        if os.path.isdir(f):
-            if f != abs_output_directory:
-                directories.append(f)
-                directory_count += 1
-
-    directories = sorted(directories)
     label_counter = 0
 
     if directory_count == 0:
@@ -264,6 +604,8 @@ def scan(source_directory, output_directory):
         # parent_directory_name = os.path.basename(os.path.abspath(os.path.join(source_directory, os.pardir)))
         parent_directory_name = os.path.basename(os.path.abspath(source_directory))
 
+        # Any subdirectory left is hidden or the output directory, neither
+        # of which is scanned, so the scan is never recursive here.
         for image_path in scan_directory(source_directory):
             a = AugmentorImage(image_path=image_path, output_directory=abs_output_directory)
             a.class_label = parent_directory_name
@@ -281,7 +623,7 @@ def scan(source_directory, output_directory):
 
         for d in directories:
             output_directory = os.path.join(abs_output_directory, os.path.split(d)[1])
-            for image_path in scan_directory(d):
+            for image_path in scan_directory(d, recursive):
                 categorical_label = np.zeros(directory_count, dtype=np.uint32)
                 a = AugmentorImage(image_path=image_path, output_directory=output_directory)
                 a.class_label = os.path.split(d)[1]
@@ -325,42 +667,44 @@ def scan_dataframe(source_dataframe, image_col, category_col, output_directory):
     return augmentor_images, class_labels
 
 
-def scan_directory(source_directory):
+def scan_directory(source_directory, recursive=False):
     """
     Scan a directory for images, returning any images found with the
-    extensions ``.jpg``, ``.JPG``, ``.jpeg``, ``.JPEG``, ``.gif``, ``.GIF``,
-    ``.img``, ``.IMG``, ``.png``, ``.PNG``, ``.tif``, ``.TIF``, ``.tiff``,
-    or ``.TIFF``.
+    extensions ``.jpg``, ``.jpeg``, ``.bmp``, ``.gif``, ``.img``, ``.png``,
+    ``.tif``, or ``.tiff``, in any combination of upper and lower case.
+
+    Each directory is listed once, so that scanning remains fast for very
+    large directories or directories on network file systems.
 
     :param source_directory: The directory to scan for images.
+    :param recursive: Whether to also scan all subdirectories of
+     :attr:`source_directory`. Symbolic links to directories are not
+     followed.
     :type source_directory: String
-    :return: A list of images found in the :attr:`source_directory`
+    :type recursive: Boolean
+    :return: A sorted list of the absolute paths of the images found in
+     the :attr:`source_directory`.
     """
     # TODO: GIFs are highly problematic. It may make sense to drop GIF support.
-    file_types = ['*.jpg', '*.bmp', '*.jpeg', '*.gif', '*.img', '*.png', '*.tiff', '*.tif']
-
     list_of_files = []
+    directories = [os.path.abspath(source_directory)]
 
-    if os.name == "nt":
-        for file_type in file_types:
-            list_of_files.extend(glob.glob(os.path.join(os.path.abspath(source_directory), file_type)))
-    else:
-        file_types.extend([str.upper(str(x)) for x in file_types])
-        for file_type in file_types:
-            list_of_files.extend(glob.glob(os.path.join(os.path.abspath(source_directory), file_type)))
+    while directories:
+        for entry in scandir(directories.pop()):
+            if entry.name.startswith("."):
+                continue
+            if os.path.splitext(entry.name)[1].lower() in _image_extensions and entry.is_file():
+                list_of_files.append(entry.path)
+            elif recursive and entry.is_dir(follow_symlinks=False):
+                directories.append(entry.path)
 
-    return list_of_files
+    return sorted(list_of_files)
 
 
 def scan_directory_with_classes(source_directory):
     warnings.warn("The scan_directory_with_classes() function has been deprecated.", DeprecationWarning)
-    l = glob.glob(os.path.join(source_directory, '*'))
-
-    directories = []
-
-    for f in l:
-        if os.path.isdir(f):
-            directories.append(f)
+    directories = [entry.path for entry in scandir(source_directory)
+                   if not entry.name.startswith(".") and entry.is_dir()]
 
     list_of_files = {}
 
@@ -35,6 +35,8 @@ import numpy as np
 import os
 import random
 import warnings
+import threading
+import collections
 
 # Python 2-3 compatibility - not currently needed.
 # try:
@@ -43,6 +45,388 @@ import warnings
 #    from io import StringIO
 
 
+class _Memo(object):
+    """
+    A small, thread safe cache holding the most recently used values
+    computed by operations, such as the grids used by :class:`Distort`,
+    which depend only on an image's size and the operation's parameters.
+    Cached values are shared and must not be modified.
+    """
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self._values = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Returns the value cached for :attr:`key`, calling :attr:`compute` to
+        create it if it is not cached.
+
+        :param key: A hashable key.
+        :param compute: A function without arguments returning the value.
+        :return: The cached value.
+        """
+        with self._lock:
+            if key in self._values:
+                # Mark as most recently used.
+                value = self._values.pop(key)
+                self._values[key] = value
+                return value
+
+        value = compute()
+
+        with self._lock:
+            self._values[key] = value
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+
+        return value
+
+
+_grids = _Memo()
+_homographies = _Memo(max_size=256)
+_thresholds = _Memo(max_size=256)
+
+
+def _grid(size, grid_width, grid_height):
+    """
+    Returns the tiles used by :class:`Distort` and
+    :class:`GaussianDistortion` to distort an image of :attr:`size` with a
+    grid of :attr:`grid_width` by :attr:`grid_height` tiles. The tiles are
+    all of equal size, except for the last column and row, which absorb the
+    remainder. Results are cached, see :class:`_Memo`.
+
+    :param size: The size of the image, as a (width, height) tuple.
+    :param grid_width: The number of tiles across.
+    :param grid_height: The number of tiles down.
+    :return: A tuple of the box of every tile, in row major order, as a list
+     of (left, upper, right, lower) tuples, and the coordinates of the
+     corners of the tiles as a read only array of shape
+     (grid_height + 1, grid_width + 1, 2).
+    """
+    def compute():
+        w, h = size
+
+        width_of_square = int(floor(w / float(grid_width)))
+        height_of_square = int(floor(h / float(grid_height)))
+
+        xs = [i * width_of_square for i in range(grid_width)] + [w]
+        ys = [i * height_of_square for i in range(grid_height)] + [h]
+
+        dimensions = [(xs[column], ys[row], xs[column + 1], ys[row + 1])
+                      for row in range(grid_height) for column in range(grid_width)]
+
+        vertices = np.stack(np.meshgrid(xs, ys), axis=-1)
+        vertices.flags.writeable = False
+
+        return dimensions, vertices
+
+    return _grids.get((tuple(size), grid_width, grid_height), compute)
+
+
+def _mesh(dimensions, vertices):
+    """
+    Returns the mesh, as used by PIL's :func:`Image.transform`, mapping
+    each tile of a grid, see :func:`_grid`, to the quadrilateral formed by
+    the displaced :attr:`vertices` at its corners.
+
+    :param dimensions: The box of every tile, in row major order.
+    :param vertices: The displaced corners of the tiles, as an array of
+     shape (rows + 1, columns + 1, 2).
+    :return: The mesh, as a list of (box, quadrilateral) pairs.
+    """
+    # The corners of each quadrilateral, in the order expected by PIL:
+    # top left, bottom left, bottom right, top right.
+    quadrilaterals = np.concatenate([vertices[:-1, :-1], vertices[1:, :-1], vertices[1:, 1:], vertices[:-1, 1:]],
+                                    axis=-1)
+
+    return list(zip(dimensions, quadrilaterals.reshape(-1, 8).tolist()))
+
+
+def _homography(original_plane, new_plane):
+    """
+    Returns the coefficients of the perspective transform mapping the
+    corners in :attr:`new_plane` onto the corners in
+    :attr:`original_plane`. As the corners used by :class:`Skew` only take
+    a small number of distinct values for a given image size, the results
+    are cached, see :class:`_Memo`.
+
+    :param original_plane: The four corners of the image, as (x, y) tuples.
+    :param new_plane: The four skewed corners, as (x, y) tuples.
+    :return: The 8 perspective transform coefficients, as used by
+     PIL's :func:`Image.transform`, as a tuple.
+    """
+    def compute():
+        # To calculate the coefficients required by PIL for the perspective skew,
+        # see the following Stack Overflow discussion: https://goo.gl/sSgJdj
+        matrix = []
+
+        for p1, p2 in zip(new_plane, original_plane):
+            matrix.append([p1[0], p1[1], 1, 0, 0, 0, -p2[0] * p1[0], -p2[0] * p1[1]])
+            matrix.append([0, 0, 0, p1[0], p1[1], 1, -p2[1] * p1[0], -p2[1] * p1[1]])
+
+        A = np.array(matrix, dtype=np.float64)
+        B = np.array(original_plane, dtype=np.float64).reshape(8)
+
+        return tuple(np.linalg.solve(A, B).tolist())
+
+    return _homographies.get((tuple(original_plane), tuple(new_plane)), compute)
+
+
+def _array_max(array):
+    """
+    Returns the value of a white pixel in :attr:`array`, which is ``255``
+    for integer arrays and ``1.0`` for floating point arrays, whose values
+    are expected to lie between 0 and 1.
+    """
+    return 1.0 if np.issubdtype(array.dtype, np.floating) else 255
+
+
+def _array_is_supported(array):
+    """
+    Returns whether :attr:`array` is an 8-bit or floating point greyscale
+    image of shape (height, width) or RGB image of shape
+    (height, width, 3), which the NumPy implementations of colour
+    operations support.
+    """
+    return (array.dtype == np.uint8 or np.issubdtype(array.dtype, np.floating)) and \
+        (array.ndim == 2 or (array.ndim == 3 and array.shape[2] == 3))
+
+
+def _array_greyscale(array):
+    """
+    Returns the greyscale version of the RGB(A) array :attr:`array`, using
+    the same weights and rounding as PIL's conversion to mode ``L``.
+    """
+    if array.ndim == 2:
+        return array.copy()
+
+    if array.dtype == np.uint8:
+        # PIL's fixed point weights. Every intermediate value is an integer
+        # below 2 ** 24, so is exact in single precision.
+        weighted = np.matmul(array[..., :3].astype(np.float32), np.array([19595, 38470, 7471], dtype=np.float32))
+        weighted += 0x8000
+        weighted *= 1. / 0x10000
+        return np.floor(weighted, out=weighted).astype(np.uint8)
+    else:
+        return np.matmul(array[..., :3], np.array([0.299, 0.587, 0.114], dtype=array.dtype))
+
+
+def _array_add(blended, offset):
+    """
+    Adds :attr:`offset` to the float array :attr:`blended` in place.
+    """
+    if np.ndim(offset) == blended.ndim and offset.shape[-1] == 1 and blended.shape[-1] > 1:
+        # Adding per channel is much faster than broadcasting along the
+        # last axis.
+        for channel in range(blended.shape[-1]):
+            blended[..., channel] += offset[..., 0]
+    else:
+        blended += offset
+
+
+def _array_blend(degenerate, array, factor):
+    """
+    Returns ``degenerate + factor * (array - degenerate)``, clipped to the
+    range of :attr:`array`'s data type, as is done by PIL's
+    :class:`ImageEnhance` classes. The :attr:`degenerate` image and
+    :attr:`factor` may be scalars or broadcast against :attr:`array`.
+    """
+    blended = array.astype(np.float32)
+
+    if np.isscalar(degenerate) and degenerate == 0:
+        blended *= factor
+    else:
+        # Subtracted, scaled and added back in this order, rather than as
+        # factor * array + (1 - factor) * degenerate, which rounds
+        # differently from PIL.
+        degenerate = np.asarray(degenerate, dtype=np.float32)
+        _array_add(blended, -degenerate)
+        blended *= factor
+        _array_add(blended, degenerate)
+
+    np.clip(blended, 0, _array_max(array), out=blended)
+
+    # Integer values are truncated, as by PIL.
+    return blended.astype(array.dtype)
+
+
+def _lut_is_supported(images):
+    """
+    Returns whether lookup tables, see :func:`Operation.get_lut`, can be
+    used for all of :attr:`images`, which is the case for 8-bit greyscale
+    and RGB images.
+    """
+    return all(image.mode in ("L", "RGB") for image in images)
+
+
+def _lut_values(image):
+    """
+    Returns every possible value of a band of :attr:`image`, once for each
+    band, as a uint8 array of shape (bands, 256).
+    """
+    return np.tile(np.arange(256, dtype=np.uint8), (len(image.getbands()), 1))
+
+
+def _batch_is_supported(batch):
+    """
+    Returns whether :attr:`batch` is an array of same-sized images which the
+    NumPy batch implementations of colour operations support.
+    """
+    return isinstance(batch, np.ndarray) and len(batch) > 0 and _array_is_supported(batch[0])
+
+
+def _batch_factors(operation, batch, selected):
+    """
+    Draws a random factor between :attr:`operation`'s ``min_factor`` and
+    ``max_factor`` for every image of :attr:`batch` in one call, and
+    returns them shaped to broadcast against :attr:`batch`. The factor of
+    images that are not :attr:`selected` is 1, which leaves them unchanged
+    when blended, so that the whole batch can be processed in one pass.
+    """
+    factors = np.random.uniform(operation.min_factor, operation.max_factor, len(batch)).astype(np.float32)
+    factors[~np.asarray(selected, dtype=bool)] = 1
+
+    return factors.reshape((-1,) + (1,) * (batch.ndim - 1))
+
+
+def _stack_samples(samples):
+    """
+    Returns :attr:`samples` as a single array if they all have the same
+    shape and data type, and otherwise as a list.
+    """
+    if all(sample.shape == samples[0].shape and sample.dtype == samples[0].dtype for sample in samples):
+        return np.stack(samples)
+
+    return list(samples)
+
+
+def _crop_array(array, box):
+    """
+    Returns a copy of the region :attr:`box`, a (left, upper, right, lower)
+    tuple, of :attr:`array`. Coordinates are rounded as by PIL's
+    :func:`Image.crop`.
+    """
+    left, upper, right, lower = [int(round(x)) for x in box]
+
+    return array[upper:lower, left:right].copy()
+
+
+def _box_warp(box, size):
+    """
+    Returns the matrix of a warp resizing the region :attr:`box` of an image
+    to :attr:`size`, as is done by cropping :attr:`box` and resizing the
+    cropped image.
+
+    Warps are 3x3 matrices mapping coordinates in the output image to
+    coordinates in the input image, see :func:`Operation.get_warp`.
+
+    :param box: The region, as a (left, upper, right, lower) tuple.
+    :param size: The size of the output image, as a (width, height) tuple.
+    :return: The warp as a 3x3 NumPy array.
+    """
+    left, upper, right, lower = box
+    return np.array([[float(right - left) / size[0], 0, left],
+                     [0, float(lower - upper) / size[1], upper],
+                     [0, 0, 1]])
+
+
+def _zoom_box(size, factor):
+    """
+    Returns the region of an image of :attr:`size` that is kept when the
+    image is enlarged by :attr:`factor` and its centre is cropped to
+    :attr:`size`, as is done by :class:`Zoom` and :class:`ZoomGroundTruth`.
+
+    :param size: The size of the image, as a (width, height) tuple.
+    :param factor: The zoom factor.
+    :return: The region, in the coordinates of the original image, as a
+     (left, upper, right, lower) tuple of floats.
+    """
+    w, h = size
+    w_zoomed, h_zoomed = int(round(w * factor)), int(round(h * factor))
+
+    left = floor((float(w_zoomed) / 2) - (float(w) / 2))
+    upper = floor((float(h_zoomed) / 2) - (float(h) / 2))
+
+    return (left * float(w) / w_zoomed,
+            upper * float(h) / h_zoomed,
+            (left + w) * float(w) / w_zoomed,
+            (upper + h) * float(h) / h_zoomed)
+
+
+def _zoom_warp(size, factor):
+    """
+    Returns the matrix of a warp enlarging an image of :attr:`size` by
+    :attr:`factor` and cropping its centre to :attr:`size`, as is done by
+    :class:`Zoom` and :class:`ZoomGroundTruth`.
+
+    :param size: The size of the image, as a (width, height) tuple.
+    :param factor: The zoom factor.
+    :return: The warp as a 3x3 NumPy array.
+    """
+    return _box_warp(_zoom_box(size, factor), size)
+
+
+def _zoom(image, factor):
+    """
+    Enlarges :attr:`image` by :attr:`factor` and crops its centre to the
+    size of the original image, as is done by :class:`Zoom` and
+    :class:`ZoomGroundTruth`.
+
+    When zooming in, only the region of the image that is kept is
+    resampled. When zooming out, the cropped area is larger than the
+    shrunken image and is padded with black.
+
+    :param image: The image to zoom.
+    :param factor: The zoom factor.
+    :type image: PIL.Image
+    :type factor: Float
+    :return: The zoomed image.
+    """
+    w, h = image.size
+    w_zoomed, h_zoomed = int(round(w * factor)), int(round(h * factor))
+
+    if w_zoomed >= w and h_zoomed >= h:
+        return image.resize((w, h), resample=Image.BICUBIC, box=_zoom_box((w, h), factor))
+
+    image_zoomed = image.resize((w_zoomed, h_zoomed), resample=Image.BICUBIC)
+
+    return image_zoomed.crop((floor((float(w_zoomed) / 2) - (float(w) / 2)),
+                              floor((float(h_zoomed) / 2) - (float(h) / 2)),
+                              floor((float(w_zoomed) / 2) + (float(w) / 2)),
+                              floor((float(h_zoomed) / 2) + (float(h) / 2))))
+
+
+def _rotation_warp(size, angle):
+    """
+    Returns the size and matrix of a warp rotating an image of
+    :attr:`size` by :attr:`angle` degrees anti-clockwise, while expanding
+    the canvas to hold the entire rotated image. This matches
+    ``image.rotate(angle, expand=True)``.
+
+    :param size: The size of the input image, as a (width, height) tuple.
+    :param angle: The angle in degrees.
+    :return: A tuple of the output size and the warp as a 3x3 NumPy array.
+    """
+    w, h = size
+    angle = -math.radians(angle)
+    a, b = round(math.cos(angle), 15), round(math.sin(angle), 15)
+    d, e = -b, a
+
+    # Rotate around the centre of the image.
+    c = a * -w / 2.0 + b * -h / 2.0 + w / 2.0
+    f = d * -w / 2.0 + e * -h / 2.0 + h / 2.0
+
+    xx = [a * x + b * y + c for x, y in ((0, 0), (w, 0), (w, h), (0, h))]
+    yy = [d * x + e * y + f for x, y in ((0, 0), (w, 0), (w, h), (0, h))]
+    nw = int(ceil(max(xx)) - floor(min(xx)))
+    nh = int(ceil(max(yy)) - floor(min(yy)))
+
+    c, f = a * -(nw - w) / 2.0 + b * -(nh - h) / 2.0 + c, d * -(nw - w) / 2.0 + e * -(nh - h) / 2.0 + f
+
+    return (nw, nh), np.array([[a, b, c], [d, e, f], [0, 0, 1]])
+
+
 class Operation(object):
     """
     The class :class:`Operation` represents the base class for all operations
@@ -87,6 +471,95 @@ class Operation(object):
         """
         raise RuntimeError("Illegal call to base class.")
 
+    def perform_operation_array(self, arrays):
+        """
+        Perform the operation on the passed images, given as NumPy arrays of
+        shape (height, width) or (height, width, channels), and return new
+        arrays. This allows pipelines working on array data to avoid
+        converting every image to PIL and back.
+
+        Many of the built-in operations override this function with a
+        NumPy implementation, which accepts 8-bit arrays as well as floating
+        point arrays with values between 0 and 1. This default
+        implementation converts the arrays to PIL images, calls
+        :func:`perform_operation`, and converts the results back, so custom
+        operations need only implement :func:`perform_operation`.
+
+        :param arrays: The image(s) to transform.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        images = self.perform_operation([Image.fromarray(array) for array in arrays])
+
+        return [np.asarray(image) for image in images]
+
+    def perform_operation_batch(self, batch, selected):
+        """
+        Perform the operation on the images of :attr:`batch` for which
+        :attr:`selected` is ``True``, leaving the others unchanged. Unlike
+        :func:`perform_operation_array`, the operation's random parameters
+        are drawn separately for every image.
+
+        Colour operations override this function to process the whole
+        batch with vectorised NumPy arithmetic. This default implementation
+        calls :func:`perform_operation_array` once per selected image.
+
+        :param batch: The images, as an array of shape (N, height, width) or
+         (N, height, width, channels), or a list of arrays of differing
+         shapes.
+        :type batch: NumPy array or list of NumPy arrays.
+        :param selected: Whether to perform the operation on each image.
+        :type selected: Array-like of N booleans.
+        :return: The transformed images, as a single array if they are all
+         of the same shape, otherwise as a list of arrays.
+        """
+        return _stack_samples([self.perform_operation_array([sample])[0] if apply else sample
+                               for sample, apply in zip(batch, selected)])
+
+    def get_warp(self, size):
+        """
+        Geometric operations, which only move pixels, can describe
+        themselves as a warp, so that the pipeline can combine consecutive
+        geometric operations and resample each image once, rather than once
+        per operation. See :func:`~Augmentor.Pipeline.Pipeline.set_fuse_operations`.
+
+        Operations implementing this function draw their random parameters
+        on every call, exactly as :func:`perform_operation` does.
+
+        :param size: The size of the image the operation is applied to, as
+         a (width, height) tuple.
+        :return: ``None`` if the operation cannot be expressed as a warp.
+         Otherwise a tuple of the size of the resulting image and a 3x3
+         NumPy array, mapping coordinates in the resulting image to
+         coordinates in the input image.
+        """
+        return None
+
+    def get_lut(self, images, tables):
+        """
+        Point-wise operations, which map each pixel value to a new value
+        independently of the other pixels, can describe themselves as lookup
+        tables, so that the pipeline can combine consecutive point-wise
+        operations and pass over each image once, rather than once per
+        operation. See :func:`~Augmentor.Pipeline.Pipeline.set_fuse_operations`.
+
+        Operations implementing this function draw their random parameters
+        on every call, exactly as :func:`perform_operation` does, but only
+        once they have established that they can return lookup tables.
+
+        :param images: The image(s) the operation is applied to, before the
+         lookup tables of any preceding point-wise operations are applied.
+        :param tables: ``None``, or the lookup tables of the preceding
+         point-wise operations which are not yet applied to :attr:`images`,
+         in the format returned by this function.
+        :type images: List containing PIL.Image object(s).
+        :return: ``None`` if the operation cannot be expressed as lookup
+         tables for :attr:`images`. Otherwise a list holding, for each
+         image, a uint8 NumPy array of shape (bands, 256) mapping every
+         value of each band to its new value.
+        """
+        return None
+
 
 class HistogramEqualisation(Operation):
     """
@@ -172,6 +645,33 @@ class Greyscale(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Converts the passed arrays to greyscale, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to convert to greyscale.
+        :type arrays: List containing NumPy array(s).
+        :return: The greyscale image(s) as a list of NumPy array(s) of shape
+         (height, width).
+        """
+        if not all(_array_is_supported(array) or (array.ndim == 3 and array.shape[2] == 4) for array in arrays):
+            return Operation.perform_operation_array(self, arrays)
+
+        return [_array_greyscale(array) for array in arrays]
+
+    def perform_operation_batch(self, batch, selected):
+        """
+        Converts the selected images of :attr:`batch` to greyscale, see
+        :func:`Operation.perform_operation_batch`. If only some images are
+        selected, the batch can no longer be held in a single array and a
+        list is returned.
+        """
+        if not _batch_is_supported(batch) or not np.all(selected):
+            return Operation.perform_operation_batch(self, batch, selected)
+
+        return _array_greyscale(batch) if batch.ndim == 4 else batch.copy()
+
 
 class Invert(Operation):
     """
@@ -210,6 +710,44 @@ class Invert(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Negates the passed arrays, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to negate.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        if not all(_array_is_supported(array) for array in arrays):
+            return Operation.perform_operation_array(self, arrays)
+
+        return [_array_max(array) - array for array in arrays]
+
+    def perform_operation_batch(self, batch, selected):
+        """
+        Negates the selected images of :attr:`batch` in a single vectorised
+        pass, see :func:`Operation.perform_operation_batch`.
+        """
+        if not _batch_is_supported(batch):
+            return Operation.perform_operation_batch(self, batch, selected)
+
+        unselected = ~np.asarray(selected, dtype=bool)
+
+        inverted = _array_max(batch) - batch
+        inverted[unselected] = batch[unselected]
+
+        return inverted
+
+    def get_lut(self, images, tables):
+        """
+        Returns the negation as lookup tables, see :func:`Operation.get_lut`.
+        """
+        if not _lut_is_supported(images):
+            return None
+
+        return [255 - _lut_values(image) for image in images]
+
 
 class BlackAndWhite(Operation):
     """
@@ -251,12 +789,19 @@ class BlackAndWhite(Operation):
          PIL.Image.
         """
 
+        def table():
+            return [0 if x < self.threshold else 255 for x in range(256)]
+
+        # The lookup table is built once for each threshold, rather than
+        # calling a function for every value of every image.
+        lut = _thresholds.get(self.threshold, table)
+
         def do(image):
             # An alternative would be to use
             # PIL.ImageOps.posterize(image=image, bits=1)
             # but this might be faster.
             image = ImageOps.grayscale(image)
-            return image.point(lambda x: 0 if x < self.threshold else 255, '1')
+            return image.point(lut, '1')
 
         augmented_images = []
 
@@ -265,6 +810,35 @@ class BlackAndWhite(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Converts the passed arrays to black and white, see
+        :func:`Operation.perform_operation_array`. For floating point
+        arrays, the :attr:`threshold` is scaled to between 0 and 1.
+
+        :param arrays: The image(s) to convert to black and white.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of boolean NumPy
+         array(s) of shape (height, width), as for PIL images of mode ``1``.
+        """
+        if not all(_array_is_supported(array) or (array.ndim == 3 and array.shape[2] == 4) for array in arrays):
+            return Operation.perform_operation_array(self, arrays)
+
+        return [_array_greyscale(array) >= self.threshold * _array_max(array) / 255. for array in arrays]
+
+    def perform_operation_batch(self, batch, selected):
+        """
+        Converts the selected images of :attr:`batch` to black and white,
+        see :func:`Operation.perform_operation_batch`. If only some images
+        are selected, a list is returned, as for :class:`Greyscale`.
+        """
+        if not _batch_is_supported(batch) or not np.all(selected):
+            return Operation.perform_operation_batch(self, batch, selected)
+
+        greyscale = _array_greyscale(batch) if batch.ndim == 4 else batch
+
+        return greyscale >= self.threshold * _array_max(batch) / 255.
+
 
 class RandomBrightness(Operation):
     """
@@ -316,6 +890,45 @@ class RandomBrightness(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Random change the passed arrays' brightness, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to transform.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        if not all(_array_is_supported(array) for array in arrays):
+            return Operation.perform_operation_array(self, arrays)
+
+        factor = np.random.uniform(self.min_factor, self.max_factor)
+
+        return [_array_blend(0, array, factor) for array in arrays]
+
+    def perform_operation_batch(self, batch, selected):
+        """
+        Random change the brightness of the selected images of
+        :attr:`batch`, drawing a factor for every image in one call, see
+        :func:`Operation.perform_operation_batch`.
+        """
+        if not _batch_is_supported(batch):
+            return Operation.perform_operation_batch(self, batch, selected)
+
+        return _array_blend(0, batch, _batch_factors(self, batch, selected))
+
+    def get_lut(self, images, tables):
+        """
+        Returns a random change of brightness as lookup tables, see
+        :func:`Operation.get_lut`.
+        """
+        if not _lut_is_supported(images):
+            return None
+
+        factor = np.random.uniform(self.min_factor, self.max_factor)
+
+        return [_array_blend(0, _lut_values(image), factor) for image in images]
+
 
 class RandomColor(Operation):
     """
@@ -367,6 +980,42 @@ class RandomColor(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Random change the passed arrays' saturation, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to transform.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        if not all(_array_is_supported(array) for array in arrays):
+            return Operation.perform_operation_array(self, arrays)
+
+        factor = np.random.uniform(self.min_factor, self.max_factor)
+
+        def do(array):
+            if array.ndim == 2:
+                return array.copy()
+            return _array_blend(_array_greyscale(array)[..., np.newaxis], array, factor)
+
+        return [do(array) for array in arrays]
+
+    def perform_operation_batch(self, batch, selected):
+        """
+        Random change the saturation of the selected images of
+        :attr:`batch`, drawing a factor for every image in one call, see
+        :func:`Operation.perform_operation_batch`.
+        """
+        if not _batch_is_supported(batch):
+            return Operation.perform_operation_batch(self, batch, selected)
+
+        if batch.ndim == 3:
+            # Greyscale images have no saturation to change.
+            return batch.copy()
+
+        return _array_blend(_array_greyscale(batch)[..., np.newaxis], batch, _batch_factors(self, batch, selected))
+
 
 class RandomContrast(Operation):
     """
@@ -418,6 +1067,75 @@ class RandomContrast(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Random change the passed arrays' contrast, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to transform.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        if not all(_array_is_supported(array) for array in arrays):
+            return Operation.perform_operation_array(self, arrays)
+
+        factor = np.random.uniform(self.min_factor, self.max_factor)
+
+        def do(array):
+            mean = _array_greyscale(array).mean()
+            if array.dtype == np.uint8:
+                mean = int(mean + 0.5)
+            return _array_blend(mean, array, factor)
+
+        return [do(array) for array in arrays]
+
+    def perform_operation_batch(self, batch, selected):
+        """
+        Random change the contrast of the selected images of :attr:`batch`,
+        drawing a factor for every image in one call, see
+        :func:`Operation.perform_operation_batch`.
+        """
+        if not _batch_is_supported(batch):
+            return Operation.perform_operation_batch(self, batch, selected)
+
+        greyscale = _array_greyscale(batch) if batch.ndim == 4 else batch
+        means = greyscale.reshape(len(greyscale), -1).mean(axis=1, dtype=np.float64)
+        if batch.dtype == np.uint8:
+            means = np.floor(means + 0.5)
+
+        means = means.astype(np.float32).reshape((-1,) + (1,) * (batch.ndim - 1))
+
+        return _array_blend(means, batch, _batch_factors(self, batch, selected))
+
+    def get_lut(self, images, tables):
+        """
+        Returns a random change of contrast as lookup tables, see
+        :func:`Operation.get_lut`. The mean intensity of each image is
+        computed from its histogram. This is not possible for RGB images
+        with pending lookup tables, for which ``None`` is returned.
+        """
+        if not _lut_is_supported(images):
+            return None
+
+        if tables is not None and not all(image.mode == "L" for image in images):
+            return None
+
+        factor = np.random.uniform(self.min_factor, self.max_factor)
+
+        def do(i, image):
+            if tables is None:
+                histogram = np.array(image.convert("L").histogram())
+                values = np.arange(256)
+            else:
+                histogram = np.array(image.histogram())
+                values = tables[i][0]
+
+            mean = int(np.dot(histogram, values) / float(histogram.sum()) + 0.5)
+
+            return _array_blend(mean, _lut_values(image), factor)
+
+        return [do(i, image) for i, image in enumerate(images)]
+
 
 class Skew(Operation):
     """
@@ -468,32 +1186,19 @@ class Skew(Operation):
         self.skew_type = skew_type
         self.magnitude = magnitude
 
-    def perform_operation(self, images):
+    def _perspective_coefficients(self, w, h):
         """
-        Perform the skew on the passed image(s) and returns the transformed
-        image(s). Uses the :attr:`skew_type` and :attr:`magnitude` parameters
-        to control the type of skew to perform as well as the degree to which
-        it is performed.
-
-        If a list of images is passed, they must have identical dimensions.
-        This is checked when we add the ground truth directory using
-        :func:`Pipeline.:func:`~Augmentor.Pipeline.Pipeline.ground_truth`
-        function.
-
-        However, if this check fails, the skew function will be skipped and
-        a warning thrown, in order to avoid an exception.
+        Randomly chooses a skew, according to the :attr:`skew_type` and
+        :attr:`magnitude` parameters, and returns the coefficients of the
+        perspective transform performing it on an image of width :attr:`w`
+        and height :attr:`h`.
 
-        :param images: The image(s) to skew.
-        :type images: List containing PIL.Image object(s).
-        :return: The transformed image(s) as a list of object(s) of type
-         PIL.Image.
+        :param w: The width of the image.
+        :param h: The height of the image.
+        :return: The 8 perspective transform coefficients, as used by
+         PIL's :func:`Image.transform`.
         """
 
-        # Width and height taken from first image in list.
-        # This requires that all ground truth images in the list
-        # have identical dimensions!
-        w, h = images[0].size
-
         x1 = 0
         x2 = h
         y1 = 0
@@ -596,19 +1301,35 @@ class Skew(Operation):
 
             new_plane = [corners["top_left"], corners["top_right"], corners["bottom_right"], corners["bottom_left"]]
 
-        # To calculate the coefficients required by PIL for the perspective skew,
-        # see the following Stack Overflow discussion: https://goo.gl/sSgJdj
-        matrix = []
+        return _homography(original_plane, new_plane)
 
-        for p1, p2 in zip(new_plane, original_plane):
-            matrix.append([p1[0], p1[1], 1, 0, 0, 0, -p2[0] * p1[0], -p2[0] * p1[1]])
-            matrix.append([0, 0, 0, p1[0], p1[1], 1, -p2[1] * p1[0], -p2[1] * p1[1]])
+    def perform_operation(self, images):
+        """
+        Perform the skew on the passed image(s) and returns the transformed
+        image(s). Uses the :attr:`skew_type` and :attr:`magnitude` parameters
+        to control the type of skew to perform as well as the degree to which
+        it is performed.
+
+        If a list of images is passed, they must have identical dimensions.
+        This is checked when we add the ground truth directory using
+        :func:`Pipeline.:func:`~Augmentor.Pipeline.Pipeline.ground_truth`
+        function.
 
-        A = np.matrix(matrix, dtype=np.float)
-        B = np.array(original_plane).reshape(8)
+        However, if this check fails, the skew function will be skipped and
+        a warning thrown, in order to avoid an exception.
+
+        :param images: The image(s) to skew.
+        :type images: List containing PIL.Image object(s).
+        :return: The transformed image(s) as a list of object(s) of type
+         PIL.Image.
+        """
+
+        # Width and height taken from first image in list.
+        # This requires that all ground truth images in the list
+        # have identical dimensions!
+        w, h = images[0].size
 
-        perspective_skew_coefficients_matrix = np.dot(np.linalg.pinv(A), B)
-        perspective_skew_coefficients_matrix = np.array(perspective_skew_coefficients_matrix).reshape(8)
+        perspective_skew_coefficients_matrix = self._perspective_coefficients(w, h)
 
         def do(image):
             return image.transform(image.size,
@@ -623,6 +1344,17 @@ class Skew(Operation):
 
         return augmented_images
 
+    def get_warp(self, size):
+        """
+        Returns the skew as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the skewed image and the warp.
+        """
+        a, b, c, d, e, f, g, h = self._perspective_coefficients(*size)
+
+        return size, np.array([[a, b, c], [d, e, f], [g, h, 1]])
+
 
 class RotateStandard(Operation):
     """
@@ -733,6 +1465,38 @@ class Rotate(Operation):
 
         return augmented_images
 
+    def get_warp(self, size):
+        """
+        Returns the rotation as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the rotated image and the warp.
+        """
+        random_factor = random.randint(1, 3)
+
+        if self.rotation == -1:
+            return _rotation_warp(size, 90 * random_factor)
+        else:
+            return _rotation_warp(size, self.rotation)
+
+    def perform_operation_array(self, arrays):
+        """
+        Rotate the passed arrays by either 90, 180, or 270 degrees, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to rotate.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        random_factor = random.randint(1, 3)
+
+        if self.rotation == -1:
+            k = random_factor
+        else:
+            k = self.rotation // 90
+
+        return [np.ascontiguousarray(np.rot90(array, k)) for array in arrays]
+
 
 class RotateRange(Operation):
     """
@@ -743,7 +1507,8 @@ class RotateRange(Operation):
     returned by this function. That is to say, that after a rotation
     has been performed, the largest possible area of the same aspect ratio
     of the original image is cropped from the skewed image, and this is
-    then resized to match the original image size.
+    then resized to match the original image size. The rotation, crop, and
+    resize are performed together, so that each image is resampled once.
 
     The method by which this is performed is described as follows:
 
@@ -793,6 +1558,47 @@ class RotateRange(Operation):
          PIL.Image.
         """
 
+        size = images[0].size
+        matrix = self._warp(size, self._random_rotation())
+
+        def do(image):
+            # Rotating while expanding the canvas, cropping the largest area
+            # from the rotated image, and resizing it back to the size of
+            # the image passed originally is done in a single transform.
+            return image.transform(size, Image.AFFINE, tuple(matrix[:2].ravel()), resample=Image.BICUBIC)
+
+        augmented_images = []
+
+        for image in images:
+            augmented_images.append(do(image))
+
+        return augmented_images
+
+    def get_warp(self, size):
+        """
+        Returns the rotation, including the crop and resize back to
+        :attr:`size`, as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the rotated image and the warp.
+        """
+        return size, self._warp(size, self._random_rotation())
+
+    def _warp(self, size, rotation):
+        """
+        Returns the matrix of a warp rotating an image of :attr:`size` by
+        :attr:`rotation` degrees, cropping the largest area from the rotated
+        image and resizing it back to :attr:`size`.
+        """
+        rotated_size, rotate = _rotation_warp(size, rotation)
+
+        return rotate.dot(_box_warp(self._crop_box(rotation, rotated_size), size))
+
+    def _random_rotation(self):
+        """
+        Returns a random rotation between :attr:`max_left_rotation` and
+        :attr:`max_right_rotation`.
+        """
         # TODO: Small rotations of 1 or 2 degrees can create black pixels
         random_left = random.randint(self.max_left_rotation, 0)
         random_right = random.randint(0, self.max_right_rotation)
@@ -806,50 +1612,41 @@ class RotateRange(Operation):
         elif left_or_right == 1:
             rotation = random_right
 
-        def do(image):
-            # Get size before we rotate
-            x = image.size[0]
-            y = image.size[1]
-
-            # Rotate, while expanding the canvas size
-            image = image.rotate(rotation, expand=True, resample=Image.BICUBIC)
-
-            # Get size after rotation, which includes the empty space
-            X = image.size[0]
-            Y = image.size[1]
-
-            # Get our two angles needed for the calculation of the largest area
-            angle_a = abs(rotation)
-            angle_b = 90 - angle_a
-
-            # Python deals in radians so get our radians
-            angle_a_rad = math.radians(angle_a)
-            angle_b_rad = math.radians(angle_b)
-
-            # Calculate the sins
-            angle_a_sin = math.sin(angle_a_rad)
-            angle_b_sin = math.sin(angle_b_rad)
+        return rotation
 
-            # Find the maximum area of the rectangle that could be cropped
-            E = (math.sin(angle_a_rad)) / (math.sin(angle_b_rad)) * \
-                (Y - X * (math.sin(angle_a_rad) / math.sin(angle_b_rad)))
-            E = E / 1 - (math.sin(angle_a_rad) ** 2 / math.sin(angle_b_rad) ** 2)
-            B = X - E
-            A = (math.sin(angle_a_rad) / math.sin(angle_b_rad)) * B
+    @staticmethod
+    def _crop_box(rotation, rotated_size):
+        """
+        Returns the largest area of the same aspect ratio as the original
+        image that can be cropped from an image rotated by :attr:`rotation`
+        degrees, whose expanded canvas is of size :attr:`rotated_size`.
+        """
+        # Get size after rotation, which includes the empty space
+        X = rotated_size[0]
+        Y = rotated_size[1]
 
-            # Crop this area from the rotated image
-            # image = image.crop((E, A, X - E, Y - A))
-            image = image.crop((int(round(E)), int(round(A)), int(round(X - E)), int(round(Y - A))))
+        # Get our two angles needed for the calculation of the largest area
+        angle_a = abs(rotation)
+        angle_b = 90 - angle_a
 
-            # Return the image, re-sized to the size of the image passed originally
-            return image.resize((x, y), resample=Image.BICUBIC)
+        # Python deals in radians so get our radians
+        angle_a_rad = math.radians(angle_a)
+        angle_b_rad = math.radians(angle_b)
 
-        augmented_images = []
+        # Calculate the sins
+        angle_a_sin = math.sin(angle_a_rad)
+        angle_b_sin = math.sin(angle_b_rad)
 
-        for image in images:
-            augmented_images.append(do(image))
+        # Find the maximum area of the rectangle that could be cropped
+        E = (math.sin(angle_a_rad)) / (math.sin(angle_b_rad)) * \
+            (Y - X * (math.sin(angle_a_rad) / math.sin(angle_b_rad)))
+        E = E / 1 - (math.sin(angle_a_rad) ** 2 / math.sin(angle_b_rad) ** 2)
+        B = X - E
+        A = (math.sin(angle_a_rad) / math.sin(angle_b_rad)) * B
 
-        return augmented_images
+        # Crop this area from the rotated image
+        # image = image.crop((E, A, X - E, Y - A))
+        return int(round(E)), int(round(A)), int(round(X - E)), int(round(Y - A))
 
 
 class Resize(Operation):
@@ -900,6 +1697,20 @@ class Resize(Operation):
 
         return augmented_images
 
+    def get_warp(self, size):
+        """
+        Returns the resize as a warp, see :func:`Operation.get_warp`.
+        Resizing using the ``NEAREST`` filter, for example for masks, is not
+        combined with other operations.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The new size and the warp, or ``None``.
+        """
+        if self.resample_filter == "NEAREST":
+            return None
+
+        return (self.width, self.height), _box_warp((0, 0) + tuple(size), (self.width, self.height))
+
 
 class Flip(Operation):
     """
@@ -958,6 +1769,40 @@ class Flip(Operation):
 
         return augmented_images
 
+    def get_warp(self, size):
+        """
+        Returns the mirroring as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the mirrored image and the warp.
+        """
+        random_axis = random.randint(0, 1)
+
+        w, h = size
+
+        if self.top_bottom_left_right == "LEFT_RIGHT" or \
+                (self.top_bottom_left_right == "RANDOM" and random_axis == 0):
+            return size, np.array([[-1, 0, w], [0, 1, 0], [0, 0, 1]])
+        else:
+            return size, np.array([[1, 0, 0], [0, -1, h], [0, 0, 1]])
+
+    def perform_operation_array(self, arrays):
+        """
+        Mirror the passed arrays, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to mirror.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        random_axis = random.randint(0, 1)
+
+        if self.top_bottom_left_right == "LEFT_RIGHT" or \
+                (self.top_bottom_left_right == "RANDOM" and random_axis == 0):
+            return [np.ascontiguousarray(array[:, ::-1]) for array in arrays]
+        else:
+            return [np.ascontiguousarray(array[::-1]) for array in arrays]
+
 
 class Crop(Operation):
     """
@@ -1002,19 +1847,14 @@ class Crop(Operation):
 
         w, h = images[0].size  # All images must be the same size, so we can just check the first image in the list
 
-        left_shift = random.randint(0, int((w - self.width)))
-        down_shift = random.randint(0, int((h - self.height)))
+        crop_box = self._crop_box(w, h)
 
         def do(image):
-
             # TODO: Fix. We may want a full crop.
-            if self.width > w or self.height > h:
+            if crop_box is None:
                 return image
 
-            if self.centre:
-                return image.crop(((w/2)-(self.width/2), (h/2)-(self.height/2), (w/2)+(self.width/2), (h/2)+(self.height/2)))
-            else:
-                return image.crop((left_shift, down_shift, self.width + left_shift, self.height + down_shift))
+            return image.crop(crop_box)
 
         augmented_images = []
 
@@ -1023,6 +1863,40 @@ class Crop(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Crop an area from the passed arrays, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to crop an area from.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        h, w = arrays[0].shape[:2]
+
+        crop_box = self._crop_box(w, h)
+
+        if crop_box is None:
+            return arrays
+
+        return [_crop_array(array, crop_box) for array in arrays]
+
+    def _crop_box(self, w, h):
+        """
+        Returns the area to crop from an image of width :attr:`w` and
+        height :attr:`h`, or ``None`` if the image is too small.
+        """
+        left_shift = random.randint(0, int((w - self.width)))
+        down_shift = random.randint(0, int((h - self.height)))
+
+        if self.width > w or self.height > h:
+            return None
+
+        if self.centre:
+            return (w/2)-(self.width/2), (h/2)-(self.height/2), (w/2)+(self.width/2), (h/2)+(self.height/2)
+        else:
+            return left_shift, down_shift, self.width + left_shift, self.height + down_shift
+
 
 class CropPercentage(Operation):
     """
@@ -1063,25 +1937,13 @@ class CropPercentage(Operation):
          PIL.Image.
         """
 
-        if self.randomise_percentage_area:
-            r_percentage_area = round(random.uniform(0.1, self.percentage_area), 2)
-        else:
-            r_percentage_area = self.percentage_area
-
         # The images must be of identical size, which is checked by Pipeline.ground_truth().
         w, h = images[0].size
 
-        w_new = int(floor(w * r_percentage_area))  # TODO: Floor might return 0, so we need to check this.
-        h_new = int(floor(h * r_percentage_area))
-
-        left_shift = random.randint(0, int((w - w_new)))
-        down_shift = random.randint(0, int((h - h_new)))
+        crop_box = self._crop_box(w, h)
 
         def do(image):
-            if self.centre:
-                return image.crop(((w/2)-(w_new/2), (h/2)-(h_new/2), (w/2)+(w_new/2), (h/2)+(h_new/2)))
-            else:
-                return image.crop((left_shift, down_shift, w_new + left_shift, h_new + down_shift))
+            return image.crop(crop_box)
 
         augmented_images = []
 
@@ -1090,6 +1952,42 @@ class CropPercentage(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Crop the passed arrays by percentage area, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to crop an area from.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        h, w = arrays[0].shape[:2]
+
+        crop_box = self._crop_box(w, h)
+
+        return [_crop_array(array, crop_box) for array in arrays]
+
+    def _crop_box(self, w, h):
+        """
+        Returns the area to crop from an image of width :attr:`w` and
+        height :attr:`h`.
+        """
+        if self.randomise_percentage_area:
+            r_percentage_area = round(random.uniform(0.1, self.percentage_area), 2)
+        else:
+            r_percentage_area = self.percentage_area
+
+        w_new = int(floor(w * r_percentage_area))  # TODO: Floor might return 0, so we need to check this.
+        h_new = int(floor(h * r_percentage_area))
+
+        left_shift = random.randint(0, int((w - w_new)))
+        down_shift = random.randint(0, int((h - h_new)))
+
+        if self.centre:
+            return (w/2)-(w_new/2), (h/2)-(h_new/2), (w/2)+(w_new/2), (h/2)+(h_new/2)
+        else:
+            return left_shift, down_shift, w_new + left_shift, h_new + down_shift
+
 
 class CropRandom(Operation):
     """
@@ -1120,14 +2018,10 @@ class CropRandom(Operation):
 
         w, h = images[0].size
 
-        w_new = int(floor(w * self.percentage_area))
-        h_new = int(floor(h * self.percentage_area))
-
-        random_left_shift = random.randint(0, int((w - w_new)))  # Note: randint() is from uniform distribution.
-        random_down_shift = random.randint(0, int((h - h_new)))
+        crop_box = self._crop_box(w, h)
 
         def do(image):
-            return image.crop((random_left_shift, random_down_shift, w_new + random_left_shift, h_new + random_down_shift))
+            return image.crop(crop_box)
 
         augmented_images = []
 
@@ -1136,6 +2030,34 @@ class CropRandom(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Randomly crop the passed arrays, see
+        :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to crop an area from.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        h, w = arrays[0].shape[:2]
+
+        crop_box = self._crop_box(w, h)
+
+        return [_crop_array(array, crop_box) for array in arrays]
+
+    def _crop_box(self, w, h):
+        """
+        Returns a random area to crop from an image of width :attr:`w` and
+        height :attr:`h`.
+        """
+        w_new = int(floor(w * self.percentage_area))
+        h_new = int(floor(h * self.percentage_area))
+
+        random_left_shift = random.randint(0, int((w - w_new)))  # Note: randint() is from uniform distribution.
+        random_down_shift = random.randint(0, int((h - h_new)))
+
+        return random_left_shift, random_down_shift, w_new + random_left_shift, h_new + random_down_shift
+
 
 class Shear(Operation):
     """
@@ -1200,8 +2122,57 @@ class Shear(Operation):
         #     return Image.fromarray(img_as_ubyte(image_sheared))
         ######################################################################
 
-        width, height = images[0].size
+        size = images[0].size
+
+        angle_to_shear, direction = self._random_shear()
+
+        matrix = self._warp(size, angle_to_shear, direction)
+
+        def do(image):
+            # Shearing onto a widened canvas, cropping, and resizing back to
+            # the original size is done in a single transform.
+            return image.transform(size, Image.AFFINE, tuple(matrix[:2].ravel()), resample=Image.BICUBIC)
+
+        augmented_images = []
+
+        for image in images:
+            augmented_images.append(do(image))
+
+        return augmented_images
+
+    def get_warp(self, size):
+        """
+        Returns the shear, including the crop and resize back to
+        :attr:`size`, as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the sheared image and the warp.
+        """
+        angle_to_shear, direction = self._random_shear()
 
+        return size, self._warp(size, angle_to_shear, direction)
+
+    def _warp(self, size, angle_to_shear, direction):
+        """
+        Returns the matrix of a warp shearing an image of :attr:`size` by
+        :attr:`angle_to_shear` degrees along the :attr:`direction` axis,
+        cropping the sheared image and resizing it back to :attr:`size`.
+        """
+        transform_matrix, canvas_size, crop_box = self._shear_geometry(size, angle_to_shear, direction)
+
+        # Crop boxes are rounded to whole pixels by PIL.
+        crop_box = [int(round(x)) for x in crop_box]
+
+        shear = np.array(transform_matrix + (0, 0, 1)).reshape(3, 3)
+
+        return shear.dot(_box_warp(crop_box, size))
+
+    def _random_shear(self):
+        """
+        Returns a random angle, between :attr:`max_shear_left` and
+        :attr:`max_shear_right`, and a random direction, ``"x"`` or ``"y"``,
+        to shear by.
+        """
         # For testing.
         # max_shear_left = 20
         # max_shear_right = 20
@@ -1209,6 +2180,21 @@ class Shear(Operation):
         angle_to_shear = int(random.uniform((abs(self.max_shear_left)*-1) - 1, self.max_shear_right + 1))
         if angle_to_shear != -1: angle_to_shear += 1
 
+        directions = ["x", "y"]
+        direction = random.choice(directions)
+
+        return angle_to_shear, direction
+
+    @staticmethod
+    def _shear_geometry(size, angle_to_shear, direction):
+        """
+        Returns the affine transform matrix shearing an image of
+        :attr:`size` by :attr:`angle_to_shear` degrees along the
+        :attr:`direction` axis, the size of the canvas the sheared image is
+        drawn on, and the box to crop from this canvas.
+        """
+        width, height = size
+
         # Alternative method
         # Calculate our offset when cropping
         # We know one angle, phi (angle_to_shear)
@@ -1226,76 +2212,52 @@ class Shear(Operation):
         # any of the affine transformation matrices, seen here:
         # https://en.wikipedia.org/wiki/Transformation_matrix#/media/File:2D_affine_transformation_matrix.svg
 
-        directions = ["x", "y"]
-        direction = random.choice(directions)
-
-        def do(image):
-
-            # We use the angle phi in radians later
-            phi = math.tan(math.radians(angle_to_shear))
-
-            if direction == "x":
-                # Here we need the unknown b, where a is
-                # the height of the image and phi is the
-                # angle we want to shear (our knowns):
-                # b = tan(phi) * a
-                shift_in_pixels = phi * height
-
-                if shift_in_pixels > 0:
-                    shift_in_pixels = math.ceil(shift_in_pixels)
-                else:
-                    shift_in_pixels = math.floor(shift_in_pixels)
-
-                # For negative tilts, we reverse phi and set offset to 0
-                # Also matrix offset differs from pixel shift for neg
-                # but not for pos so we will copy this value in case
-                # we need to change it
-                matrix_offset = shift_in_pixels
-                if angle_to_shear <= 0:
-                    shift_in_pixels = abs(shift_in_pixels)
-                    matrix_offset = 0
-                    phi = abs(phi) * -1
+        # We use the angle phi in radians later
+        phi = math.tan(math.radians(angle_to_shear))
 
-                # Note: PIL expects the inverse scale, so 1/scale_factor for example.
-                transform_matrix = (1, phi, -matrix_offset,
-                                    0, 1, 0)
+        if direction == "x":
+            # Here we need the unknown b, where a is
+            # the height of the image and phi is the
+            # angle we want to shear (our knowns):
+            # b = tan(phi) * a
+            shift_in_pixels = phi * height
 
-                image = image.transform((int(round(width + shift_in_pixels)), height),
-                                        Image.AFFINE,
-                                        transform_matrix,
-                                        Image.BICUBIC)
-
-                image = image.crop((abs(shift_in_pixels), 0, width, height))
-
-                return image.resize((width, height), resample=Image.BICUBIC)
-
-            elif direction == "y":
-                shift_in_pixels = phi * width
-
-                matrix_offset = shift_in_pixels
-                if angle_to_shear <= 0:
-                    shift_in_pixels = abs(shift_in_pixels)
-                    matrix_offset = 0
-                    phi = abs(phi) * -1
+            if shift_in_pixels > 0:
+                shift_in_pixels = math.ceil(shift_in_pixels)
+            else:
+                shift_in_pixels = math.floor(shift_in_pixels)
 
-                transform_matrix = (1, 0, 0,
-                                    phi, 1, -matrix_offset)
+            # For negative tilts, we reverse phi and set offset to 0
+            # Also matrix offset differs from pixel shift for neg
+            # but not for pos so we will copy this value in case
+            # we need to change it
+            matrix_offset = shift_in_pixels
+            if angle_to_shear <= 0:
+                shift_in_pixels = abs(shift_in_pixels)
+                matrix_offset = 0
+                phi = abs(phi) * -1
 
-                image = image.transform((width, int(round(height + shift_in_pixels))),
-                                        Image.AFFINE,
-                                        transform_matrix,
-                                        Image.BICUBIC)
+            # Note: PIL expects the inverse scale, so 1/scale_factor for example.
+            transform_matrix = (1, phi, -matrix_offset,
+                                0, 1, 0)
 
-                image = image.crop((0, abs(shift_in_pixels), width, height))
+            return transform_matrix, (int(round(width + shift_in_pixels)), height), \
+                (abs(shift_in_pixels), 0, width, height)
 
-                return image.resize((width, height), resample=Image.BICUBIC)
+        elif direction == "y":
+            shift_in_pixels = phi * width
 
-        augmented_images = []
+            matrix_offset = shift_in_pixels
+            if angle_to_shear <= 0:
+                shift_in_pixels = abs(shift_in_pixels)
+                matrix_offset = 0
+                phi = abs(phi) * -1
 
-        for image in images:
-            augmented_images.append(do(image))
+            transform_matrix = (1, 0, 0,
+                                phi, 1, -matrix_offset)
 
-        return augmented_images
+            return transform_matrix, (width, int(round(height + shift_in_pixels))), \
+                (0, abs(shift_in_pixels), width, height)
 
 
 class Scale(Operation):
@@ -1350,6 +2312,19 @@ class Scale(Operation):
 
         return augmented_images
 
+    def get_warp(self, size):
+        """
+        Returns the scaling as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the scaled image and the warp.
+        """
+        w, h = size
+
+        new_size = (int(w * self.scale_factor), int(h * self.scale_factor))
+
+        return new_size, _box_warp((0, 0, w, h), new_size)
+
 
 class Distort(Operation):
     """
@@ -1398,93 +2373,22 @@ class Distort(Operation):
 
         w, h = images[0].size
 
-        horizontal_tiles = self.grid_width
-        vertical_tiles = self.grid_height
-
-        width_of_square = int(floor(w / float(horizontal_tiles)))
-        height_of_square = int(floor(h / float(vertical_tiles)))
-
-        width_of_last_square = w - (width_of_square * (horizontal_tiles - 1))
-        height_of_last_square = h - (height_of_square * (vertical_tiles - 1))
-
-        dimensions = []
-
-        for vertical_tile in range(vertical_tiles):
-            for horizontal_tile in range(horizontal_tiles):
-                if vertical_tile == (vertical_tiles - 1) and horizontal_tile == (horizontal_tiles - 1):
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_last_square + (horizontal_tile * width_of_square),
-                                       height_of_last_square + (height_of_square * vertical_tile)])
-                elif vertical_tile == (vertical_tiles - 1):
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_square + (horizontal_tile * width_of_square),
-                                       height_of_last_square + (height_of_square * vertical_tile)])
-                elif horizontal_tile == (horizontal_tiles - 1):
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_last_square + (horizontal_tile * width_of_square),
-                                       height_of_square + (height_of_square * vertical_tile)])
-                else:
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_square + (horizontal_tile * width_of_square),
-                                       height_of_square + (height_of_square * vertical_tile)])
-
-        # For loop that generates polygons could be rewritten, but maybe harder to read?
-        # polygons = [x1,y1, x1,y2, x2,y2, x2,y1 for x1,y1, x2,y2 in dimensions]
-
-        # last_column = [(horizontal_tiles - 1) + horizontal_tiles * i for i in range(vertical_tiles)]
-        last_column = []
-        for i in range(vertical_tiles):
-            last_column.append((horizontal_tiles-1)+horizontal_tiles*i)
-
-        last_row = range((horizontal_tiles * vertical_tiles) - horizontal_tiles, horizontal_tiles * vertical_tiles)
-
-        polygons = []
-        for x1, y1, x2, y2 in dimensions:
-            polygons.append([x1, y1, x1, y2, x2, y2, x2, y1])
-
-        polygon_indices = []
-        for i in range((vertical_tiles * horizontal_tiles) - 1):
-            if i not in last_row and i not in last_column:
-                polygon_indices.append([i, i + 1, i + horizontal_tiles, i + 1 + horizontal_tiles])
+        dimensions, vertices = _grid((w, h), self.grid_width, self.grid_height)
 
-        def do(image):
+        # Every corner shared by four tiles is displaced at random, moving
+        # the matching corner of each of the four tiles. The displacements
+        # are drawn in row major order, dx before dy, for each corner.
+        interior = vertices.shape[0] - 2, vertices.shape[1] - 2
+        displacements = np.array([random.randint(-self.magnitude, self.magnitude)
+                                  for _ in range(interior[0] * interior[1] * 2)], dtype=vertices.dtype)
 
-            for a, b, c, d in polygon_indices:
-                dx = random.randint(-self.magnitude, self.magnitude)
-                dy = random.randint(-self.magnitude, self.magnitude)
-
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[a]
-                polygons[a] = [x1, y1,
-                               x2, y2,
-                               x3 + dx, y3 + dy,
-                               x4, y4]
-
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[b]
-                polygons[b] = [x1, y1,
-                               x2 + dx, y2 + dy,
-                               x3, y3,
-                               x4, y4]
-
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[c]
-                polygons[c] = [x1, y1,
-                               x2, y2,
-                               x3, y3,
-                               x4 + dx, y4 + dy]
-
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[d]
-                polygons[d] = [x1 + dx, y1 + dy,
-                               x2, y2,
-                               x3, y3,
-                               x4, y4]
-
-            generated_mesh = []
-            for i in range(len(dimensions)):
-                generated_mesh.append([dimensions[i], polygons[i]])
+        displaced_vertices = vertices.copy()
+        displaced_vertices[1:-1, 1:-1] += displacements.reshape(interior + (2,))
 
+        # The same mesh is used for the image and its ground truth images.
+        generated_mesh = _mesh(dimensions, displaced_vertices)
+
+        def do(image):
             return image.transform(image.size, Image.MESH, generated_mesh, resample=Image.BICUBIC)
 
         augmented_images = []
@@ -1499,6 +2403,11 @@ class GaussianDistortion(Operation):
     """
     This class performs randomised, elastic gaussian distortions on images.
     """
+    # The part of the surface, as (x from, x to, y from, y to), mapped onto
+    # the image for each corner.
+    _corners = {'dr': (0, 0.5, 0, 0.5), 'dl': (0.5, 1, 0, 0.5), 'ur': (0, 0.5, 0.5, 1), 'ul': (0.5, 1, 0.5, 1),
+                'bell': (0, 1, 0, 1)}
+
     def __init__(self, probability, grid_width, grid_height, magnitude, corner, method, mex, mey, sdx, sdy):
         """
         As well as the probability, the granularity of the distortions
@@ -1560,6 +2469,29 @@ class GaussianDistortion(Operation):
         self.sdx = sdx
         self.sdy = sdy
 
+        # The surface is normalised by its range over the unit square,
+        # sampled on a 50 by 50 grid, which is fixed for the operation.
+        x, y = np.meshgrid(np.linspace(0, 1), np.linspace(0, 1))
+        z = self._surface(x, y)
+        self._surface_min = np.amin(z)
+        self._surface_max = np.amax(z)
+
+    def _surface(self, x, y):
+        """
+        Evaluates the surface defined by :attr:`mex`, :attr:`mey`,
+        :attr:`sdx`, :attr:`sdy`, and :attr:`method` at the given points.
+
+        :param x: The x coordinates of the points.
+        :param y: The y coordinates of the points.
+        :type x: Array of floats
+        :type y: Array of floats
+        :return: The height of the surface at each point.
+        """
+        const = -1 if self.method == "out" else 1
+
+        return const * np.exp(-(((x - self.mex) ** 2) / self.sdx + ((y - self.mey) ** 2) / self.sdy)) \
+            + max(0, -const) - max(0, const)
+
     def perform_operation(self, images):
         """
         Distorts the passed image(s) according to the parameters supplied
@@ -1572,119 +2504,27 @@ class GaussianDistortion(Operation):
         """
         w, h = images[0].size
 
-        horizontal_tiles = self.grid_width
-        vertical_tiles = self.grid_height
-
-        width_of_square = int(floor(w / float(horizontal_tiles)))
-        height_of_square = int(floor(h / float(vertical_tiles)))
-
-        width_of_last_square = w - (width_of_square * (horizontal_tiles - 1))
-        height_of_last_square = h - (height_of_square * (vertical_tiles - 1))
-
-        dimensions = []
-
-        for vertical_tile in range(vertical_tiles):
-            for horizontal_tile in range(horizontal_tiles):
-                if vertical_tile == (vertical_tiles - 1) and horizontal_tile == (horizontal_tiles - 1):
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_last_square + (horizontal_tile * width_of_square),
-                                       height_of_last_square + (height_of_square * vertical_tile)])
-                elif vertical_tile == (vertical_tiles - 1):
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_square + (horizontal_tile * width_of_square),
-                                       height_of_last_square + (height_of_square * vertical_tile)])
-                elif horizontal_tile == (horizontal_tiles - 1):
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_last_square + (horizontal_tile * width_of_square),
-                                       height_of_square + (height_of_square * vertical_tile)])
-                else:
-                    dimensions.append([horizontal_tile * width_of_square,
-                                       vertical_tile * height_of_square,
-                                       width_of_square + (horizontal_tile * width_of_square),
-                                       height_of_square + (height_of_square * vertical_tile)])
-
-        last_column = []
-        for i in range(vertical_tiles):
-            last_column.append((horizontal_tiles-1)+horizontal_tiles*i)
-
-        last_row = range((horizontal_tiles * vertical_tiles) - horizontal_tiles, horizontal_tiles * vertical_tiles)
-
-        polygons = []
-        for x1, y1, x2, y2 in dimensions:
-            polygons.append([x1, y1, x1, y2, x2, y2, x2, y1])
-
-        polygon_indices = []
-        for i in range((vertical_tiles * horizontal_tiles) - 1):
-            if i not in last_row and i not in last_column:
-                polygon_indices.append([i, i + 1, i + horizontal_tiles, i + 1 + horizontal_tiles])
-
-        def sigmoidf(x, y, sdx=0.05, sdy=0.05, mex=0.5, mey=0.5, const=1):
-            sigmoid = lambda x1, y1:  (const * (math.exp(-(((x1-mex)**2)/sdx + ((y1-mey)**2)/sdy) )) + max(0,-const) - max(0, const))
-            xl = np.linspace(0,1)
-            yl = np.linspace(0, 1)
-            X, Y = np.meshgrid(xl, yl)
-
-            Z = np.vectorize(sigmoid)(X, Y)
-            mino = np.amin(Z)
-            maxo = np.amax(Z)
-            res = sigmoid(x, y)
-            res = max(((((res - mino) * (1 - 0)) / (maxo - mino)) + 0), 0.01)*self.magnitude
-            return res
-
-        def corner(x, y, corner="ul", method="out", sdx=0.05, sdy=0.05, mex=0.5, mey=0.5):
-            ll = {'dr': (0, 0.5, 0, 0.5), 'dl': (0.5, 1, 0, 0.5), 'ur': (0, 0.5, 0.5, 1), 'ul': (0.5, 1, 0.5, 1), 'bell': (0, 1, 0, 1)}
-            new_c = ll[corner]
-            new_x = (((x - 0) * (new_c[1] - new_c[0])) / (1 - 0)) + new_c[0]
-            new_y = (((y - 0) * (new_c[3] - new_c[2])) / (1 - 0)) + new_c[2]
-            if method == "in":
-                const = 1
-            else:
-                if method == "out":
-                    const =- 1
-                else:
-                    const = 1
-            res = sigmoidf(x=new_x, y=new_y,sdx=sdx, sdy=sdy, mex=mex, mey=mey, const=const)
+        dimensions, vertices = _grid((w, h), self.grid_width, self.grid_height)
 
-            return res
+        # The standard deviation of the displacement of each corner shared
+        # by four tiles is given by the normalised surface, mapped onto the
+        # image according to the chosen corner.
+        x_from, x_to, y_from, y_to = self._corners[self.corner]
+        x = vertices[1:-1, 1:-1, 0] / float(w)
+        y = vertices[1:-1, 1:-1, 1] / float(h)
+        z = self._surface(x * (x_to - x_from) + x_from, y * (y_to - y_from) + y_from)
+        sigma = np.maximum((z - self._surface_min) / (self._surface_max - self._surface_min), 0.01) * self.magnitude
 
-        def do(image):
+        # Drawn in row major order, dx before dy, for each corner.
+        displacements = np.random.normal(0, sigma[..., np.newaxis], sigma.shape + (2,))
+
+        displaced_vertices = vertices.astype(np.float64)
+        displaced_vertices[1:-1, 1:-1] += displacements
 
-            for a, b, c, d in polygon_indices:
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[a]
-
-                sigmax = corner(x=x3/w, y=y3/h, corner=self.corner, method=self.method, sdx=self.sdx, sdy=self.sdy, mex=self.mex, mey=self.mey)
-                dx = np.random.normal(0, sigmax, 1)[0]
-                dy = np.random.normal(0, sigmax, 1)[0]
-                polygons[a] = [x1, y1,
-                               x2, y2,
-                               x3 + dx, y3 + dy,
-                               x4, y4]
-
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[b]
-                polygons[b] = [x1, y1,
-                               x2 + dx, y2 + dy,
-                               x3, y3,
-                               x4, y4]
-
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[c]
-                polygons[c] = [x1, y1,
-                               x2, y2,
-                               x3, y3,
-                               x4 + dx, y4 + dy]
-
-                x1, y1, x2, y2, x3, y3, x4, y4 = polygons[d]
-                polygons[d] = [x1 + dx, y1 + dy,
-                               x2, y2,
-                               x3, y3,
-                               x4, y4]
-
-            generated_mesh = []
-            for i in range(len(dimensions)):
-                generated_mesh.append([dimensions[i], polygons[i]])
+        # The same mesh is used for the image and its ground truth images.
+        generated_mesh = _mesh(dimensions, displaced_vertices)
 
+        def do(image):
             return image.transform(image.size, Image.MESH, generated_mesh, resample=Image.BICUBIC)
 
         augmented_images = []
@@ -1734,17 +2574,7 @@ class Zoom(Operation):
         factor = round(random.uniform(self.min_factor, self.max_factor), 2)
 
         def do(image):
-            w, h = image.size
-
-            image_zoomed = image.resize((int(round(image.size[0] * factor)),
-                                         int(round(image.size[1] * factor))),
-                                         resample=Image.BICUBIC)
-            w_zoomed, h_zoomed = image_zoomed.size
-
-            return image_zoomed.crop((floor((float(w_zoomed) / 2) - (float(w) / 2)),
-                                      floor((float(h_zoomed) / 2) - (float(h) / 2)),
-                                      floor((float(w_zoomed) / 2) + (float(w) / 2)),
-                                      floor((float(h_zoomed) / 2) + (float(h) / 2))))
+            return _zoom(image, factor)
 
         augmented_images = []
 
@@ -1753,6 +2583,17 @@ class Zoom(Operation):
 
         return augmented_images
 
+    def get_warp(self, size):
+        """
+        Returns the zoom as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the zoomed image and the warp.
+        """
+        factor = round(random.uniform(self.min_factor, self.max_factor), 2)
+
+        return size, _zoom_warp(size, factor)
+
 
 class ZoomRandom(Operation):
     """
@@ -1793,22 +2634,13 @@ class ZoomRandom(Operation):
          PIL.Image.
         """
 
-        if self.randomise:
-            r_percentage_area = round(random.uniform(0.1, self.percentage_area), 2)
-        else:
-            r_percentage_area = self.percentage_area
-
         w, h = images[0].size
-        w_new = int(floor(w * r_percentage_area))
-        h_new = int(floor(h * r_percentage_area))
 
-        random_left_shift = random.randint(0, (w - w_new))  # Note: randint() is from uniform distribution.
-        random_down_shift = random.randint(0, (h - h_new))
+        crop_box = self._random_box(w, h)
 
         def do(image):
-            image = image.crop((random_left_shift, random_down_shift, w_new + random_left_shift, h_new + random_down_shift))
-
-            return image.resize((w, h), resample=Image.BICUBIC)
+            # Only the area zoomed into is resampled.
+            return image.resize((w, h), resample=Image.BICUBIC, box=crop_box)
 
         augmented_images = []
 
@@ -1817,12 +2649,64 @@ class ZoomRandom(Operation):
 
         return augmented_images
 
+    def get_warp(self, size):
+        """
+        Returns the zoom as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the zoomed image and the warp.
+        """
+        return size, _box_warp(self._random_box(*size), size)
+
+    def _random_box(self, w, h):
+        """
+        Returns a random area to zoom into, of an image of width :attr:`w`
+        and height :attr:`h`, as a (left, upper, right, lower) tuple.
+        """
+        if self.randomise:
+            r_percentage_area = round(random.uniform(0.1, self.percentage_area), 2)
+        else:
+            r_percentage_area = self.percentage_area
+
+        w_new = int(floor(w * r_percentage_area))
+        h_new = int(floor(h * r_percentage_area))
+
+        random_left_shift = random.randint(0, (w - w_new))  # Note: randint() is from uniform distribution.
+        random_down_shift = random.randint(0, (h - h_new))
+
+        return random_left_shift, random_down_shift, w_new + random_left_shift, h_new + random_down_shift
+
 
 class HSVShifting(Operation):
     """
-    CURRENTLY NOT IMPLEMENTED.
+    This class is used to randomly shift the hue, saturation, and value
+    (brightness) of RGB images, also known as colour jitter.
     """
     def __init__(self, probability, hue_shift, saturation_scale, saturation_shift, value_scale, value_shift):
+        """
+        Each time the operation is performed, random amounts by which to
+        shift and scale each channel are drawn from between the bounds
+        passed here. Scales are drawn from between ``1 / (1 + scale)`` and
+        ``1 + scale``, and shifts from between ``-shift`` and ``shift``.
+
+        :param probability: Controls the probability that the operation is
+         performed when it is invoked in the pipeline.
+        :param hue_shift: The maximum shift of the hue, as a fraction of the
+         colour wheel, between 0 and 1. Hues wrap around.
+        :param saturation_scale: Controls the maximum factor by which the
+         saturation is scaled.
+        :param saturation_shift: The maximum shift of the saturation, between
+         0 and 1.
+        :param value_scale: Controls the maximum factor by which the value
+         is scaled.
+        :param value_shift: The maximum shift of the value, between 0 and 1.
+        :type probability: Float
+        :type hue_shift: Float
+        :type saturation_scale: Float
+        :type saturation_shift: Float
+        :type value_scale: Float
+        :type value_shift: Float
+        """
         Operation.__init__(self, probability)
         self.hue_shift = hue_shift
         self.saturation_scale = saturation_scale
@@ -1831,19 +2715,44 @@ class HSVShifting(Operation):
         self.value_shift = value_shift
 
     def perform_operation(self, images):
+        """
+        Randomly shifts the hue, saturation, and value of the passed RGB
+        image(s). Images of other modes, such as ground truth masks, are
+        returned unchanged.
+
+        The images are converted to 8-bit HSV. The hue is shifted in 8-bit
+        arithmetic, which wraps around, while the saturation and value are
+        scaled and shifted in place, one channel at a time, in single
+        precision.
+
+        :param images: The image(s) to shift.
+        :type images: List containing PIL.Image object(s).
+        :return: The transformed image(s) as a list of object(s) of type
+         PIL.Image.
+        """
+        hue_shift = np.random.uniform(-self.hue_shift, self.hue_shift)
+        saturation_scale = np.random.uniform(1 / (1 + self.saturation_scale), 1 + self.saturation_scale)
+        saturation_shift = np.random.uniform(-self.saturation_shift, self.saturation_shift)
+        value_scale = np.random.uniform(1 / (1 + self.value_scale), 1 + self.value_scale)
+        value_shift = np.random.uniform(-self.value_shift, self.value_shift)
+
+        def scale_and_shift(channel, scale, shift):
+            values = channel.astype(np.float32)
+            values *= scale
+            values += shift * 255
+            np.clip(values, 0, 255, out=values)
+            np.rint(values, out=values)
+            channel[...] = values
 
         def do(image):
-            hsv = np.array(image.convert("HSV"), 'float64')
-            hsv /= 255.
+            if image.mode != "RGB":
+                return image
 
-            hsv[..., 0] += np.random.uniform(-self.hue_shift, self.hue_shift)
-            hsv[..., 1] *= np.random.uniform(1 / (1 + self.saturation_scale), 1 + self.saturation_scale)
-            hsv[..., 1] += np.random.uniform(-self.saturation_shift, self.saturation_shift)
-            hsv[..., 2] *= np.random.uniform(1 / (1 + self.value_scale), 1 + self.value_scale)
-            hsv[..., 2] += np.random.uniform(-self.value_shift, self.value_shift)
+            hsv = np.array(image.convert("HSV"))
 
-            hsv.clip(0, 1, hsv)
-            hsv = np.uint8(np.round(hsv * 255.))
+            hsv[..., 0] += np.uint8(int(round(hue_shift * 255)) % 256)
+            scale_and_shift(hsv[..., 1], saturation_scale, saturation_shift)
+            scale_and_shift(hsv[..., 2], value_scale, value_shift)
 
             return Image.fromarray(hsv, "HSV").convert("RGB")
 
@@ -1924,6 +2833,48 @@ class RandomErasing(Operation):
 
         return augmented_images
 
+    def perform_operation_array(self, arrays):
+        """
+        Adds a random noise rectangle to a random area of each of the passed
+        arrays, see :func:`Operation.perform_operation_array`.
+
+        :param arrays: The image(s) to add a random noise rectangle to.
+        :type arrays: List containing NumPy array(s).
+        :return: The transformed image(s) as a list of NumPy array(s).
+        """
+        if not all(array.dtype == np.uint8 or np.issubdtype(array.dtype, np.floating) for array in arrays):
+            return Operation.perform_operation_array(self, arrays)
+
+        def do(array):
+            h, w = array.shape[:2]
+
+            w_occlusion_max = int(w * self.rectangle_area)
+            h_occlusion_max = int(h * self.rectangle_area)
+
+            w_occlusion_min = int(w * 0.1)
+            h_occlusion_min = int(h * 0.1)
+
+            w_occlusion = random.randint(w_occlusion_min, w_occlusion_max)
+            h_occlusion = random.randint(h_occlusion_min, h_occlusion_max)
+
+            # As in perform_operation(), the rectangle is w_occlusion rows
+            # high and h_occlusion columns wide.
+            rectangle = np.random.rand(w_occlusion, h_occlusion, *array.shape[2:])
+            if array.dtype == np.uint8:
+                rectangle = np.uint8(rectangle * 255)
+
+            random_position_x = random.randint(0, w - w_occlusion)
+            random_position_y = random.randint(0, h - h_occlusion)
+
+            array = array.copy()
+            region = array[random_position_y:random_position_y + w_occlusion,
+                           random_position_x:random_position_x + h_occlusion]
+            region[...] = rectangle[:region.shape[0], :region.shape[1]]
+
+            return array
+
+        return [do(array) for array in arrays]
+
 
 class Custom(Operation):
     """
@@ -2009,17 +2960,7 @@ class ZoomGroundTruth(Operation):
         factor = round(random.uniform(self.min_factor, self.max_factor), 2)
 
         def do(image):
-
-            w, h = image.size
-
-            # TODO: Join these two functions together so that we don't have this image_zoom variable lying around.
-            image_zoomed = image.resize((int(round(image.size[0] * factor)), int(round(image.size[1] * factor))), resample=Image.BICUBIC)
-            w_zoomed, h_zoomed = image_zoomed.size
-
-            return image_zoomed.crop((floor((float(w_zoomed) / 2) - (float(w) / 2)),
-                                      floor((float(h_zoomed) / 2) - (float(h) / 2)),
-                                      floor((float(w_zoomed) / 2) + (float(w) / 2)),
-                                      floor((float(h_zoomed) / 2) + (float(h) / 2))))
+            return _zoom(image, factor)
 
         augmented_images = []
 
@@ -2027,3 +2968,14 @@ class ZoomGroundTruth(Operation):
             augmented_images.append(do(image))
 
         return augmented_images
+
+    def get_warp(self, size):
+        """
+        Returns the zoom as a warp, see :func:`Operation.get_warp`.
+
+        :param size: The size of the image, as a (width, height) tuple.
+        :return: The size of the zoomed image and the warp.
+        """
+        factor = round(random.uniform(self.min_factor, self.max_factor), 2)
+
+        return size, _zoom_warp(size, factor)
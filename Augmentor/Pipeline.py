@@ -17,15 +17,32 @@ from PIL.Image import Image
 from builtins import *
 
 from .Operations import *
-from .ImageUtilities import scan_directory, scan, scan_dataframe, AugmentorImage
+from .Operations import _stack_samples
+from .ImageUtilities import scan_directory, scan, scan_dataframe, AugmentorImage, ImageCache, DatasetCache
+from .ShardWriter import ShardWriter
 
 import os
+import io
 import sys
+import copy
+import json
+import collections
 import random
 import uuid
+import hashlib
 import warnings
+import functools
+import itertools
+import threading
+import multiprocessing
 import numpy as np
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+try:
+    from multiprocessing import resource_tracker
+except ImportError:
+    # Python 3.7 and earlier.
+    resource_tracker = None
 
 # NOTE:
 # https://pypi.org/project/futures/ mentions:
@@ -36,6 +53,404 @@ from tqdm import tqdm
 from PIL import Image
 
 
+def _seed_worker(seed):
+    """
+    Seed the random number generators of a worker process with
+    :attr:`seed`.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def _call_seeded(function, seed_and_args):
+    """
+    Module level function used to execute a task on the process backend.
+    Processes created using the fork start method inherit the random state
+    of the parent, and would otherwise all produce the same sequence of
+    augmentations. Instead, every task is given a seed drawn by the parent
+    process from its own random state, see :func:`_submit_seeded`, so that
+    the augmentations produced follow :func:`Pipeline.set_seed`, whichever
+    worker executes the task. Do not call directly.
+
+    :param function: The function to call.
+    :param seed_and_args: A tuple of the seed and a tuple of the arguments
+     to call :attr:`function` with.
+    :return: The result of :attr:`function`.
+    """
+    seed, args = seed_and_args
+    _seed_worker(seed)
+    return function(*args)
+
+
+def _submit_seeded(executor, function, *args):
+    """
+    Submit ``function(*args)`` to the process pool :attr:`executor`, to be
+    executed with a seed drawn from this process's random state, see
+    :func:`_call_seeded`.
+
+    :return: The future of the task.
+    """
+    return executor.submit(_call_seeded, function, (random.getrandbits(32), args))
+
+
+def _execute_in_worker(pipeline, augmentor_images, deterministic_names=False, wait_for_writes=False,
+                       worker_process=False):
+    """
+    Module level function used to execute the pipeline on a chunk of
+    images in a worker thread or process. Only module level functions and
+    their arguments can be pickled and sent to worker processes. Do not call
+    directly.
+
+    :param pipeline: The pipeline, or for the process backend a copy of the
+     pipeline, see :func:`Pipeline._worker_copy`.
+    :param augmentor_images: The images to pass through the pipeline.
+    :param deterministic_names: Whether to name the saved images after
+     their source image, see :func:`_journal_key`, rather than randomly.
+    :param wait_for_writes: Whether to wait until the images handed to the
+     pipeline's writer threads, see :func:`Pipeline.set_writers`, are
+     saved before returning.
+    :param worker_process: Whether this is a worker process of the process
+     backend, in which case the process's own writer threads are used, see
+     :func:`_worker_writer_pool`.
+    :return: A tuple of a list and the number of image cache hits and
+     misses. The list holds a tuple of the path of each processed image
+     and, when writing shards, see :func:`Pipeline.set_output_shards`, the
+     encoded sample to be written by the parent, otherwise ``None``. The
+     images themselves are not returned, to avoid sending image data
+     back to the parent process. The numbers of hits and misses are only
+     counted by worker processes, whose image cache is not the parent's,
+     see :func:`Pipeline.set_image_cache`, and are otherwise ``None``.
+    """
+    results = []
+    cache_counts = None
+
+    if worker_process and pipeline.image_cache is not None:
+        cache_counts = (pipeline.image_cache.hits, pipeline.image_cache.misses)
+
+    if worker_process and pipeline.writers:
+        pipeline._writer_pool = _worker_writer_pool(pipeline.writers, pipeline.max_pending_writes)
+        # Any error of an earlier chunk has been raised by that chunk.
+        pipeline._writer_pool.reset()
+
+    for augmentor_image in augmentor_images:
+        file_name = _journal_key(augmentor_image.image_path) if deterministic_names else None
+        if pipeline.output_shards is not None:
+            results.append((augmentor_image.image_path, pipeline._execute_to_sample(augmentor_image, file_name)))
+        else:
+            pipeline._execute(augmentor_image, file_name=file_name)
+            results.append((augmentor_image.image_path, None))
+
+    if wait_for_writes:
+        pipeline._wait_for_writes()
+
+    if cache_counts is not None:
+        cache_counts = (pipeline.image_cache.hits - cache_counts[0], pipeline.image_cache.misses - cache_counts[1])
+
+    return results, cache_counts
+
+
+def _journal_key(image_path):
+    """
+    Returns a short key identifying the image at :attr:`image_path`, which
+    is the same for every run.
+
+    :param image_path: The path to an image.
+    :return: A hexadecimal string.
+    """
+    return hashlib.sha1(os.path.abspath(image_path).encode("utf-8")).hexdigest()[:20]
+
+
+class _Journal(object):
+    """
+    Records which images have been processed, in a file named
+    ``.augmentor_journal`` in each output directory, so that an
+    interrupted run of :func:`Pipeline.process` can be resumed. Each line
+    of the file holds the key of one finished image, see
+    :func:`_journal_key`.
+    """
+    file_name = ".augmentor_journal"
+
+    def __init__(self, augmentor_images):
+        """
+        :param augmentor_images: The images that will be processed.
+        """
+        self._output_directories = {}
+        self._files = {}
+        self.finished = set()
+
+        for augmentor_image in augmentor_images:
+            self._output_directories[augmentor_image.image_path] = augmentor_image.output_directory
+
+        for output_directory in set(self._output_directories.values()):
+            journal_path = os.path.join(output_directory, _Journal.file_name)
+            if os.path.isfile(journal_path):
+                with open(journal_path) as journal_file:
+                    self.finished.update(line.strip() for line in journal_file)
+
+    def is_finished(self, augmentor_image):
+        return _journal_key(augmentor_image.image_path) in self.finished
+
+    def record(self, image_paths):
+        """
+        Record the images at :attr:`image_paths` as finished, after their
+        augmented images have been saved.
+
+        :param image_paths: The paths of the finished images.
+        :return: None
+        """
+        for image_path in image_paths:
+            output_directory = self._output_directories[image_path]
+            if output_directory not in self._files:
+                self._files[output_directory] = open(os.path.join(output_directory, _Journal.file_name), "a")
+            self._files[output_directory].write(_journal_key(image_path) + "\n")
+
+        for journal_file in self._files.values():
+            journal_file.flush()
+
+    def close(self):
+        for journal_file in self._files.values():
+            journal_file.close()
+        self._files = {}
+
+
+class _WriterPool(object):
+    """
+    A pool of threads saving augmented images, so that the workers
+    augmenting images can hand finished images off and continue with the
+    next image, rather than waiting for them to be encoded and written.
+    Encoding, in particular PNG compression, releases the GIL, so several
+    images are encoded in parallel.
+
+    At most :attr:`max_pending` images are waiting to be saved at any time.
+    Workers handing off further images wait until there is room, so that
+    memory use is bounded when images are produced faster than they can be
+    saved.
+
+    An error saving an image is raised by every call to :func:`wait` until
+    the pool is reset, so that no worker mistakes its images for saved.
+    """
+    def __init__(self, writers, max_pending):
+        """
+        :param writers: The number of writer threads.
+        :param max_pending: The maximum number of images waiting to be saved.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=writers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._errors = []
+
+    def submit(self, image, path, save_options):
+        """
+        Save :attr:`image` to :attr:`path` on one of the writer threads,
+        first waiting for room if too many images are waiting to be saved.
+        """
+        self._slots.acquire()
+
+        future = self._executor.submit(image.save, path, **save_options)
+
+        with self._lock:
+            self._pending.add(future)
+
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if not future.cancelled() and future.exception() is not None:
+                self._errors.append(future.exception())
+        self._slots.release()
+
+    def wait(self):
+        """
+        Wait until every image handed to the pool so far has been saved,
+        raising the first error any of them failed with.
+        """
+        with self._lock:
+            pending = list(self._pending)
+
+        wait(pending)
+
+        with self._lock:
+            if self._errors:
+                raise self._errors[0]
+
+    def reset(self):
+        """
+        Forget the errors of earlier writes.
+        """
+        with self._lock:
+            self._errors = []
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_writer_pool_lock = threading.Lock()
+_executor_lock = threading.Lock()
+
+# The writer threads of a worker process, see _worker_writer_pool().
+_worker_writer_pools = {}
+
+
+def _worker_writer_pool(writers, max_pending):
+    """
+    Returns the pool of writer threads of this worker process, creating it
+    on first use. Every pipeline copy a worker process receives is
+    discarded after its chunk of images, so the pool is kept here instead,
+    and reused by every chunk the process executes, for the lifetime of the
+    process.
+
+    :param writers: The number of writer threads.
+    :param max_pending: The maximum number of images waiting to be saved,
+     or ``None`` for four times the number of writer threads.
+    :return: The :class:`_WriterPool`.
+    """
+    key = (writers, max_pending)
+
+    with _writer_pool_lock:
+        if key not in _worker_writer_pools:
+            _worker_writer_pools[key] = _WriterPool(writers, max_pending or writers * 4)
+
+        return _worker_writer_pools[key]
+
+
+def _chunks(iterable, chunk_size):
+    """
+    Lazily split :attr:`iterable` into lists of length :attr:`chunk_size`,
+    the last of which may be shorter.
+    """
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bounded_map(executor, function, iterable, max_in_flight):
+    """
+    Apply :attr:`function` to each item of :attr:`iterable` using
+    :attr:`executor`, yielding the results in the order they complete.
+
+    Unlike :func:`Executor.map`, which consumes the whole iterable and
+    submits every task at once, items are only drawn from the iterable as
+    tasks complete, so that no more than :attr:`max_in_flight` tasks are
+    outstanding at any time.
+
+    :param executor: The executor to submit tasks to.
+    :param function: The function to apply.
+    :param iterable: The items to apply the function to.
+    :param max_in_flight: The maximum number of outstanding tasks.
+    :return: A generator yielding the results.
+    """
+    pending = set()
+
+    try:
+        for item in iterable:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(function, item))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _apply_warps(images, warps):
+    """
+    Apply the warps of several consecutive geometric operations to
+    :attr:`images`, resampling each image once. Do not call directly.
+
+    :param images: The images to warp.
+    :param warps: A list of (operation, warp) tuples, in the order the
+     operations appear in the pipeline, where each warp was returned by
+     the operation's :func:`~Augmentor.Operations.Operation.get_warp`.
+    :return: The warped images.
+    """
+    if len(warps) == 0:
+        return images
+
+    # A single warp is applied as well, as performing the operation instead
+    # would draw its random parameters a second time.
+    # Each warp maps coordinates of its output to coordinates of its input,
+    # so the warp of the combined operations is the product of the warps in
+    # order of application.
+    matrix = functools.reduce(np.dot, [warp[1] for _, warp in warps])
+    matrix = matrix / matrix[2, 2]
+    size = tuple(int(x) for x in warps[-1][1][0])
+
+    if matrix[2, 0] == 0 and matrix[2, 1] == 0:
+        return [image.transform(size, Image.AFFINE, tuple(matrix[:2].ravel()), resample=Image.BICUBIC)
+                for image in images]
+    else:
+        return [image.transform(size, Image.PERSPECTIVE, tuple(matrix.ravel()[:8]), resample=Image.BICUBIC)
+                for image in images]
+
+
+def _compose_tables(tables, luts):
+    """
+    Combine the lookup tables of consecutive point-wise operations. Do not
+    call directly.
+
+    :param tables: ``None``, or the combined lookup tables of the preceding
+     operations, one uint8 array of shape (bands, 256) per image.
+    :param luts: The lookup tables of the next operation, as returned by
+     its :func:`~Augmentor.Operations.Operation.get_lut`.
+    :return: The combined lookup tables.
+    """
+    if tables is None:
+        return luts
+
+    # Look up the output of the preceding tables in the next tables.
+    return [lut[np.arange(len(lut))[:, np.newaxis], table] for table, lut in zip(tables, luts)]
+
+
+def _apply_tables(images, tables):
+    """
+    Apply the combined lookup tables of several consecutive point-wise
+    operations to :attr:`images`, passing over each image once. Do not
+    call directly.
+
+    :param images: The images to transform.
+    :param tables: ``None``, or one uint8 array of shape (bands, 256) per
+     image, see :func:`_compose_tables`.
+    :return: The transformed images.
+    """
+    if tables is None:
+        return images
+
+    return [image.point(table.ravel().tolist()) for image, table in zip(images, tables)]
+
+
+def _overrides(operation, name):
+    """
+    Returns whether :attr:`operation` overrides the :class:`Operation`
+    method :attr:`name`. Do not call directly.
+    """
+    method = getattr(type(operation), name)
+    default = getattr(Operation, name)
+
+    return getattr(method, "__func__", method) is not getattr(default, "__func__", default)
+
+
+def _has_array_implementation(operation):
+    """
+    Returns whether :attr:`operation` works on NumPy arrays itself, rather
+    than through the default
+    :func:`~Augmentor.Operations.Operation.perform_operation_array`, which
+    converts the arrays to PIL images and back. Do not call directly.
+    """
+    return _overrides(operation, "perform_operation_array") or _overrides(operation, "perform_operation_batch")
+
+
 class Pipeline(object):
     """
     The Pipeline class handles the creation of augmentation pipelines
@@ -48,8 +463,11 @@ class Pipeline(object):
     _threshold_error_text = "The value of threshold must be between 0 and 255."
     _valid_formats = ["PNG", "BMP", "GIF", "JPEG"]
     _legal_filters = ["NEAREST", "BICUBIC", "ANTIALIAS", "BILINEAR"]
+    _legal_backends = ["thread", "process"]
+    _legal_schedules = [None, "largest_first"]
 
-    def __init__(self, source_directory=None, output_directory="output", save_format=None):
+    def __init__(self, source_directory=None, output_directory="output", save_format=None, workers=None,
+                 recursive=False):
         """
         Create a new Pipeline object pointing to a directory containing your
         original image dataset.
@@ -70,6 +488,12 @@ class Pipeline(object):
         :param save_format: The file format to use when saving newly created,
          augmented images. Default is JPEG. Legal options are BMP, PNG, and
          GIF.
+        :param workers: The number of worker threads or processes in the
+         pipeline's worker pool. Default is ``None``, letting the executor
+         choose based on the number of CPUs.
+        :param recursive: Whether to also scan the subdirectories of the
+         source directory, or of each class's directory, for images.
+         Defaults to ``False``.
         :return: A :class:`Pipeline` object.
         """
         # TODO: Allow a single image to be added when initialising.
@@ -82,12 +506,14 @@ class Pipeline(object):
         self.operations = []
         self.class_labels = []
         self.process_ground_truth_images = False
+        self._init_execution(workers)
 
         if source_directory is not None:
             self._populate(source_directory=source_directory,
                            output_directory=output_directory,
                            ground_truth_directory=None,
-                           ground_truth_output_directory=output_directory)
+                           ground_truth_output_directory=output_directory,
+                           recursive=recursive)
 
     def __call__(self, augmentor_image):
         """
@@ -104,7 +530,83 @@ class Pipeline(object):
         """
         return self._execute(augmentor_image)
 
-    def _populate(self, source_directory, output_directory, ground_truth_directory, ground_truth_output_directory):
+    def _init_execution(self, workers=None):
+        """
+        Private method. Initialises the member variables controlling how
+        the pipeline is executed, which are shared by every kind of
+        pipeline, to their defaults. Used by the constructors.
+
+        :param workers: The number of worker threads or processes in the
+         pipeline's worker pool, or ``None`` to let the executor choose.
+        :return: None
+        """
+        self.workers = workers
+        self.prefetch_queue_depth = 0
+        self.fuse_operations = False
+        self.image_cache = None
+        self.dataset_cache = None
+        self.output_shards = None
+        self.save_options = {}
+        self.writers = 0
+        self.max_pending_writes = None
+        self._writer_pool = None
+
+        # The worker pools are created lazily, see _get_executor().
+        self._executors = {}
+
+    def __enter__(self):
+        """
+        Allows the pipeline to be used as a context manager, so that its
+        worker pool is closed when leaving the ``with`` block:
+
+        .. code-block:: python
+
+            >>> with Augmentor.Pipeline("/path/to/images", workers=8) as p:
+            >>>     p.rotate(probability=0.7, max_left_rotation=10, max_right_rotation=10)
+            >>>     p.sample(10000)
+
+        :return: The pipeline.
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __getstate__(self):
+        """
+        Executors cannot be pickled, so the worker pools, and the pool of
+        writer threads, are removed from the pickled state. New pools are
+        created when they are next needed.
+        """
+        state = self.__dict__.copy()
+        state["_executors"] = {}
+        state["_writer_pool"] = None
+        return state
+
+    def close(self):
+        """
+        Shut down the pipeline's worker pools, and its writer threads, if
+        these have been created, waiting for any pending work to complete.
+        The pipeline can still be used afterwards, in which case new pools
+        are created as needed.
+
+        :return: None
+        """
+        with _executor_lock:
+            executors = list(getattr(self, "_executors", {}).values())
+            self._executors = {}
+
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+        writer_pool = getattr(self, "_writer_pool", None)
+        if writer_pool is not None:
+            writer_pool.shutdown()
+        self._writer_pool = None
+
+    def _populate(self, source_directory, output_directory, ground_truth_directory, ground_truth_output_directory,
+                  recursive=False):
         """
         Private method for populating member variables with AugmentorImage
         objects for each of the images found in the source directory
@@ -123,10 +625,13 @@ class Pipeline(object):
          directory.
         :param ground_truth_output_directory: A path to a directory to store
          the output of the operations on the ground truth data set.
+        :param recursive: Whether to also scan subdirectories for images,
+         see :func:`~Augmentor.ImageUtilities.scan`.
         :type source_directory: String
         :type output_directory: String
         :type ground_truth_directory: String
         :type ground_truth_output_directory: String
+        :type recursive: Boolean
         :return: None
         """
 
@@ -143,7 +648,7 @@ class Pipeline(object):
         abs_output_directory = os.path.join(source_directory, output_directory)
 
         # Scan the directory that user supplied.
-        self.augmentor_images, self.class_labels = scan(source_directory, abs_output_directory)
+        self.augmentor_images, self.class_labels = scan(source_directory, abs_output_directory, recursive)
 
         self._check_images(abs_output_directory)
 
@@ -185,6 +690,7 @@ class Pipeline(object):
             try:
                 with Image.open(augmentor_image.image_path) as opened_image:
                     self.distinct_dimensions.add(opened_image.size)
+                    augmentor_image.image_size = opened_image.size
                     self.distinct_formats.add(opened_image.format)
             except IOError as e:
                 print("There is a problem with image %s in your source directory: %s"
@@ -194,7 +700,7 @@ class Pipeline(object):
         sys.stdout.write("Initialised with %s image(s) found.\n" % len(self.augmentor_images))
         sys.stdout.write("Output directory set to %s." % abs_output_directory)
 
-    def _execute(self, augmentor_image, save_to_disk=True, multi_threaded=True):
+    def _execute(self, augmentor_image, save_to_disk=True, multi_threaded=True, file_name=None):
         """
         Private method. Used to pass an image through the current pipeline,
         and return the augmented image.
@@ -206,37 +712,23 @@ class Pipeline(object):
         :param augmentor_image: The image to pass through the pipeline.
         :param save_to_disk: Whether to save the image to disk. Currently
          fixed to true.
+        :param file_name: The name, appended to the source image's name, to
+         save the augmented image under. Defaults to ``None``, using a
+         random name.
         :type augmentor_image: :class:`ImageUtilities.AugmentorImage`
         :type save_to_disk: Boolean
+        :type file_name: String
         :return: The augmented image.
         """
 
-        images = []
-
-        if augmentor_image.image_path is not None:
-            images.append(Image.open(augmentor_image.image_path))
-
-        # What if they are array data?
-        if augmentor_image.pil_images is not None:
-            images.append(augmentor_image.pil_images)
-
-        if augmentor_image.ground_truth is not None:
-            if isinstance(augmentor_image.ground_truth, list):
-                for image in augmentor_image.ground_truth:
-                    images.append(Image.open(image))
-            else:
-                images.append(Image.open(augmentor_image.ground_truth))
-
-        for operation in self.operations:
-            r = round(random.uniform(0, 1), 1)
-            if r <= operation.probability:
-                images = operation.perform_operation(images)
+        images = self._augment(augmentor_image)
 
         # TEMP FOR TESTING
         # save_to_disk = False
 
         if save_to_disk:
-            file_name = str(uuid.uuid4())
+            if file_name is None:
+                file_name = str(uuid.uuid4())
             try:
                 for i in range(len(images)):
                     if i == 0:
@@ -248,7 +740,7 @@ class Pipeline(object):
                                     + "." \
                                     + (self.save_format if self.save_format else augmentor_image.file_format)
 
-                        images[i].save(os.path.join(augmentor_image.output_directory, save_name))
+                        self._save_image(images[i], os.path.join(augmentor_image.output_directory, save_name))
 
                     else:
                         save_name = "_groundtruth_(" \
@@ -262,7 +754,7 @@ class Pipeline(object):
                                     + "." \
                                     + (self.save_format if self.save_format else augmentor_image.file_format)
 
-                        images[i].save(os.path.join(augmentor_image.output_directory, save_name))
+                        self._save_image(images[i], os.path.join(augmentor_image.output_directory, save_name))
 
             except IOError as e:
                 print("Error writing %s, %s. Change save_format to PNG?" % (file_name, e.message))
@@ -280,6 +772,127 @@ class Pipeline(object):
         # return images[0]  # old method.
         return images[0]
 
+    def _augment(self, augmentor_image):
+        """
+        Private method. Opens an image and its ground truth images, and
+        passes them through the current pipeline.
+
+        :param augmentor_image: The image to pass through the pipeline.
+        :type augmentor_image: :class:`ImageUtilities.AugmentorImage`
+        :return: The augmented images as a list of PIL.Image object(s).
+        """
+        images = []
+
+        if augmentor_image.image_path is not None:
+            images.append(self._open_image(augmentor_image.image_path))
+
+        # What if they are array data?
+        if augmentor_image.pil_images is not None:
+            images.append(augmentor_image.pil_images)
+
+        if augmentor_image.ground_truth is not None:
+            if isinstance(augmentor_image.ground_truth, list):
+                for image in augmentor_image.ground_truth:
+                    images.append(self._open_image(image))
+            else:
+                images.append(self._open_image(augmentor_image.ground_truth))
+
+        return self._apply_operations(images)
+
+    def _execute_to_sample(self, augmentor_image, file_name=None):
+        """
+        Private method. Used to pass an image through the current pipeline
+        and encode the augmented image, its ground truth images, and its
+        label as a sample to be written to a shard, see
+        :func:`set_output_shards`.
+
+        :param augmentor_image: The image to pass through the pipeline.
+        :param file_name: The key of the sample. Defaults to ``None``,
+         using a random key.
+        :type augmentor_image: :class:`ImageUtilities.AugmentorImage`
+        :type file_name: String
+        :return: A tuple of the directory to write the sample to, the key
+         of the sample, and its files, as a list of (extension, data)
+         tuples.
+        """
+        images = self._augment(augmentor_image)
+
+        if file_name is None:
+            file_name = str(uuid.uuid4())
+
+        save_format = (self.save_format if self.save_format else augmentor_image.file_format).lower()
+        pil_format = Image.registered_extensions().get("." + save_format, save_format.upper())
+
+        files = []
+
+        for i, image in enumerate(images):
+            encoded = io.BytesIO()
+            image.save(encoded, format=pil_format, **self.save_options)
+            extension = save_format if i == 0 else "groundtruth_%s.%s" % (i, save_format)
+            files.append((extension, encoded.getvalue()))
+
+        label = {"source": os.path.basename(augmentor_image.image_path),
+                 "class_label": augmentor_image.class_label}
+        if augmentor_image.class_label_int is not None:
+            label["class_label_int"] = int(augmentor_image.class_label_int)
+
+        files.append(("json", json.dumps(label).encode("utf-8")))
+
+        return augmentor_image.output_directory, file_name, files
+
+    def _save_image(self, image, path):
+        """
+        Private method. Saves an augmented image to :attr:`path`, using the
+        pipeline's save options, see :func:`set_save_options`. If writer
+        threads are enabled, see :func:`set_writers`, the image is handed
+        to them and this method returns immediately.
+
+        :param image: The image to save.
+        :param path: The path to save the image to.
+        :type image: PIL.Image
+        :type path: String
+        :return: None
+        """
+        if not self.writers:
+            image.save(path, **self.save_options)
+            return
+
+        with _writer_pool_lock:
+            if self._writer_pool is None:
+                self._writer_pool = _WriterPool(self.writers, self.max_pending_writes or self.writers * 4)
+
+        self._writer_pool.submit(image, path, self.save_options)
+
+    def _wait_for_writes(self):
+        """
+        Private method. Waits until every image handed to the pipeline's
+        writer threads has been saved.
+
+        :return: None
+        """
+        if self._writer_pool is not None:
+            self._writer_pool.wait()
+
+    def _open_image(self, image_path):
+        """
+        Private method. Opens the image at :attr:`image_path`, reading it
+        from the pipeline's dataset cache, see :func:`build_cache`, or its
+        image cache, see :func:`set_image_cache`, if these are set.
+
+        :param image_path: The path to the image.
+        :type image_path: String
+        :return: The image, as a PIL.Image object.
+        """
+        if self.dataset_cache is not None:
+            image = self.dataset_cache.open(image_path)
+            if image is not None:
+                return image
+
+        if self.image_cache is None:
+            return Image.open(image_path)
+
+        return self.image_cache.open(image_path)
+
     def _execute_with_array(self, image):
         """
         Private method used to execute a pipeline on array or matrix data.
@@ -288,16 +901,161 @@ class Pipeline(object):
         :return: The augmented image.
         """
 
-        pil_image = [Image.fromarray(image)]
+        numpy_array = self._apply_operations_array([np.asarray(image)])[0]
+
+        return numpy_array
+
+    def _apply_operations(self, images):
+        """
+        Private method. Apply each operation of the pipeline, according to
+        its probability, identically to every image in :attr:`images`.
+
+        If :attr:`fuse_operations` is set, consecutive geometric operations
+        are combined into a single warp, and consecutive point-wise
+        operations into a single set of lookup tables, see
+        :func:`set_fuse_operations`.
+
+        :param images: The image and its ground truth images.
+        :type images: List containing PIL.Image object(s).
+        :return: The augmented images as a list of PIL.Image object(s).
+        """
+        if not self.fuse_operations:
+            for operation in self.operations:
+                r = round(random.uniform(0, 1), 1)
+                if r <= operation.probability:
+                    images = operation.perform_operation(images)
+
+            return images
+
+        # The warps of consecutive geometric operations, and the lookup
+        # tables of consecutive point-wise operations, not yet applied. At
+        # most one of these is pending at any time.
+        warps = []
+        tables = None
+        size = images[0].size
 
         for operation in self.operations:
             r = round(random.uniform(0, 1), 1)
             if r <= operation.probability:
-                pil_image = operation.perform_operation(pil_image)
+                warp = operation.get_warp(size)
+                if warp is not None:
+                    images = _apply_tables(images, tables)
+                    tables = None
+                    warps.append((operation, warp))
+                    size = warp[0]
+                    continue
+
+                images = _apply_warps(images, warps)
+                warps = []
+                size = images[0].size
+
+                luts = operation.get_lut(images, tables)
+                if luts is not None:
+                    tables = _compose_tables(tables, luts)
+                    continue
+
+                images = _apply_tables(images, tables)
+                tables = None
+                images = operation.perform_operation(images)
+                size = images[0].size
 
-        numpy_array = np.asarray(pil_image[0])
+        return _apply_tables(_apply_warps(images, warps), tables)
 
-        return numpy_array
+    def _apply_operations_array(self, arrays):
+        """
+        Private method. Apply each operation of the pipeline, according to
+        its probability, identically to every array in :attr:`arrays`,
+        using each operation's
+        :func:`~Augmentor.Operations.Operation.perform_operation_array`.
+        Operations without a NumPy implementation are performed on PIL
+        images instead. The arrays are converted to PIL images before the
+        first of several consecutive such operations, and back after the
+        last, rather than for every operation.
+
+        If :attr:`fuse_operations` is set, the arrays are converted to PIL
+        images once and passed to :func:`_apply_operations` instead.
+
+        :param arrays: The image and its ground truth images.
+        :type arrays: List containing NumPy array(s).
+        :return: The augmented images as a list of NumPy array(s).
+        """
+        if self.fuse_operations:
+            images = self._apply_operations([Image.fromarray(array) for array in arrays])
+            return [np.asarray(image) for image in images]
+
+        original_arrays = [id(array) for array in arrays]
+
+        # The PIL images, while operations without a NumPy implementation
+        # are performed, otherwise None.
+        images = None
+
+        for operation in self.operations:
+            r = round(random.uniform(0, 1), 1)
+            if r <= operation.probability:
+                if _has_array_implementation(operation):
+                    if images is not None:
+                        arrays = [np.asarray(image) for image in images]
+                        images = None
+                    arrays = operation.perform_operation_array(arrays)
+                else:
+                    if images is None:
+                        images = [Image.fromarray(array) for array in arrays]
+                    images = operation.perform_operation(images)
+
+        if images is not None:
+            arrays = [np.asarray(image) for image in images]
+
+        # Never return the caller's own arrays, which may be modified later.
+        return [array.copy() if id(array) in original_arrays else array for array in arrays]
+
+    def _apply_operations_batch(self, batch):
+        """
+        Private method. Apply each operation of the pipeline to a batch of
+        same-sized images, deciding separately for every image whether an
+        operation is performed, using each operation's
+        :func:`~Augmentor.Operations.Operation.perform_operation_batch`.
+        Colour operations process the whole batch at once, while other
+        operations process the selected images one at a time. As in
+        :func:`_apply_operations_array`, the images are converted to PIL
+        images once for several consecutive operations without a NumPy
+        implementation.
+
+        If :attr:`fuse_operations` is set, the images are passed to
+        :func:`_apply_operations_array` one at a time instead.
+
+        :param batch: The images, as an array of shape (N, height, width) or
+         (N, height, width, channels).
+        :type batch: NumPy array.
+        :return: The augmented images, as a single array if they are all of
+         the same shape, otherwise as a list of arrays.
+        """
+        if self.fuse_operations:
+            return _stack_samples([self._apply_operations_array([sample])[0] for sample in batch])
+
+        # The images as PIL images, while operations without a NumPy
+        # implementation are performed, otherwise None.
+        images = None
+
+        for operation in self.operations:
+            selected = np.array([round(random.uniform(0, 1), 1) <= operation.probability for _ in range(len(batch))])
+            if not np.any(selected):
+                continue
+
+            if _has_array_implementation(operation):
+                if images is not None:
+                    batch = _stack_samples([np.asarray(image) for image in images])
+                    images = None
+                batch = operation.perform_operation_batch(batch, selected)
+            else:
+                if images is None:
+                    images = [Image.fromarray(sample) for sample in batch]
+                images = [operation.perform_operation([image])[0] if apply else image
+                          for image, apply in zip(images, selected)]
+
+        if images is not None:
+            batch = _stack_samples([np.asarray(image) for image in images])
+
+        return batch
 
     def set_save_format(self, save_format):
         """
@@ -323,7 +1081,286 @@ class Pipeline(object):
         else:
             self.save_format = save_format
 
-    def sample(self, n, multi_threaded=True):
+    def set_fuse_operations(self, fuse_operations=True):
+        """
+        Combine consecutive geometric operations, such as rotations,
+        shears, skews, zooms, flips, and resizes, into a single warp, so
+        that each image is resampled once rather than once per operation.
+        This is faster, and the images produced are sharper.
+
+        The result differs slightly from applying each operation in turn.
+        Combined operations are always resampled using bicubic
+        interpolation, and no anti-aliasing is applied when a combination
+        of operations shrinks an image. Only operations implementing
+        :func:`~Augmentor.Operations.Operation.get_warp` are combined, and
+        a geometric operation that is not next to another is applied as
+        usual.
+
+        Likewise, consecutive point-wise operations, such as inversions and
+        random changes of brightness and contrast, are combined into a
+        single lookup table per band, so that each greyscale or RGB image
+        is passed over once. Only operations implementing
+        :func:`~Augmentor.Operations.Operation.get_lut` are combined, and
+        the results are identical to applying each operation in turn.
+
+        :param fuse_operations: Whether to combine geometric and point-wise
+         operations. Disabled by default.
+        :type fuse_operations: Boolean
+        :return: None
+        """
+        self.fuse_operations = fuse_operations
+
+    def set_save_options(self, compress_level=None, quality=None, optimize=None):
+        """
+        Set the encoder settings used when saving augmented images, which
+        trade file size against the time taken to save each image. Settings
+        left as ``None`` use PIL's defaults. Settings that do not apply to
+        the save format are ignored.
+
+        :param compress_level: The zlib compression level for PNG images,
+         from 0, no compression and fastest, to 9, the smallest files.
+         PIL's default is 6.
+        :param quality: The quality of JPEG images, from 0 to 100. PIL's
+         default is 75.
+        :param optimize: Whether to make an extra pass to find optimal
+         encoder settings for JPEG and PNG images, making the files smaller
+         but taking longer to save.
+        :type compress_level: Integer
+        :type quality: Integer
+        :type optimize: Boolean
+        :return: None
+        """
+        if compress_level is not None and not 0 <= compress_level <= 9:
+            raise ValueError("The compress_level argument must be between 0 and 9.")
+        elif quality is not None and not 0 <= quality <= 100:
+            raise ValueError("The quality argument must be between 0 and 100.")
+
+        save_options = {"compress_level": compress_level, "quality": quality, "optimize": optimize}
+
+        self.save_options = dict((key, value) for key, value in save_options.items() if value is not None)
+
+    def set_writers(self, writers, max_pending=None):
+        """
+        Save augmented images on a separate pool of :attr:`writers`
+        threads, so that the workers augmenting images hand finished images
+        off and continue with the next image straight away. Encoding images,
+        in particular compressing PNG images, often takes longer than
+        augmenting them.
+
+        At most :attr:`max_pending` images wait to be saved at any time.
+        Once this many are waiting, workers wait for room before handing
+        off more images, which bounds memory use. :func:`sample` and
+        :func:`process` return once every image is saved, and raise any
+        error saving an image. When using the process backend, every worker
+        process has its own writer threads, which it keeps until it exits.
+
+        :param writers: The number of writer threads, or ``0`` to save
+         images on the workers that augment them, the default.
+        :param max_pending: The maximum number of images waiting to be
+         saved. Defaults to four times the number of writer threads.
+        :type writers: Integer
+        :type max_pending: Integer
+        :return: None
+        """
+        if writers < 0:
+            raise ValueError("The writers argument must be 0 or greater.")
+        elif max_pending is not None and max_pending < 1:
+            raise ValueError("The max_pending argument must be 1 or greater.")
+
+        # Any existing writer threads finish their work first.
+        if self._writer_pool is not None:
+            self._writer_pool.shutdown()
+            self._writer_pool = None
+
+        self.writers = writers
+        self.max_pending_writes = max_pending
+
+    def set_output_shards(self, max_count=1000, max_bytes=None):
+        """
+        Write the augmented images produced by :func:`sample` and
+        :func:`process` into ``.tar`` archives, or shards, rather than as
+        individual files, which is kinder to file systems and data loaders
+        when producing millions of images.
+
+        Shards are named ``shard-000000.tar``, ``shard-000001.tar``, and so
+        on, and are written to the output directory, or to each class's
+        output directory. A new shard is started once the current shard
+        holds :attr:`max_count` samples or :attr:`max_bytes` bytes. When the
+        work is split across several machines, see :func:`sample`, each
+        machine's shards include its shard index, as in
+        ``shard-1-000000.tar``, so that machines sharing an output directory
+        do not overwrite each other's shards.
+
+        The shards follow the layout used by WebDataset. Each sample
+        consists of the augmented image, for example ``key.png``, any
+        ground truth images, named ``key.groundtruth_1.png`` and so on,
+        and a ``key.json`` file holding the name of the source image and
+        its class label. Images are encoded in the pipeline's save format.
+
+        :param max_count: The maximum number of samples per shard, or
+         ``None`` to write individual files again. Defaults to 1000.
+        :param max_bytes: The maximum size of a shard in bytes, or ``None``
+         for no limit, the default.
+        :type max_count: Integer
+        :type max_bytes: Integer
+        :return: None
+        """
+        if max_count is None:
+            self.output_shards = None
+        elif max_count < 1:
+            raise ValueError("The max_count argument must be 1 or greater.")
+        elif max_bytes is not None and max_bytes < 1:
+            raise ValueError("The max_bytes argument must be 1 or greater.")
+        else:
+            self.output_shards = (max_count, max_bytes)
+
+    def set_image_cache(self, max_bytes):
+        """
+        Keep decoded source images, and their ground truth images, in memory
+        so that they are not decoded again each time they are sampled. This
+        helps when sampling many more images than there are source images.
+        Images are evicted, least recently used first, once the cache holds
+        more than :attr:`max_bytes` bytes of pixel data.
+
+        The cache is shared by the pipeline's worker threads. When using the
+        process backend, every worker process keeps its own cache, for as
+        long as the process lives. The number of cache hits and misses is
+        available through the :attr:`image_cache` attribute's ``hits`` and
+        ``misses``, which include those of the worker processes during
+        :func:`sample` and :func:`process`, but not during the generators.
+
+        :param max_bytes: The maximum number of bytes of decoded pixel data
+         to keep in memory, or ``None`` to disable the cache. Disabled by
+         default.
+        :type max_bytes: Integer
+        :return: None
+        """
+        if max_bytes is None:
+            self.image_cache = None
+        elif not isinstance(max_bytes, int) or isinstance(max_bytes, bool) or max_bytes <= 0:
+            raise ValueError("The max_bytes argument must be a positive integer or None.")
+        else:
+            self.image_cache = ImageCache(max_bytes)
+
+    def build_cache(self, path):
+        """
+        Decode every source image, and every ground truth image, once into
+        a memory mapped store in the directory :attr:`path`, from which the
+        pipeline then reads the images instead of decoding their original
+        files. As the store stays on disk, later pipelines using the same
+        images, including those running in other processes, can reuse it,
+        reading the pixels straight from the operating system's page cache.
+
+        If :attr:`path` already holds a store containing all of the
+        pipeline's images, it is reused. Otherwise, including when any
+        image's file has changed since the store was built, as detected by
+        its modification time and size, the store is rebuilt.
+
+        Images of modes other than ``L``, ``LA``, ``RGB``, and ``RGBA``,
+        such as palette images, are not stored and are read from their
+        original files as usual.
+
+        :param path: The directory to store the decoded images in.
+        :type path: String
+        :return: None
+        """
+        image_paths = []
+
+        for augmentor_image in self.augmentor_images:
+            if augmentor_image.image_path is not None:
+                image_paths.append(augmentor_image.image_path)
+            if isinstance(augmentor_image.ground_truth, list):
+                image_paths.extend(augmentor_image.ground_truth)
+            elif augmentor_image.ground_truth is not None:
+                image_paths.append(augmentor_image.ground_truth)
+
+        # The existing store is released before it is possibly rebuilt.
+        self.dataset_cache = None
+
+        dataset_cache = None
+
+        if os.path.exists(os.path.join(path, DatasetCache._index_file)):
+            dataset_cache = DatasetCache(path)
+            if not all(image_path in dataset_cache for image_path in image_paths):
+                dataset_cache = None
+
+        if dataset_cache is None:
+            dataset_cache = DatasetCache.build(path, image_paths)
+
+        self.dataset_cache = dataset_cache
+
+    def _worker_copy(self):
+        """
+        Private method. Returns a shallow copy of the pipeline that is sent
+        to worker processes when using the process backend. The list of
+        images is not needed to execute the pipeline on a single image and
+        is removed, so that it is not pickled along with every task.
+
+        :return: A copy of this pipeline without its list of images.
+        """
+        worker_copy = copy.copy(self)
+        worker_copy.augmentor_images = []
+        return worker_copy
+
+    def _get_executor(self, backend="thread", workers=None, start_method=None):
+        """
+        Private method. Returns the pipeline's worker pool for the given
+        settings, creating it on first use. The pool is shared by
+        :func:`sample`, :func:`process`, and the generators, and lives until
+        :func:`close` is called. A separate pool is kept for each
+        combination of settings requested, so that a generator can keep
+        using its pool while, for example, :func:`sample` is called with a
+        different number of workers.
+
+        :param backend: Either ``"thread"`` or ``"process"``.
+        :param workers: The number of worker threads or processes. If
+         ``None``, the pipeline's :attr:`workers` member variable is used.
+        :param start_method: The multiprocessing start method for the
+         process backend.
+        :return: The executor.
+        """
+        if workers is None:
+            workers = self.workers
+
+        settings = (backend, workers, start_method)
+
+        with _executor_lock:
+            if settings not in self._executors:
+                self._executors[settings] = self._create_executor(backend, workers, start_method)
+
+            return self._executors[settings]
+
+    def _create_executor(self, backend, workers, start_method=None):
+        """
+        Private method. Create the executor used to execute the pipeline
+        using multiple threads or multiple processes.
+
+        :param backend: Either ``"thread"`` or ``"process"``.
+        :param workers: The number of worker threads or processes. If
+         ``None``, the executor's default is used.
+        :param start_method: The multiprocessing start method for the
+         process backend, e.g. ``"fork"`` or ``"spawn"``. If ``None``, the
+         platform's default is used. Requires Python 3.7 or later.
+        :return: The executor.
+        """
+        if backend == "process" and start_method is not None and sys.version_info < (3, 7):
+            raise ValueError("The start_method argument requires Python 3.7 or later.")
+
+        if backend == "process":
+            # Worker processes only report the shared memory they attach to,
+            # see SharedBatches, to this process's resource tracker if it is
+            # running before they start. Otherwise each starts a tracker of
+            # its own, which removes the memory when the worker exits.
+            if resource_tracker is not None and os.name == "posix":
+                resource_tracker.ensure_running()
+            if start_method is None:
+                return ProcessPoolExecutor(max_workers=workers)
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+        else:
+            return ThreadPoolExecutor(max_workers=workers)
+
+    def sample(self, n, multi_threaded=True, backend="thread", workers=None, start_method=None, max_in_flight=None,
+               schedule=None, shard_index=0, num_shards=1, resume=False):
         """
         Generate :attr:`n` number of samples from the current pipeline.
 
@@ -337,11 +1374,54 @@ class Pipeline(object):
         operations if the images are very small. Set :attr:`multi_threaded`
         to ``False`` if slowdown is experienced.
 
+        Many operations are implemented in pure Python and hold the global
+        interpreter lock, meaning threads will not scale beyond a few cores.
+        Set :attr:`backend` to ``"process"`` to execute the pipeline in
+        worker processes instead. Any custom operations added to the
+        pipeline must then be picklable.
+
         :param n: The number of new samples to produce.
         :type n: Integer
         :param multi_threaded: Whether to use multi-threading to process the
          images. Defaults to ``True``.
         :type multi_threaded: Boolean
+        :param backend: Either ``"thread"`` (default) or ``"process"``.
+         Ignored if :attr:`multi_threaded` is ``False``.
+        :type backend: String
+        :param workers: The number of worker threads or processes to use.
+         Defaults to ``None``, using the size given when creating the
+         pipeline.
+        :type workers: Integer
+        :param start_method: The multiprocessing start method used by the
+         process backend, one of ``"fork"``, ``"spawn"``, or
+         ``"forkserver"``. Defaults to the platform's default. Requires
+         Python 3.7 or later.
+        :type start_method: String
+        :param max_in_flight: The maximum number of tasks submitted to the
+         worker pool but not yet completed. Images are drawn from the
+         pipeline as tasks complete, so memory use does not grow with
+         :attr:`n`. Defaults to four times the number of workers.
+        :type max_in_flight: Integer
+        :param schedule: The order in which images are handed to the
+         workers. Defaults to ``None``, meaning images are processed in the
+         order they are drawn. Set to ``"largest_first"`` to process the
+         images with the most pixels first, so that small images fill idle
+         workers at the end of the run rather than a single large image
+         holding it up. Useful for datasets with widely varying image sizes.
+        :type schedule: String
+        :param shard_index: The index, from ``0``, of the share of the work
+         to perform when it is split across several machines. Defaults to
+         ``0``.
+        :type shard_index: Integer
+        :param num_shards: The number of shares the work is split into.
+         Each shard produces its share of the :attr:`n` samples, and the
+         shards together produce exactly :attr:`n`. Shards seeded alike,
+         see :func:`set_seed`, take different images from the same sequence
+         of draws and augment them differently. Defaults to ``1``.
+        :type num_shards: Integer
+        :param resume: Only valid when :attr:`n` is ``0``, see
+         :func:`process`.
+        :type resume: Boolean
         :return: None
         """
         if len(self.augmentor_images) == 0:
@@ -352,29 +1432,185 @@ class Pipeline(object):
         if len(self.operations) == 0:
             raise IndexError("There are no operations associated with this pipeline.")
 
+        if backend not in Pipeline._legal_backends:
+            raise ValueError("The backend argument must be one of %s." % Pipeline._legal_backends)
+
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("The max_in_flight argument must be 1 or greater.")
+
+        if schedule not in Pipeline._legal_schedules:
+            raise ValueError("The schedule argument must be one of %s." % Pipeline._legal_schedules)
+
+        if num_shards < 1:
+            raise ValueError("The num_shards argument must be 1 or greater.")
+
+        if not 0 <= shard_index < num_shards:
+            raise ValueError("The shard_index argument must be between 0 and num_shards - 1.")
+
+        if resume and n != 0:
+            raise ValueError("The resume argument can only be used when processing every image, see process().")
+
+        journal = None
+
+        if self._writer_pool is not None:
+            self._writer_pool.reset()
+
+        # When sampling, each shard draws its share of n from every image.
+        # When processing, each shard processes its share of the images.
         if n == 0:
-            augmentor_images = self.augmentor_images
+            augmentor_images = self._shard(shard_index, num_shards) if num_shards > 1 else self.augmentor_images
+            if resume:
+                journal = _Journal(augmentor_images)
+                augmentor_images = [a for a in augmentor_images if not journal.is_finished(a)]
+            total = len(augmentor_images)
         else:
-            augmentor_images = [random.choice(self.augmentor_images) for _ in range(n)]
-
-        if multi_threaded:
-            # TODO: Restore the functionality (appearance of progress bar) from the pre-multi-thread code above.
-            with tqdm(total=len(augmentor_images), desc="Executing Pipeline", unit=" Samples") as progress_bar:
-                with ThreadPoolExecutor(max_workers=None) as executor:
-                    for result in executor.map(self, augmentor_images):
-                        progress_bar.set_description("Processing %s" % result)
+            augmentor_images = self.augmentor_images
+            total = n // num_shards + (1 if shard_index < n % num_shards else 0)
+
+        # When sampling on several machines seeded alike, every shard draws
+        # the same sequence of n images, from a stream of its own, and keeps
+        # every num_shards-th draw. The augmentations are then drawn from a
+        # stream derived from the shard index, so that shards do not
+        # produce the same samples.
+        picker = random
+        if n != 0 and num_shards > 1:
+            picker = random.Random(random.getrandbits(64))
+            random.seed(random.getrandbits(64) + shard_index)
+
+        # Images are drawn lazily, so that the list of images to process is
+        # never held in memory in its entirety.
+        if schedule == "largest_first":
+            augmentor_images = self._largest_first(augmentor_images, total if n else None)
+        elif n != 0:
+            augmentor_images = itertools.islice((picker.choice(self.augmentor_images) for _ in range(n)),
+                                                shard_index, None, num_shards)
+
+        # When writing shards, samples are encoded by the workers and
+        # written by this process, one series of shards per output directory.
+        # Machines sharing the work write series of shards of their own.
+        shard_writers = {}
+        shard_name = "shard" if num_shards == 1 else "shard-%d" % shard_index
+
+        def finish(executed):
+            results, cache_counts = executed
+
+            if cache_counts is not None:
+                self.image_cache.record(*cache_counts)
+
+            for _, sample in results:
+                if sample is not None:
+                    output_directory, key, files = sample
+                    if output_directory not in shard_writers:
+                        shard_writers[output_directory] = ShardWriter(output_directory, *self.output_shards,
+                                                                      name=shard_name)
+                    shard_writers[output_directory].write(key, files)
+
+            image_paths = [image_path for image_path, _ in results]
+            if journal is not None:
+                journal.record(image_paths)
+
+            return image_paths
+
+        try:
+            if multi_threaded:
+                # TODO: Restore the functionality (appearance of progress bar) from the pre-multi-thread code above.
+                with tqdm(total=total, desc="Executing Pipeline", unit=" Samples") as progress_bar:
+                    executor = self._get_executor(backend, workers, start_method)
+                    num_workers = (workers if workers is not None else self.workers) or multiprocessing.cpu_count()
+
+                    if max_in_flight is None:
+                        max_in_flight = num_workers * 4
+
+                    if backend == "process":
+                        # Send a copy of the pipeline once per chunk of images, rather than once per image.
+                        # The chunk's writes are finished before it returns, so that it can be journalled.
+                        chunk_size = min(max(1, total // (num_workers * 4)), 64)
+                        function = functools.partial(_call_seeded, functools.partial(
+                            _execute_in_worker, self._worker_copy(), deterministic_names=resume, wait_for_writes=True,
+                            worker_process=True))
+                        # Every chunk is executed with a seed drawn here, see _call_seeded().
+                        chunks = ((random.getrandbits(32), (chunk,))
+                                  for chunk in _chunks(augmentor_images, chunk_size))
+                    else:
+                        # Images are only recorded in the journal once they are written.
+                        function = functools.partial(_execute_in_worker, self, deterministic_names=resume,
+                                                     wait_for_writes=resume)
+                        chunks = _chunks(augmentor_images, 1)
+
+                    for executed in _bounded_map(executor, function, chunks, max_in_flight):
+                        image_paths = finish(executed)
+                        progress_bar.set_description("Processing %s" % os.path.basename(image_paths[-1]))
+                        progress_bar.update(len(image_paths))
+            else:
+                with tqdm(total=total, desc="Executing Pipeline", unit=" Samples") as progress_bar:
+                    for augmentor_image in augmentor_images:
+                        finish(_execute_in_worker(self, [augmentor_image], deterministic_names=resume,
+                                                  wait_for_writes=resume))
+                        progress_bar.set_description("Processing %s" % os.path.basename(augmentor_image.image_path))
                         progress_bar.update(1)
-        else:
-            with tqdm(total=len(augmentor_images), desc="Executing Pipeline", unit=" Samples") as progress_bar:
-                for augmentor_image in augmentor_images:
-                    self._execute(augmentor_image)
-                    progress_bar.set_description("Processing %s" % os.path.basename(augmentor_image.image_path))
-                    progress_bar.update(1)
+        finally:
+            self._wait_for_writes()
+            for shard_writer in shard_writers.values():
+                shard_writer.close()
+            if journal is not None:
+                journal.close()
 
         # This does not work as it did in the pre-multi-threading code above for some reason.
         # progress_bar.close()
 
-    def process(self):
+    @staticmethod
+    def _largest_first(augmentor_images, n=None):
+        """
+        Private method. Returns a generator yielding :attr:`n` images drawn
+        at random from :attr:`augmentor_images`, or every image once if
+        :attr:`n` is ``None``, ordered by decreasing number of pixels.
+
+        Every operation's cost grows with the number of pixels it touches,
+        so the pixel count alone decides the order. Images whose dimensions
+        are unknown are scheduled last.
+
+        :param augmentor_images: The images to draw from.
+        :param n: The number of images to draw.
+        :return: A generator of AugmentorImage objects.
+        """
+        def number_of_pixels(i):
+            image_size = augmentor_images[i].image_size
+            return image_size[0] * image_size[1] if image_size else 0
+
+        if n is None:
+            counts = [1] * len(augmentor_images)
+        else:
+            # Only the number of times each image is drawn is kept, rather
+            # than the full list of n draws. The draws use the random module,
+            # as the default schedule does, so that set_seed() applies.
+            counts = [0] * len(augmentor_images)
+            for _ in range(n):
+                counts[random.randrange(len(augmentor_images))] += 1
+
+        order = sorted(range(len(augmentor_images)), key=number_of_pixels, reverse=True)
+
+        for i in order:
+            for _ in range(counts[i]):
+                yield augmentor_images[i]
+
+    def _shard(self, shard_index, num_shards):
+        """
+        Private method. Returns the images of the pipeline belonging to
+        shard :attr:`shard_index` of :attr:`num_shards`.
+
+        Images are ordered by path before being split, so that every
+        machine arrives at the same split without coordination.
+
+        :param shard_index: The index of the shard, from ``0``.
+        :param num_shards: The total number of shards.
+        :return: A list of AugmentorImage objects.
+        """
+        augmentor_images = sorted(self.augmentor_images, key=lambda augmentor_image: augmentor_image.image_path)
+
+        return augmentor_images[shard_index::num_shards]
+
+    def process(self, backend="thread", workers=None, start_method=None, schedule=None, shard_index=0, num_shards=1,
+                resume=False):
         """
         This function is used to process every image in the pipeline
         exactly once.
@@ -385,10 +1621,38 @@ class Pipeline(object):
         It would make sense to set the probability of every operation
         in the pipeline to ``1`` when using this function.
 
+        .. seealso:: The :func:`sample` function for a description of the
+         :attr:`backend`, :attr:`workers`, :attr:`start_method`, and
+         :attr:`schedule` parameters.
+
+        To split the work across several machines, call this function on
+        each with the same :attr:`num_shards` and a different
+        :attr:`shard_index`. Every image is processed by exactly one shard.
+
+        Set :attr:`resume` to ``True`` to be able to continue an interrupted
+        run. Augmented images are then named after their source image
+        rather than randomly, and each finished image is recorded in a
+        ``.augmentor_journal`` file in its output directory. Calling the
+        function again with :attr:`resume` set skips the images recorded in
+        the journal, and overwrites any image that was only partly written.
+        Delete the journal to process every image again.
+
+        :param backend: Either ``"thread"`` (default) or ``"process"``.
+        :param workers: The number of worker threads or processes to use.
+        :param start_method: The multiprocessing start method used by the
+         process backend.
+        :param schedule: Set to ``"largest_first"`` to process the largest
+         images first.
+        :param shard_index: The index of this machine's shard, from ``0``.
+        :param num_shards: The number of shards the images are split into.
+        :param resume: Whether to skip images already processed by an
+         earlier run. Defaults to ``False``.
+        :type resume: Boolean
         :return: None
         """
 
-        self.sample(0, multi_threaded=True)
+        self.sample(0, multi_threaded=True, backend=backend, workers=workers, start_method=start_method,
+                    schedule=schedule, shard_index=shard_index, num_shards=num_shards, resume=resume)
 
         return None
 
@@ -444,9 +1708,8 @@ class Pipeline(object):
 
             augmentor_images = [random.choice(self.augmentor_images) for _ in range(batch_size)]
 
-            with ThreadPoolExecutor(max_workers=None) as executor:
-                for result in executor.map(self, augmentor_images):
-                    return_results.append(result)
+            for result in self._get_executor("thread").map(self, augmentor_images):
+                return_results.append(result)
 
             yield return_results
 
@@ -457,8 +1720,135 @@ class Pipeline(object):
 
         return 1
 
+    def _prefetch_batches(self, submit_batch, prefetch):
+        """
+        Private method. Generator that keeps :attr:`prefetch` batches in
+        flight on the pipeline's worker pool, yielding them in the order they
+        were submitted.
+
+        Before each batch is yielded, the number of batches that are
+        already complete and waiting is stored in the
+        :attr:`prefetch_queue_depth` member variable.
+
+        :param submit_batch: A function that submits the work for one batch
+         to the worker pool and returns its future.
+        :param prefetch: The maximum number of batches in flight.
+        :return: A generator yielding the finished batches.
+        """
+        pending = collections.deque()
+
+        try:
+            while True:
+                while len(pending) < prefetch:
+                    pending.append(submit_batch())
+                self.prefetch_queue_depth = sum(1 for future in pending if future.done())
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _keras_sample(self, augmentor_image, image_data_format):
+        """
+        Private method. Pass :attr:`augmentor_image` through the pipeline and
+        return it as an array in the format used by :func:`keras_generator`.
+        """
+        numpy_array = np.asarray(self._execute(augmentor_image, save_to_disk=False))
+
+        # Reshape
+        w = numpy_array.shape[0]
+        h = numpy_array.shape[1]
+
+        if np.ndim(numpy_array) == 2:
+            l = 1
+        else:
+            l = np.shape(numpy_array)[2]
+
+        if image_data_format == "channels_last":
+            numpy_array = numpy_array.reshape(w, h, l)
+        elif image_data_format == "channels_first":
+            numpy_array = numpy_array.reshape(l, w, h)
+
+        return numpy_array
+
+    def _keras_sample_from_array(self, image, l, image_data_format):
+        """
+        Private method. Pass :attr:`image` through the pipeline and return it
+        as an array in the format used by :func:`keras_generator_from_array`.
+        The number of channels, :attr:`l`, is determined by the caller from
+        the full image array.
+        """
+        # Before passing the image we must format it in a shape that
+        # Pillow can understand, that is either (w, h) for greyscale
+        # or (w, h, num_channels) for RGB, RGBA, or CMYK images.
+        # PIL expects greyscale or B&W images in the form (w, h)
+        # and RGB(A) images images in the form (w, h, n) where n is
+        # the number of channels, which is 3 or 4.
+        # However, Keras often works with greyscale/B&W images in the
+        # form (w, h, 1). We will convert all images to (w, h) if they
+        #  are not RGB, otherwise we will use (w, h, n).
+        w = image.shape[0]
+        h = image.shape[1]
+
+        if l == 1:
+            numpy_array = self._execute_with_array(np.reshape(image, (w, h)))
+        else:
+            numpy_array = self._execute_with_array(np.reshape(image, (w, h, l)))
+
+        if image_data_format == "channels_first":
+            numpy_array = numpy_array.reshape(l, w, h)
+        elif image_data_format == "channels_last":
+            numpy_array = numpy_array.reshape(w, h, l)
+
+        return numpy_array
+
+    def _keras_batch(self, augmentor_images, scaled, image_data_format):
+        """
+        Private method. Pass each of :attr:`augmentor_images` through the
+        pipeline and return the batch and its labels in the format used by
+        :func:`keras_generator`.
+        """
+        X = np.asarray([self._keras_sample(augmentor_image, image_data_format)
+                        for augmentor_image in augmentor_images])
+        y = np.asarray([augmentor_image.categorical_label for augmentor_image in augmentor_images])
+
+        if scaled:
+            X = X.astype('float32')
+            X /= 255.  # PR #126
+
+        return X, y
+
+    def _keras_batch_from_array(self, images, labels, l, scaled, image_data_format):
+        """
+        Private method. Pass each of :attr:`images` through the pipeline and
+        return the batch and its labels in the format used by
+        :func:`keras_generator_from_array`.
+        """
+        # The images are augmented as a batch, see _keras_sample_from_array()
+        # for the shapes used.
+        w, h = np.shape(images[0])[:2]
+
+        if l == 1:
+            batch = self._apply_operations_batch(np.reshape(images, (len(images), w, h)))
+        else:
+            batch = self._apply_operations_batch(np.reshape(images, (len(images), w, h, l)))
+
+        if image_data_format == "channels_first":
+            X = np.asarray([np.reshape(x, (l, w, h)) for x in batch])
+        elif image_data_format == "channels_last":
+            X = np.asarray([np.reshape(x, (w, h, l)) for x in batch])
+        else:
+            X = np.asarray(batch)
+        y = np.asarray(labels)
+
+        if scaled:
+            X = X.astype('float32')
+            X /= 255.  # PR #126
+
+        return X, y
+
     # TODO: Fix: scaled=True results in an error.
-    def keras_generator(self, batch_size, scaled=True, image_data_format="channels_last"):
+    def keras_generator(self, batch_size, scaled=True, image_data_format="channels_last", prefetch=0,
+                        backend="thread", shared_memory=False):
         """
         Returns an image generator that will sample from the current pipeline
         indefinitely, as long as it is called.
@@ -484,6 +1874,22 @@ class Pipeline(object):
 
         By default, Augmentor uses ``'channels_last'``.
 
+        By default each batch is created when it is requested. Set
+        :attr:`prefetch` to prepare up to that many batches in the
+        background using the pipeline's worker pool, so that augmentation
+        overlaps with training. The number of finished batches waiting when
+        a batch is returned is stored in :attr:`prefetch_queue_depth`: if
+        this is usually :attr:`prefetch` the model is the bottleneck, if
+        it is usually ``0`` the augmentation is.
+
+        When prefetching with the process backend, set
+        :attr:`shared_memory` to ``True`` to have the worker processes write
+        each batch directly into shared memory, rather than sending every
+        image back to this process. All augmented images must then have the
+        same dimensions. The batches returned are views of a ring of
+        ``prefetch + 2`` reused buffers, and each remains valid until two
+        further batches have been requested. Requires Python 3.8 or later.
+
         :param batch_size: The number of images to return per batch.
         :type batch_size: Integer
         :param scaled: True (default) if pixels are to be converted
@@ -493,61 +1899,64 @@ class Pipeline(object):
         :param image_data_format: Either ``'channels_last'`` (default) or
          ``'channels_first'``.
         :type image_data_format: String
+        :param prefetch: The number of batches to prepare in the background.
+         Defaults to ``0``, meaning no prefetching.
+        :type prefetch: Integer
+        :param backend: Either ``"thread"`` (default) or ``"process"``. The
+         type of worker pool used when :attr:`prefetch` is set.
+        :type backend: String
+        :param shared_memory: Whether the process backend should assemble
+         batches in shared memory. Defaults to ``False``.
+        :type shared_memory: Boolean
         :return: An image generator.
         """
 
         if image_data_format not in ["channels_first", "channels_last"]:
             warnings.warn("To work with Keras, must be one of channels_first or channels_last.")
 
-        while True:
-
-            # Randomly select 25 images for augmentation and yield the
-            # augmented images.
-            # X = np.array([])
-            # y = np.array([])
-            # The correct thing to do here is to pre-allocate
-            # batch = np.ndarray((batch_size, 28, 28, 1))
+        if prefetch < 0:
+            raise ValueError("The prefetch argument must be 0 or greater.")
 
-            X = []
-            y = []
+        if backend not in Pipeline._legal_backends:
+            raise ValueError("The backend argument must be one of %s." % Pipeline._legal_backends)
 
-            for i in range(batch_size):
+        if shared_memory and not (prefetch and backend == "process"):
+            raise ValueError("The shared_memory argument requires prefetch and the process backend.")
 
-                # Pre-allocate
-                # batch[i:i+28]
+        def random_images():
+            return [random.choice(self.augmentor_images) for _ in range(batch_size)]
 
-                # Select random image, get image array and label
-                random_image_index = random.randint(0, len(self.augmentor_images)-1)
-                numpy_array = np.asarray(self._execute(self.augmentor_images[random_image_index], save_to_disk=False))
-                label = self.augmentor_images[random_image_index].categorical_label
+        if prefetch:
+            executor = self._get_executor(backend)
+            pipeline = self._worker_copy() if backend == "process" else self
 
-                # Reshape
-                w = numpy_array.shape[0]
-                h = numpy_array.shape[1]
+            if shared_memory:
+                from .SharedBatches import shared_memory_batches
 
-                if np.ndim(numpy_array) == 2:
-                    l = 1
-                else:
-                    l = np.shape(numpy_array)[2]
-
-                if image_data_format == "channels_last":
-                    numpy_array = numpy_array.reshape(w, h, l)
-                elif image_data_format == "channels_first":
-                    numpy_array = numpy_array.reshape(l, w, h)
+                def draw_batch():
+                    augmentor_images = random_images()
+                    return augmentor_images, [augmentor_image.categorical_label for augmentor_image in augmentor_images]
 
-                X.append(numpy_array)
-                y.append(label)
+                batches = shared_memory_batches(self, functools.partial(_submit_seeded, executor),
+                                                functools.partial(pipeline._keras_sample,
+                                                                  image_data_format=image_data_format),
+                                                draw_batch, scaled, prefetch)
+            else:
+                submit = functools.partial(_submit_seeded, executor) if backend == "process" else executor.submit
 
-            X = np.asarray(X)
-            y = np.asarray(y)
+                def submit_batch():
+                    return submit(pipeline._keras_batch, random_images(), scaled, image_data_format)
 
-            if scaled:
-                X = X.astype('float32')
-                X /= 255.  # PR #126
+                batches = self._prefetch_batches(submit_batch, prefetch)
 
-            yield (X, y)
+            for batch in batches:
+                yield batch
+        else:
+            while True:
+                yield self._keras_batch(random_images(), scaled, image_data_format)
 
-    def keras_generator_from_array(self, images, labels, batch_size, scaled=True, image_data_format="channels_last"):
+    def keras_generator_from_array(self, images, labels, batch_size, scaled=True, image_data_format="channels_last",
+                                   prefetch=0, backend="thread", shared_memory=False):
         """
         Returns an image generator that will sample from the current pipeline
         indefinitely, as long as it is called.
@@ -573,6 +1982,10 @@ class Pipeline(object):
 
         By default, Augmentor uses ``'channels_last'``.
 
+        .. seealso:: The :func:`keras_generator` function for a description
+         of the :attr:`prefetch`, :attr:`backend`, and :attr:`shared_memory`
+         parameters.
+
         :param images: The images to augment using the current pipeline.
         :type images: Array-like matrix. For greyscale images they can be
          in the form ``(l, x, y)`` or ``(l, x, y, 1)``, where
@@ -594,6 +2007,14 @@ class Pipeline(object):
          while for ``'channels_last'`` the batch is returned in the form
          ``(batch_size, num_channels, x, y)``.
         :param image_data_format: String
+        :param prefetch: The number of batches to prepare in the background.
+         Defaults to ``0``, meaning no prefetching.
+        :type prefetch: Integer
+        :param backend: Either ``"thread"`` (default) or ``"process"``.
+        :type backend: String
+        :param shared_memory: Whether the process backend should assemble
+         batches in shared memory. Defaults to ``False``.
+        :type shared_memory: Boolean
         :return: An image generator.
         """
 
@@ -604,53 +2025,98 @@ class Pipeline(object):
         if len(images) != len(labels):
             raise IndexError("The number of images does not match the number of labels.")
 
-        while True:
+        if prefetch < 0:
+            raise ValueError("The prefetch argument must be 0 or greater.")
 
-            X = []
-            y = []
+        if backend not in Pipeline._legal_backends:
+            raise ValueError("The backend argument must be one of %s." % Pipeline._legal_backends)
 
-            for i in range(batch_size):
+        if np.ndim(images) == 3:
+            l = 1
+        else:
+            l = np.shape(images)[-1]
 
-                random_image_index = random.randint(0, len(images)-1)
+        if shared_memory and not (prefetch and backend == "process"):
+            raise ValueError("The shared_memory argument requires prefetch and the process backend.")
 
-                # Before passing the image we must format it in a shape that
-                # Pillow can understand, that is either (w, h) for greyscale
-                # or (w, h, num_channels) for RGB, RGBA, or CMYK images.
-                # PIL expects greyscale or B&W images in the form (w, h)
-                # and RGB(A) images images in the form (w, h, n) where n is
-                # the number of channels, which is 3 or 4.
-                # However, Keras often works with greyscale/B&W images in the
-                # form (w, h, 1). We will convert all images to (w, h) if they
-                #  are not RGB, otherwise we will use (w, h, n).
-                if np.ndim(images) == 3:
-                    l = 1
-                else:
-                    l = np.shape(images)[-1]
+        def random_batch():
+            random_image_indices = [random.randint(0, len(images)-1) for _ in range(batch_size)]
+            return [images[i] for i in random_image_indices], [labels[i] for i in random_image_indices]
 
-                w = images[random_image_index].shape[0]
-                h = images[random_image_index].shape[1]
+        if prefetch:
+            executor = self._get_executor(backend)
+            pipeline = self._worker_copy() if backend == "process" else self
 
-                if l == 1:
-                    numpy_array = self._execute_with_array(np.reshape(images[random_image_index], (w, h)))
-                else:
-                    numpy_array = self._execute_with_array(np.reshape(images[random_image_index], (w, h, l)))
+            if shared_memory:
+                from .SharedBatches import shared_memory_batches
+
+                batches = shared_memory_batches(self, functools.partial(_submit_seeded, executor),
+                                                functools.partial(pipeline._keras_sample_from_array, l=l,
+                                                                  image_data_format=image_data_format),
+                                                random_batch, scaled, prefetch)
+            else:
+                submit = functools.partial(_submit_seeded, executor) if backend == "process" else executor.submit
+
+                def submit_batch():
+                    batch_images, batch_labels = random_batch()
+                    return submit(pipeline._keras_batch_from_array, batch_images, batch_labels, l, scaled,
+                                  image_data_format)
+
+                batches = self._prefetch_batches(submit_batch, prefetch)
+
+            for batch in batches:
+                yield batch
+        else:
+            while True:
+                batch_images, batch_labels = random_batch()
+                yield self._keras_batch_from_array(batch_images, batch_labels, l, scaled, image_data_format)
+
+    def aiter_batches(self, batch_size, prefetch=2, save_to_disk=False):
+        """
+        Returns an asynchronous generator that will sample batches from the
+        current pipeline indefinitely, for use with :mod:`asyncio`:
+
+        .. code-block:: python
 
-                if image_data_format == "channels_first":
-                    numpy_array = numpy_array.reshape(l, w, h)
-                elif image_data_format == "channels_last":
-                    numpy_array = numpy_array.reshape(w, h, l)
+            >>> async for images, labels in p.aiter_batches(batch_size=32):
+            >>>     await do_something(images, labels)
 
-                X.append(numpy_array)
-                y.append(labels[random_image_index])
+        .. warning::
+         This function returns images from the current pipeline
+         **with replacement**.
+
+        Reading, augmenting and, if :attr:`save_to_disk` is ``True``, saving
+        each image is run on the pipeline's worker pool, so the event loop
+        is never blocked. Up to :attr:`prefetch` batches are kept in flight,
+        and no more are scheduled until the next batch is requested.
+        Batches still in flight are cancelled when iteration stops.
+
+        Requires Python 3.7 or later.
+
+        :param batch_size: The number of images to return per batch.
+        :type batch_size: Integer
+        :param prefetch: The number of batches to keep in flight. Defaults
+         to 2.
+        :type prefetch: Integer
+        :param save_to_disk: Whether to also save the augmented images to
+         disk. Defaults to ``False``.
+        :type save_to_disk: Boolean
+        :return: An asynchronous generator yielding a tuple containing a
+         list of augmented images (as PIL.Image objects) and a list of their
+         labels.
+        """
+        if len(self.augmentor_images) == 0:
+            raise IndexError("There are no images in the pipeline. "
+                             "Add a directory using add_directory(), "
+                             "pointing it to a directory containing images.")
 
-            X = np.asarray(X)
-            y = np.asarray(y)
+        if prefetch < 1:
+            raise ValueError("The prefetch argument must be 1 or greater.")
 
-            if scaled:
-                X = X.astype('float32')
-                X /= 255.  # PR #126
+        # Imported here, as the module uses syntax not available in Python 2.
+        from .AsyncPipeline import aiter_batches
 
-            yield(X, y)
+        return aiter_batches(self, batch_size, prefetch=prefetch, save_to_disk=save_to_disk)
 
     def keras_preprocess_func(self):
         """
@@ -750,15 +2216,17 @@ class Pipeline(object):
         # Python's own List exceptions can handle erroneous user input.
         self.operations.pop(operation_index)
 
-    def add_further_directory(self, new_source_directory, new_output_directory="output"):
+    def add_further_directory(self, new_source_directory, new_output_directory="output", recursive=False):
         """
         Add a further directory containing images you wish to scan for augmentation.
 
         :param new_source_directory: The directory to scan for images.
         :param new_output_directory: The directory to use for outputted,
          augmented images.
+        :param recursive: Whether to also scan subdirectories for images.
         :type new_source_directory: String
         :type new_output_directory: String
+        :type recursive: Boolean
         :return: None
         """
         if not os.path.exists(new_source_directory):
@@ -767,7 +2235,8 @@ class Pipeline(object):
         self._populate(source_directory=new_source_directory,
                        output_directory=new_output_directory,
                        ground_truth_directory=None,
-                       ground_truth_output_directory=new_output_directory)
+                       ground_truth_output_directory=new_output_directory,
+                       recursive=recursive)
 
     def status(self):
         """
@@ -822,6 +2291,12 @@ class Pipeline(object):
         """
         Set the seed of Python's internal random number generator.
 
+        When using the process backend, see :func:`sample`, every task
+        sent to a worker process is given a seed drawn from this generator,
+        so the augmentations produced follow the seed set here. With the
+        thread backend, the order in which threads draw random numbers
+        varies from run to run.
+
         :param seed: The seed to use. Strings or other objects will be hashed.
         :type seed: Integer
         :return: None
@@ -1622,6 +3097,49 @@ class Pipeline(object):
         else:
             self.add_operation(RandomContrast(probability=probability, min_factor=min_factor,max_factor=max_factor))
 
+    def hsv_shift(self, probability, hue_shift=0.0, saturation_scale=0.0, saturation_shift=0.0, value_scale=0.0,
+                  value_shift=0.0):
+        """
+        Randomly shift the hue, saturation, and value (brightness) of RGB
+        images, also known as colour jitter. Images of other modes, such as
+        ground truth masks, are left unchanged.
+
+        Scales are drawn from between ``1 / (1 + scale)`` and
+        ``1 + scale``, and shifts from between ``-shift`` and ``shift``.
+        With the default arguments, the images are not changed.
+
+        :param probability: A value between 0 and 1 representing the
+         probability that the operation should be performed.
+        :param hue_shift: The maximum shift of the hue, as a fraction of the
+         colour wheel, between 0 and 1. Hues wrap around.
+        :param saturation_scale: Controls the maximum factor by which the
+         saturation is scaled. Must be 0 or greater.
+        :param saturation_shift: The maximum shift of the saturation, between
+         0 and 1.
+        :param value_scale: Controls the maximum factor by which the value
+         is scaled. Must be 0 or greater.
+        :param value_shift: The maximum shift of the value, between 0 and 1.
+        :type probability: Float
+        :type hue_shift: Float
+        :type saturation_scale: Float
+        :type saturation_shift: Float
+        :type value_scale: Float
+        :type value_shift: Float
+        :return: None
+        """
+        if not 0 < probability <= 1:
+            raise ValueError(Pipeline._probability_error_text)
+        elif not 0 <= hue_shift <= 1:
+            raise ValueError("The hue_shift argument must be between 0 and 1.")
+        elif not 0 <= saturation_scale or not 0 <= value_scale:
+            raise ValueError("The saturation_scale and value_scale arguments must be 0 or greater.")
+        elif not 0 <= saturation_shift <= 1 or not 0 <= value_shift <= 1:
+            raise ValueError("The saturation_shift and value_shift arguments must be between 0 and 1.")
+        else:
+            self.add_operation(HSVShifting(probability=probability, hue_shift=hue_shift,
+                                           saturation_scale=saturation_scale, saturation_shift=saturation_shift,
+                                           value_scale=value_scale, value_shift=value_shift))
+
     def random_erasing(self, probability, rectangle_area):
         """
         Work in progress. This operation performs a Random Erasing operation,
@@ -1795,9 +3313,12 @@ class DataPipeline(Pipeline):
     The images and masks that are passed can be of differing formats and
     have differing numbers of channels. For example, the ground truth data
     can be 3 channel RGB, while its mask images can be 1 channel monochrome.
+
+    As for :class:`Pipeline`, the optional :attr:`workers` argument sets the
+    number of threads in the pipeline's worker pool.
     """
 
-    def __init__(self, images, labels=None):
+    def __init__(self, images, labels=None, workers=None):
 
         # We will not use this member variable for now.
         # if output_directory:
@@ -1810,6 +3331,8 @@ class DataPipeline(Pipeline):
 
         self.operations = []
 
+        self._init_execution(workers)
+
     ####################################################################################################################
     # Properties
     ####################################################################################################################
@@ -1847,70 +3370,115 @@ class DataPipeline(Pipeline):
 
     def __call__(self, augmentor_image):
         """
-        Multi-threading support to be enabled in a future release.
-        """
-        return self._execute(augmentor_image)
+        Function used by the ThreadPoolExecutor to pass an image and its
+        masks through the pipeline using multiple threads. Do not call
+        directly.
 
-    def generator(self, batch_size=1):
+        :param augmentor_image: An image and its masks, as a list of arrays.
+        :return: The augmented image and masks, as a list of arrays.
+        """
+        return self._execute_images(augmentor_image)
 
-        # If the number is 0 or negative, default it to 1
-        batch_size = 1 if (batch_size < 1) else batch_size
+    def _execute_images(self, images):
+        """
+        Private method. Pass an image and its masks through the pipeline,
+        applying each operation identically to every image in the list.
 
-        while True:
+        :param images: An image and its masks, as a list of arrays.
+        :return: The augmented image and masks, as a list of arrays.
+        """
+        return self._apply_operations_array([np.asarray(x) for x in images])
 
-            batch = []
-            y = []
+    def _execute_indices(self, indices, multi_threaded, ordered):
+        """
+        Private method. Pass the images at each of :attr:`indices` through
+        the pipeline, optionally using the pipeline's worker pool.
 
-            for i in range(0, batch_size):
+        :param indices: The indices of the images and masks to augment.
+        :param multi_threaded: Whether to process the images in parallel.
+        :param ordered: If ``True``, results are returned in the order of
+         :attr:`indices`, otherwise in the order in which they complete.
+        :return: A list of (index, augmented images) tuples.
+        """
+        if not multi_threaded:
+            return [(index, self(self.augmentor_images[index])) for index in indices]
 
-                index = random.randint(0, len(self.augmentor_images) - 1)
-                images_to_yield = [Image.fromarray(x) for x in self.augmentor_images[index]]
+        executor = self._get_executor("thread")
 
-                for operation in self.operations:
-                    r = round(random.uniform(0, 1), 1)
-                    if r <= operation.probability:
-                        images_to_yield = operation.perform_operation(images_to_yield)
+        if ordered:
+            return list(zip(indices, executor.map(self, [self.augmentor_images[index] for index in indices])))
 
-                images_to_yield = [np.asarray(x) for x in images_to_yield]
+        futures = {}
+        for index in indices:
+            futures[executor.submit(self, self.augmentor_images[index])] = index
 
-                if self.labels:
-                    batch.append(images_to_yield)
-                    y.append(self.labels[index])
-                else:
-                    batch.append(images_to_yield)
+        return [(futures[future], future.result()) for future in as_completed(futures)]
 
-            if self.labels:
-                yield batch, y
-            else:
-                yield batch
+    def generator(self, batch_size=1, multi_threaded=True, ordered=True):
+        """
+        Returns a generator that yields batches of augmented images and
+        their masks, along with their labels if labels were provided,
+        indefinitely, as long as it is called.
 
-    def sample(self, n):
+        The images of each batch are augmented in parallel using the
+        pipeline's worker pool, unless :attr:`multi_threaded` is ``False``.
 
-        batch = []
-        y = []
+        :param batch_size: The number of images to return per batch.
+        :type batch_size: Integer
+        :param multi_threaded: Whether to use multi-threading to process the
+         images. Defaults to ``True``.
+        :type multi_threaded: Boolean
+        :param ordered: If ``False``, the images of each batch are returned
+         in the order in which they finish processing, which avoids waiting
+         for slower images. Labels always match their images. Defaults to
+         ``True``.
+        :type ordered: Boolean
+        :return: A generator.
+        """
 
-        for i in range(0, n):
+        # If the number is 0 or negative, default it to 1
+        batch_size = 1 if (batch_size < 1) else batch_size
 
-            # We first get a random image(s) and label, because even if
-            # the pipeline does nothing (e.g. the probabilities are very low)
-            # then we return the images as they are, as the user requested.
-            index = random.randint(0, len(self.augmentor_images) - 1)
-            images_to_return = [Image.fromarray(x) for x in self.augmentor_images[index]]
+        while True:
 
-            for operation in self.operations:
-                r = round(random.uniform(0, 1), 1)
-                if r <= operation.probability:
-                    images_to_return = operation.perform_operation(images_to_return)
+            indices = [random.randint(0, len(self.augmentor_images) - 1) for _ in range(batch_size)]
+            results = self._execute_indices(indices, multi_threaded, ordered)
 
-            images_to_return = [np.asarray(x) for x in images_to_return]
+            batch = [images_to_yield for _, images_to_yield in results]
 
             if self.labels:
-                batch.append(images_to_return)
-                y.append(self.labels[index])
+                yield batch, [self.labels[index] for index, _ in results]
             else:
-                batch.append(images_to_return)
+                yield batch
+
+    def sample(self, n, multi_threaded=True, ordered=True):
+        """
+        Returns :attr:`n` augmented images and their masks, along with their
+        labels if labels were provided.
+
+        .. seealso:: The :func:`generator` function for a description of the
+         :attr:`multi_threaded` and :attr:`ordered` parameters.
+
+        :param n: The number of samples to return.
+        :type n: Integer
+        :param multi_threaded: Whether to use multi-threading to process the
+         images. Defaults to ``True``.
+        :type multi_threaded: Boolean
+        :param ordered: Whether the samples are returned in the order they
+         were drawn. Defaults to ``True``.
+        :type ordered: Boolean
+        :return: The augmented images, or the augmented images and labels.
+        """
+
+        # We first get a random image(s) and label, because even if
+        # the pipeline does nothing (e.g. the probabilities are very low)
+        # then we return the images as they are, as the user requested.
+        indices = [random.randint(0, len(self.augmentor_images) - 1) for _ in range(n)]
+        results = self._execute_indices(indices, multi_threaded, ordered)
+
+        batch = [images_to_return for _, images_to_return in results]
 
         if self.labels:
-            return batch, y
+            return batch, [self.labels[index] for index, _ in results]
         else:
             return batch
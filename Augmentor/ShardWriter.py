@@ -0,0 +1,137 @@
+# ShardWriter.py
+# Author: Marcus D. Bloice <https://github.com/mdbloice> and contributors
+# Licensed under the terms of the MIT Licence.
+"""
+The ShardWriter module is used by the :class:`~Augmentor.Pipeline.Pipeline`
+class to write augmented images into ``.tar`` archives, or shards, rather
+than as individual files, see
+:func:`~Augmentor.Pipeline.Pipeline.set_output_shards`.
+
+The layout of the shards follows the convention used by WebDataset. Every
+file of a sample is named after the sample's key, followed by an extension
+describing its contents, for example ``key.png``, ``key.groundtruth_1.png``,
+and ``key.json``. The files of a sample are stored next to each other.
+"""
+from __future__ import (absolute_import, division,
+                        print_function, unicode_literals)
+from builtins import *
+
+import os
+import io
+import re
+import time
+import errno
+import tarfile
+
+
+class ShardWriter(object):
+    """
+    Writes samples into a series of ``.tar`` shards in a directory, named
+    ``shard-000000.tar``, ``shard-000001.tar``, and so on. A new shard is
+    started once the current shard holds :attr:`max_count` samples or
+    :attr:`max_bytes` bytes. Numbering continues after any shards already
+    in the directory, and shards are created exclusively, moving on to the
+    next number if a shard of the same name appears in the meantime, so
+    that shards are never overwritten.
+
+    Several machines writing to the same directory, see
+    :func:`~Augmentor.Pipeline.Pipeline.sample`, each use a :attr:`name`
+    of their own, such as ``shard-1``, giving ``shard-1-000000.tar`` and
+    so on.
+    """
+    def __init__(self, directory, max_count=1000, max_bytes=None, name="shard"):
+        """
+        :param directory: The directory to write the shards to.
+        :param max_count: The maximum number of samples per shard.
+        :param max_bytes: The maximum size of the files in a shard, in
+         bytes, or ``None`` for no limit. A sample larger than this is
+         written to a shard of its own.
+        :param name: The name of the shards, which is followed by their
+         number. Defaults to ``"shard"``.
+        :type directory: String
+        :type max_count: Integer
+        :type max_bytes: Integer
+        :type name: String
+        """
+        self.directory = directory
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self._pattern = name + "-%06d.tar"
+
+        existing = [int(match.group(1)) for match in
+                    (re.match(re.escape(name) + r"-(\d+)\.tar$", file_name) for file_name in os.listdir(directory))
+                    if match]
+        self.shard_index = max(existing) + 1 if existing else 0
+
+        self._file = None
+        self._tar = None
+        self._count = 0
+        self._bytes = 0
+
+    def write(self, key, files):
+        """
+        Writes the files of a sample to the current shard, starting a new
+        shard if the current one is full.
+
+        :param key: The key of the sample, which must not contain dots.
+        :param files: The sample's files, as a list of (extension, data)
+         tuples, where data is a bytes object.
+        :type key: String
+        :type files: List of tuples
+        :return: None
+        """
+        size = sum(len(data) for _, data in files)
+
+        if self._tar is not None and (self._count >= self.max_count or
+                                      (self.max_bytes is not None and self._bytes + size > self.max_bytes)):
+            self._close_shard()
+
+        if self._tar is None:
+            self._open_shard()
+
+        mtime = time.time()
+
+        for extension, data in files:
+            info = tarfile.TarInfo(name="%s.%s" % (key, extension))
+            info.size = len(data)
+            info.mtime = mtime
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+
+        # Complete samples reach the disk even if the run is interrupted.
+        self._tar.fileobj.flush()
+
+        self._count += 1
+        self._bytes += size
+
+    def _open_shard(self):
+        while True:
+            path = os.path.join(self.directory, self._pattern % self.shard_index)
+            self.shard_index += 1
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o644)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+                continue
+            break
+
+        self._file = os.fdopen(fd, "wb")
+        self._tar = tarfile.open(fileobj=self._file, mode="w")
+
+    def _close_shard(self):
+        self._tar.close()
+        self._file.close()
+        self._tar = None
+        self._file = None
+        self._count = 0
+        self._bytes = 0
+
+    def close(self):
+        """
+        Closes the current shard.
+
+        :return: None
+        """
+        if self._tar is not None:
+            self._close_shard()
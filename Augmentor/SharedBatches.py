@@ -0,0 +1,193 @@
+# SharedBatches.py
+# Author: Marcus D. Bloice <https://github.com/mdbloice> and contributors
+# Licensed under the terms of the MIT Licence.
+"""
+The SharedBatches module is used by the generators of the
+:class:`~Augmentor.Pipeline.Pipeline` class to assemble batches created by
+worker processes in shared memory.
+
+Rather than returning each augmented image to the parent process, where it
+would be unpickled and copied again into a batch, workers write their
+images directly into a shared memory buffer holding the entire batch. The
+parent process then returns a NumPy view of this buffer without copying
+it. The buffers are allocated once and reused in a ring.
+
+This module requires Python 3.8 or later, and is only imported when a
+generator is created with ``shared_memory=True``.
+"""
+from multiprocessing import shared_memory
+
+import collections
+import numpy as np
+
+from concurrent.futures import wait
+
+
+class SharedBatchRing(object):
+    """
+    A fixed number of equally sized shared memory buffers, each holding one
+    batch, which are handed out in turn.
+    """
+    def __init__(self, shape, dtype, size):
+        """
+        :param shape: The shape of a batch, including the batch dimension.
+        :param dtype: The data type of a batch.
+        :param size: The number of buffers in the ring.
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.position = 0
+
+        number_of_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.buffers = [shared_memory.SharedMemory(create=True, size=number_of_bytes) for _ in range(size)]
+
+    def next_slot(self):
+        """
+        Returns the index of the next buffer in the ring.
+        """
+        slot = self.position
+        self.position = (self.position + 1) % len(self.buffers)
+        return slot
+
+    def name(self, slot):
+        return self.buffers[slot].name
+
+    def view(self, slot):
+        """
+        Returns a NumPy array backed by the buffer at :attr:`slot`. No data
+        is copied.
+        """
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.buffers[slot].buf)
+
+    def close(self):
+        """
+        Release and remove all buffers of the ring.
+        """
+        for shared_buffer in self.buffers:
+            try:
+                shared_buffer.close()
+            except BufferError:
+                # The consumer still holds a view of this buffer. Its memory
+                # is released once the view has been garbage collected.
+                pass
+            shared_buffer.unlink()
+
+
+def fill_batch(name, shape, dtype, make_sample, items, scaled):
+    """
+    Executed by the worker processes. Create a sample from each of
+    :attr:`items` and write it into the shared memory buffer :attr:`name`.
+
+    :param name: The name of the shared memory buffer holding the batch.
+    :param shape: The shape of the batch.
+    :param dtype: The data type of the batch.
+    :param make_sample: A function creating a single sample, as an array,
+     from each of :attr:`items`.
+    :param items: The items to create the samples of the batch from.
+    :param scaled: Whether to scale pixel values to between 0 and 1.
+    :return: None
+    """
+    shared_buffer = shared_memory.SharedMemory(name=name)
+    batch = np.ndarray(shape, dtype=dtype, buffer=shared_buffer.buf)
+
+    try:
+        for i, item in enumerate(items):
+            sample = make_sample(item)
+            if sample.shape != batch.shape[1:]:
+                raise ValueError("All augmented images must have the same dimensions to be returned in shared memory, "
+                                 "expected %s but got %s." % (batch.shape[1:], sample.shape))
+            if scaled:
+                np.divide(sample, 255., out=batch[i], casting="unsafe")
+            else:
+                batch[i] = sample
+    finally:
+        del batch
+        shared_buffer.close()
+
+
+def make_batch(make_sample, items, scaled):
+    """
+    Executed by the worker processes. Create a sample from each of
+    :attr:`items` and return the batch as an ordinary array. Used for the
+    first batch, from which the dimensions of the shared memory buffers
+    are taken.
+
+    :param make_sample: A function creating a single sample, as an array,
+     from each of :attr:`items`.
+    :param items: The items to create the samples of the batch from.
+    :param scaled: Whether to scale pixel values to between 0 and 1.
+    :return: The batch.
+    """
+    samples = [make_sample(item) for item in items]
+
+    for sample in samples[1:]:
+        if sample.shape != samples[0].shape:
+            raise ValueError("All augmented images must have the same dimensions to be returned in shared memory, "
+                             "expected %s but got %s." % (samples[0].shape, sample.shape))
+
+    batch = np.stack(samples)
+
+    if scaled:
+        batch = np.divide(batch, 255., out=np.empty(batch.shape, dtype=np.float32), casting="unsafe")
+
+    return batch
+
+
+def shared_memory_batches(pipeline, submit, make_sample, draw_batch, scaled, prefetch):
+    """
+    Generator yielding batches assembled in shared memory by the worker
+    processes that :attr:`submit` sends tasks to, keeping :attr:`prefetch`
+    batches in flight.
+
+    The first batch is returned by its worker as usual, and gives the
+    dimensions of the following batches, which are views of a ring of
+    ``prefetch + 2`` buffers.
+    Each batch remains valid until two further batches have been
+    requested, after which its buffer is reused. Copy a batch if it must be
+    kept for longer.
+
+    :param pipeline: The pipeline whose :attr:`prefetch_queue_depth` is
+     updated before each batch is returned.
+    :param submit: A function submitting ``function(*args)`` to a process
+     pool, called as ``submit(function, *args)``, and returning its future.
+    :param make_sample: A picklable function creating a single sample, as
+     an array, from an item returned by :attr:`draw_batch`.
+    :param draw_batch: A function returning the items and labels of the
+     next batch.
+    :param scaled: Whether to scale pixel values to between 0 and 1.
+    :param prefetch: The number of batches to keep in flight.
+    :return: A generator yielding tuples of a batch and its labels.
+    """
+    # The dimensions of the buffers are taken from the first batch, which
+    # is created by a worker and returned as usual.
+    items, first_labels = draw_batch()
+    first_batch = submit(make_batch, make_sample, items, scaled).result()
+    ring = SharedBatchRing(first_batch.shape, first_batch.dtype, prefetch + 2)
+
+    pending = collections.deque()
+
+    try:
+        while True:
+            while len(pending) < prefetch:
+                items, labels = draw_batch()
+                slot = ring.next_slot()
+                future = submit(fill_batch, ring.name(slot), ring.shape, ring.dtype, make_sample, items, scaled)
+                pending.append((future, slot, labels))
+
+            pipeline.prefetch_queue_depth = sum(1 for future, _, _ in pending if future.done())
+
+            if first_batch is not None:
+                batch, labels, first_batch = first_batch, first_labels, None
+                yield batch, np.asarray(labels)
+                continue
+
+            future, slot, labels = pending.popleft()
+            future.result()
+
+            yield ring.view(slot), np.asarray(labels)
+    finally:
+        for future, _, _ in pending:
+            future.cancel()
+        # Workers may still be writing to the buffers.
+        wait([future for future, _, _ in pending])
+        ring.close()
@@ -34,7 +34,8 @@ setup(
         'tqdm>=4.9.0',
         'future>=0.16.0',
         'numpy>=1.11.0',
-        'futures>=3.2.0; python_version == "2.7"'
+        'futures>=3.2.0; python_version == "2.7"',
+        'scandir>=1.5; python_version == "2.7"'
     ]
     # zip_safe=False # Check this later.
 )
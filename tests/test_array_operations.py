@@ -0,0 +1,198 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import random
+import numpy as np
+
+import Augmentor
+from Augmentor import Operations
+
+
+def operations_with_array_implementations():
+    return [Operations.Greyscale(1),
+            Operations.Invert(1),
+            Operations.BlackAndWhite(1, 128),
+            Operations.RandomBrightness(1, 0.5, 1.5),
+            Operations.RandomColor(1, 0.5, 1.5),
+            Operations.RandomContrast(1, 0.5, 1.5),
+            Operations.Rotate(1, -1),
+            Operations.Flip(1, "RANDOM"),
+            Operations.Crop(1, 30, 20, True),
+            Operations.Crop(1, 30, 21, False),
+            Operations.CropPercentage(1, 0.5, True, True),
+            Operations.CropRandom(1, 0.6),
+            Operations.RandomErasing(1, 0.5)]
+
+
+def test_array_operations_match_pil():
+    rgb = np.random.randint(0, 256, (50, 70, 3)).astype('uint8')
+    greyscale = np.random.randint(0, 256, (50, 70)).astype('uint8')
+
+    for operation in operations_with_array_implementations():
+        for array in [rgb, greyscale]:
+            for seed in range(10):
+                random.seed(seed)
+                np.random.seed(seed)
+                result = operation.perform_operation_array([array])[0]
+
+                # The default implementation goes through PIL.
+                random.seed(seed)
+                np.random.seed(seed)
+                expected = Operations.Operation.perform_operation_array(operation, [array])[0]
+
+                assert result.shape == expected.shape
+                assert result.dtype == expected.dtype
+                assert np.array_equal(result, expected)
+
+
+def test_array_operations_with_float_arrays():
+    array = np.random.rand(50, 70, 3).astype(np.float32)
+
+    for operation in operations_with_array_implementations():
+        result = operation.perform_operation_array([array])[0]
+        assert result.dtype in (np.float32, np.bool_)
+        if result.dtype == np.float32:
+            assert result.min() >= 0 and result.max() <= 1
+
+    result = Operations.Invert(1).perform_operation_array([array])[0]
+    assert np.allclose(result, 1 - array)
+
+
+def test_data_pipeline_stays_in_numpy():
+    images = [[np.random.randint(0, 256, (40, 40, 3)).astype('uint8'), np.zeros((40, 40), dtype='uint8')]
+              for _ in range(5)]
+
+    p = Augmentor.DataPipeline(images)
+    p.flip_left_right(probability=1)
+    p.random_brightness(probability=1, min_factor=0.5, max_factor=0.5)
+
+    augmented = p.sample(10)
+    assert len(augmented) == 10
+    for image, mask in augmented:
+        assert image.shape == (40, 40, 3)
+        assert mask.shape == (40, 40)
+
+    # Arrays that no operation changed are copies, not the originals.
+    p = Augmentor.DataPipeline(images)
+    p.add_operation(Operations.Flip(0, "LEFT_RIGHT"))
+    image, mask = p.sample(1)[0]
+    assert not any(image is original for original, _ in images)
+
+
+def test_pil_operations_convert_arrays_once(monkeypatch):
+    from PIL import Image
+
+    conversions = []
+    fromarray = Image.fromarray
+
+    def counting_fromarray(*args, **kwargs):
+        conversions.append(1)
+        return fromarray(*args, **kwargs)
+
+    monkeypatch.setattr(Image, "fromarray", counting_fromarray)
+
+    images = [[np.random.randint(0, 256, (40, 40, 3)).astype('uint8'), np.zeros((40, 40), dtype='uint8')]]
+
+    # Consecutive operations without a NumPy implementation share a single
+    # conversion of the image and its mask.
+    p = Augmentor.DataPipeline(images)
+    p.rotate(probability=1, max_left_rotation=5, max_right_rotation=5)
+    p.shear(probability=1, max_shear_left=5, max_shear_right=5)
+    p.zoom(probability=1, min_factor=1.1, max_factor=1.2)
+    p.resize(probability=1, width=30, height=30)
+
+    image, mask = p.sample(1)[0]
+    assert image.shape == (30, 30, 3)
+    assert mask.shape == (30, 30)
+    assert len(conversions) == 2
+
+    # The conversion is repeated after an operation with a NumPy
+    # implementation.
+    del conversions[:]
+    p.flip_left_right(probability=1)
+    p.rotate(probability=1, max_left_rotation=5, max_right_rotation=5)
+    p.sample(1)
+    assert len(conversions) == 4
+
+    # Likewise for batches, once per image.
+    del conversions[:]
+    p = Augmentor.Pipeline()
+    p.rotate(probability=1, max_left_rotation=5, max_right_rotation=5)
+    p.zoom(probability=1, min_factor=1.1, max_factor=1.2)
+    batch = p._apply_operations_batch(np.random.randint(0, 256, (6, 28, 28, 3)).astype('uint8'))
+    assert batch.shape == (6, 28, 28, 3)
+    assert len(conversions) == 6
+
+
+def test_batch_operations_match_single_images():
+    for shape in [(12, 30, 40, 3), (12, 30, 40)]:
+        batch = np.random.randint(0, 256, shape).astype('uint8')
+
+        for operation in [Operations.RandomBrightness(1, 0.5, 1.5),
+                          Operations.RandomColor(1, 0.5, 1.5),
+                          Operations.RandomContrast(1, 0.5, 1.5),
+                          Operations.Invert(1)]:
+            selected = np.arange(len(batch)) % 3 != 0
+
+            for seed in range(5):
+                np.random.seed(seed)
+                result = operation.perform_operation_batch(batch, selected)
+                np.random.seed(seed)
+                factors = np.random.uniform(getattr(operation, "min_factor", 0), getattr(operation, "max_factor", 1),
+                                            len(batch)).astype(np.float32)
+
+                assert result.shape == batch.shape
+                for i in range(len(batch)):
+                    if not selected[i]:
+                        assert np.array_equal(result[i], batch[i])
+                        continue
+                    if hasattr(operation, "min_factor"):
+                        single = type(operation)(1, factors[i], factors[i])
+                    else:
+                        single = operation
+                    expected = Operations.Operation.perform_operation_array(single, [batch[i]])[0]
+                    assert np.array_equal(result[i], expected)
+
+        for operation in [Operations.Greyscale(1), Operations.BlackAndWhite(1, 100)]:
+            result = operation.perform_operation_batch(batch, np.ones(len(batch), dtype=bool))
+            assert result.shape == batch.shape[:3]
+
+
+def test_keras_generator_from_array_batches():
+    images = np.random.randint(0, 256, (20, 28, 28, 3)).astype('uint8')
+    labels = np.arange(20)
+
+    p = Augmentor.Pipeline()
+    p.random_brightness(probability=1, min_factor=0.5, max_factor=1.5)
+    p.random_contrast(probability=0.5, min_factor=0.5, max_factor=1.5)
+    p.flip_left_right(probability=0.5)
+
+    X, y = next(p.keras_generator_from_array(images, labels, batch_size=8))
+    assert X.shape == (8, 28, 28, 3)
+    assert X.dtype == np.float32
+    assert len(y) == 8
+
+    X, y = next(p.keras_generator_from_array(images[..., 0], labels, batch_size=8, image_data_format="channels_first",
+                                             scaled=False))
+    assert X.shape == (8, 1, 28, 28)
+
+
+def test_keras_generator_from_array_set_seed():
+    images = np.random.randint(0, 256, (20, 28, 28, 3)).astype('uint8')
+    labels = np.arange(20)
+
+    p = Augmentor.Pipeline()
+    p.flip_left_right(probability=0.5)
+    p.flip_top_bottom(probability=0.5)
+    p.invert(probability=0.5)
+
+    batches = []
+    for _ in range(2):
+        p.set_seed(7)
+        batches.append(next(p.keras_generator_from_array(images, labels, batch_size=16)))
+
+    assert np.array_equal(batches[0][0], batches[1][0])
+    assert np.array_equal(batches[0][1], batches[1][1])
@@ -0,0 +1,88 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import Augmentor
+import asyncio
+import tempfile
+import shutil
+import glob
+from PIL import Image
+
+import pytest
+
+
+def test_aiter_batches():
+    tmpdir = tempfile.mkdtemp()
+
+    n = 10
+    tmpfiles = []
+    for i in range(n):
+        tmpfiles.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im = Image.new('RGB', (120, 80))
+        im.save(tmpfiles[i].name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=4)
+    p.resize(probability=1, width=60, height=40)
+    p.flip_left_right(probability=0.5)
+
+    async def consume(number_of_batches, save_to_disk):
+        batches = []
+        async for images, labels in p.aiter_batches(batch_size=6, prefetch=3, save_to_disk=save_to_disk):
+            batches.append((images, labels))
+            if len(batches) == number_of_batches:
+                break
+        return batches
+
+    batches = asyncio.run(consume(4, False))
+
+    assert len(batches) == 4
+    for images, labels in batches:
+        assert len(images) == len(labels) == 6
+        for im in images:
+            assert im.size == (60, 40)
+
+    assert len(glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))) == 0
+
+    batches = asyncio.run(consume(1, True))
+    assert len(batches) == 1
+
+    # Batches in flight when the generator is closed may also have been
+    # written, but at least the batch that was consumed must have been.
+    assert len(glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))) >= 6
+
+    p.close()
+
+    for t in tmpfiles:
+        t.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_aiter_batches_cancellation():
+    tmpdir = tempfile.mkdtemp()
+
+    tmpfile = tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG')
+    Image.new('RGB', (120, 80)).save(tmpfile.name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=2)
+    p.rotate(probability=1, max_left_rotation=5, max_right_rotation=5)
+
+    async def consume_forever():
+        async for _ in p.aiter_batches(batch_size=4):
+            await asyncio.sleep(0)
+
+    async def cancel_consumer():
+        task = asyncio.ensure_future(consume_forever())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_consumer())
+
+    p.close()
+    tmpfile.close()
+    shutil.rmtree(tmpdir)
@@ -171,3 +171,40 @@ def test_sample_with_masks():
     # not delete itself after closing automatically
     shutil.rmtree(tmpdir)
     shutil.rmtree(mask_tmpdir)
+
+
+def test_multi_threaded_generator_labels_match_images():
+    width = 40
+    height = 40
+
+    # Each image and mask is filled with its own label, so that we can check
+    # that the labels returned still belong to their images.
+    num_of_images = 20
+    images = [[np.full((width, height, 3), i, dtype=np.uint8), np.full((width, height), i, dtype=np.uint8)]
+              for i in range(num_of_images)]
+    y = list(range(num_of_images))
+
+    p = Augmentor.DataPipeline(images, y, workers=2)
+    p.flip_left_right(probability=0.5)
+    p.rotate90(probability=0.5)
+
+    for ordered in [True, False]:
+        g = p.generator(batch_size=16, ordered=ordered)
+        for _ in range(3):
+            batch, labels = next(g)
+            assert len(batch) == len(labels) == 16
+            for im_list, label in zip(batch, labels):
+                assert len(im_list) == 2
+                for im in im_list:
+                    assert np.all(im == label)
+
+    augmented_images, augmented_labels = p.sample(50, ordered=False)
+    assert len(augmented_images) == len(augmented_labels) == 50
+    assert p._get_executor()._max_workers == 2
+    for im_list, label in zip(augmented_images, augmented_labels):
+        assert np.all(im_list[0] == label)
+
+    augmented_images, augmented_labels = p.sample(10, multi_threaded=False)
+    assert len(augmented_images) == len(augmented_labels) == 10
+
+    p.close()
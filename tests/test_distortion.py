@@ -40,3 +40,22 @@ def test_in_memory_distortions():
     tmp_bw.close()
     shutil.rmtree(tmpdir)
     shutil.rmtree(tmpdir_bw)
+
+
+def test_distortion_ground_truth():
+    import numpy as np
+
+    image = Image.fromarray(np.random.randint(0, 256, (120, 90, 3), dtype=np.uint8))
+
+    d = Operations.Distort(probability=1, grid_width=5, grid_height=3, magnitude=6)
+
+    # The image and its ground truth must be distorted in the same way.
+    augmented_images = d.perform_operation([image, image.copy()])
+    assert np.array_equal(np.asarray(augmented_images[0]), np.asarray(augmented_images[1]))
+
+    # The grid is computed once for each image size.
+    assert Operations._grid((90, 120), 5, 3) is Operations._grid((90, 120), 5, 3)
+    dimensions, vertices = Operations._grid((90, 120), 5, 3)
+    assert len(dimensions) == 15
+    assert dimensions[-1] == (72, 80, 90, 120)
+    assert vertices.shape == (4, 6, 2)
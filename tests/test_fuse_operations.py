@@ -0,0 +1,172 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import random
+import numpy as np
+from PIL import Image
+
+import Augmentor
+from Augmentor import Operations
+from Augmentor.Pipeline import _apply_tables
+
+
+def gradient_image(width=120, height=80):
+    y, x = np.mgrid[0:height, 0:width]
+    return np.stack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)], -1).astype('uint8')
+
+
+def test_warps_match_operations():
+    image = Image.fromarray(gradient_image())
+
+    operations = [Operations.Flip(1, "RANDOM"),
+                  Operations.Rotate(1, -1),
+                  Operations.RotateRange(1, 10, 10),
+                  Operations.Shear(1, 10, 10),
+                  Operations.Zoom(1, 1.1, 1.5),
+                  Operations.ZoomRandom(1, 0.7, True),
+                  Operations.Scale(1, 1.5),
+                  Operations.Resize(1, 90, 70, "BICUBIC")]
+
+    for operation in operations:
+        for seed in range(3):
+            random.seed(seed)
+            expected = operation.perform_operation([image])[0]
+
+            random.seed(seed)
+            size, matrix = operation.get_warp(image.size)
+            warped = image.transform(size, Image.AFFINE, tuple(matrix[:2].ravel()), resample=Image.BICUBIC)
+
+            assert warped.size == expected.size
+            difference = np.abs(np.asarray(warped, dtype=float) - np.asarray(expected, dtype=float))
+            # Borders differ as the operations resample several times.
+            assert difference[3:-3, 3:-3].mean() < 2
+
+    assert Operations.Greyscale(1).get_warp(image.size) is None
+    assert Operations.Resize(1, 90, 70, "NEAREST").get_warp(image.size) is None
+
+
+def test_fused_pipeline():
+    image = gradient_image()
+    mask = np.zeros(image.shape[:2], dtype='uint8')
+    mask[20:40, 30:60] = 255
+
+    p = Augmentor.DataPipeline([[image, mask]])
+    p.flip_left_right(probability=1)
+    p.rotate90(probability=1)
+    p.greyscale(probability=1)
+    p.zoom(probability=1, min_factor=1.2, max_factor=1.2)
+    p.resize(probability=1, width=100, height=60)
+
+    expected = p.sample(1)[0]
+
+    transforms = []
+    original_transform = Image.Image.transform
+
+    def counting_transform(self, *args, **kwargs):
+        transforms.append(args[0])
+        return original_transform(self, *args, **kwargs)
+
+    p.set_fuse_operations(True)
+    Image.Image.transform = counting_transform
+    try:
+        fused = p.sample(1)[0]
+    finally:
+        Image.Image.transform = original_transform
+
+    # The flip and rotation, and the zoom and resize, are each combined into
+    # a single warp, for both the image and its mask.
+    assert len(transforms) == 4
+
+    for fused_image, expected_image in zip(fused, expected):
+        assert fused_image.shape == expected_image.shape
+        difference = np.abs(fused_image.astype(float) - expected_image.astype(float))
+        assert difference[3:-3, 3:-3].mean() < 4
+
+
+def test_fused_point_operations():
+    image = Image.fromarray(gradient_image())
+
+    for mode in ["L", "RGB"]:
+        images = [image.convert(mode), image.convert("L").rotate(90)]
+
+        p = Augmentor.Pipeline()
+        p.invert(probability=1)
+        p.random_brightness(probability=1, min_factor=0.5, max_factor=1.5)
+        p.random_contrast(probability=1, min_factor=0.5, max_factor=1.5)
+        p.flip_left_right(probability=1)
+        p.random_contrast(probability=1, min_factor=0.5, max_factor=1.5)
+        p.black_and_white(probability=1)
+
+        random.seed(1)
+        np.random.seed(1)
+        expected = p._apply_operations(images)
+
+        points = []
+        original_point = Image.Image.point
+
+        def counting_point(self, *args, **kwargs):
+            points.append(args[0])
+            return original_point(self, *args, **kwargs)
+
+        p.set_fuse_operations(True)
+        Image.Image.point = counting_point
+        try:
+            random.seed(1)
+            np.random.seed(1)
+            fused = p._apply_operations(images)
+        finally:
+            Image.Image.point = original_point
+
+        # The lookup tables give identical results. The inversion,
+        # brightness and contrast are combined into a single pass, followed
+        # by the contrast after the flip and the threshold, for each image.
+        assert len(points) == 6
+        for fused_image, expected_image in zip(fused, expected):
+            assert fused_image.mode == expected_image.mode
+            assert np.array_equal(np.asarray(fused_image), np.asarray(expected_image))
+
+
+def test_lookup_tables_match_operations():
+    for seed in range(20):
+        np.random.seed(seed)
+        image = Image.fromarray(np.random.randint(0, 256, (30, 40, 3)).astype('uint8'))
+
+        for operation in [Operations.RandomBrightness(1, 0.5, 1.5),
+                          Operations.RandomContrast(1, 0.5, 3)]:
+            for mode in ["L", "RGB"]:
+                images = [image.convert(mode)]
+
+                np.random.seed(seed)
+                expected = operation.perform_operation(images)[0]
+                np.random.seed(seed)
+                table = operation.get_lut(images, None)[0]
+
+                assert np.array_equal(np.asarray(_apply_tables(images, [table])[0]), np.asarray(expected))
+
+
+def test_fused_warp_before_point_operation():
+    image = Image.fromarray(gradient_image(100, 40))
+
+    p = Augmentor.Pipeline()
+    p.add_operation(Operations.Rotate(1, -1))
+    p.add_operation(Operations.Invert(1))
+    p.add_operation(Operations.Zoom(1, 1.1, 1.5))
+    p.add_operation(Operations.Flip(1, "LEFT_RIGHT"))
+
+    for seed in range(20):
+        p.set_fuse_operations(False)
+        random.seed(seed)
+        expected = p._apply_operations([image])[0]
+
+        p.set_fuse_operations(True)
+        random.seed(seed)
+        fused = p._apply_operations([image])[0]
+
+        # The rotation is applied before the inversion as drawn by its warp,
+        # so later warps are built for the right size.
+        assert fused.size == expected.size
+        difference = np.abs(np.asarray(fused, dtype=float) - np.asarray(expected, dtype=float))
+        assert difference[3:-3, 3:-3].mean() < 4
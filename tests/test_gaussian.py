@@ -22,3 +22,18 @@ def test_add_gaussian_to_pipeline():
     p.gaussian_distortion(1, 8, 8, 8, "true", "true")
 
     assert p is not None
+
+
+def test_gaussian_distortion_ground_truth():
+    import numpy as np
+    from PIL import Image
+
+    image = Image.fromarray(np.random.randint(0, 256, (100, 80, 3), dtype=np.uint8))
+
+    for corner in ["bell", "ul", "ur", "dl", "dr"]:
+        for method in ["in", "out"]:
+            g = Operations.GaussianDistortion(1, 6, 4, 8, corner, method, 0.5, 0.5, 0.05, 0.05)
+            augmented_images = g.perform_operation([image, image.copy()])
+
+            assert augmented_images[0].size == image.size
+            assert np.array_equal(np.asarray(augmented_images[0]), np.asarray(augmented_images[1]))
@@ -303,3 +303,128 @@ def test_generator_image_scan():
 
     shutil.rmtree(os.path.join(initial_temp_directory, output_directory))
     shutil.rmtree(initial_temp_directory)
+
+
+def test_keras_generators_with_prefetch():
+
+    batch_size = 8
+    width = 80
+    height = 80
+
+    tmpdir = tempfile.mkdtemp()
+    tmps = []
+
+    for i in range(10):
+        tmps.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im = Image.new('RGB', (width, height))
+        im.save(tmps[i].name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=2)
+    p.rotate(probability=0.5, max_left_rotation=5, max_right_rotation=5)
+    p.flip_left_right(probability=0.5)
+
+    for backend in ["thread", "process"]:
+        g = p.keras_generator(batch_size=batch_size, prefetch=3, backend=backend)
+
+        for i in range(5):
+            X, y = next(g)
+            assert np.shape(X) == (batch_size, width, height, 3)
+            assert len(y) == batch_size
+            assert 0 <= p.prefetch_queue_depth <= 3
+
+        g.close()
+
+    # The process backend follows set_seed().
+    gradients = np.tile(np.arange(width, dtype='uint8'), (20, height, 1))
+    batches = []
+    for seed in [11, 11, 12]:
+        Augmentor.Pipeline.set_seed(seed)
+        g = p.keras_generator_from_array(gradients, np.arange(20), batch_size=batch_size, scaled=False, prefetch=2,
+                                         backend="process")
+        batches.append(np.concatenate([next(g)[0] for _ in range(3)]))
+        g.close()
+    assert np.array_equal(batches[0], batches[1])
+    assert not np.array_equal(batches[0], batches[2])
+
+    # Sampling with different settings does not disturb a running generator.
+    g = p.keras_generator(batch_size=2, prefetch=2)
+    next(g)
+    p.sample(2, workers=1)
+    X, y = next(g)
+    assert len(X) == 2
+    g.close()
+
+    image_matrix = np.zeros((20, width, height), dtype='uint8')
+    labels = np.arange(20)
+
+    g2 = p.keras_generator_from_array(image_matrix, labels, batch_size=batch_size, scaled=False,
+                                      image_data_format="channels_first", prefetch=2)
+
+    for i in range(5):
+        X2, y2 = next(g2)
+        assert np.shape(X2) == (batch_size, 1, width, height)
+        assert len(y2) == batch_size
+
+    g2.close()
+    p.close()
+
+    for i in range(len(tmps)):
+        tmps[i].close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_keras_generators_with_shared_memory():
+
+    batch_size = 4
+    width = 60
+    height = 40
+
+    tmpdir = tempfile.mkdtemp()
+    tmps = []
+
+    for i in range(5):
+        tmps.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.PNG'))
+        im = Image.new('RGB', (width, height), color=(255, 255, 255))
+        im.save(tmps[i].name, 'PNG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=2)
+    p.flip_left_right(probability=0.5)
+
+    g = p.keras_generator(batch_size=batch_size, prefetch=2, backend="process", shared_memory=True)
+
+    for i in range(6):
+        X, y = next(g)
+        # Arrays are in the form (height, width, channels).
+        assert np.shape(X) == (batch_size, height, width, 3)
+        assert X.dtype == np.float32
+        assert np.all(X == 1.0)
+        assert len(y) == batch_size
+
+    g.close()
+
+    image_matrix = np.full((10, width, height), 7, dtype='uint8')
+    labels = np.arange(10)
+
+    g2 = p.keras_generator_from_array(image_matrix, labels, batch_size=batch_size, scaled=False, prefetch=2,
+                                      backend="process", shared_memory=True)
+
+    for i in range(6):
+        X2, y2 = next(g2)
+        assert np.shape(X2) == (batch_size, width, height, 1)
+        assert X2.dtype == np.uint8
+        assert np.all(X2 == 7)
+
+    g2.close()
+    p.close()
+
+    try:
+        next(p.keras_generator(batch_size=batch_size, shared_memory=True))
+        assert False
+    except ValueError:
+        pass
+
+    for i in range(len(tmps)):
+        tmps[i].close()
+
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,148 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import Augmentor
+import tempfile
+import shutil
+import pickle
+import glob
+import pytest
+import numpy as np
+from PIL import Image
+from Augmentor.ImageUtilities import ImageCache, _restore_image_cache
+
+
+def test_image_cache_eviction():
+    tmpdir = tempfile.mkdtemp()
+
+    paths = []
+    for i in range(3):
+        paths.append(os.path.join(tmpdir, "%s.png" % i))
+        Image.fromarray(np.full((10, 10, 3), i, dtype=np.uint8)).save(paths[i])
+
+    # Room for two 10x10 RGB images.
+    cache = ImageCache(max_bytes=600)
+
+    image = cache.open(paths[0])
+    assert np.array_equal(np.asarray(image), np.full((10, 10, 3), 0, dtype=np.uint8))
+
+    # Returned images are copies, which operations may modify.
+    image.paste(255, (0, 0, 10, 10))
+    assert np.array_equal(np.asarray(cache.open(paths[0])), np.full((10, 10, 3), 0, dtype=np.uint8))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.open(paths[1])
+    cache.open(paths[0])
+    cache.open(paths[2])
+
+    # The least recently used image was evicted.
+    assert len(cache) == 2
+    assert cache.current_bytes == 600
+    cache.open(paths[0])
+    assert (cache.hits, cache.misses) == (3, 3)
+    cache.open(paths[1])
+    assert (cache.hits, cache.misses) == (3, 4)
+
+    # Unpickling in the same process returns the same cache. Other
+    # processes start from an empty cache with the same identifier.
+    assert pickle.loads(pickle.dumps(cache)) is cache
+    restored = _restore_image_cache("unknown", 600)
+    assert len(restored) == 0 and restored.max_bytes == 600
+    assert _restore_image_cache("unknown", 600) is restored
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses, cache.current_bytes) == (0, 0, 0)
+
+    shutil.rmtree(tmpdir)
+
+
+def test_pipeline_image_cache():
+    tmpdir = tempfile.mkdtemp()
+
+    for i in range(5):
+        Image.new('RGB', (64, 48)).save(os.path.join(tmpdir, "%s.png" % i))
+
+    p = Augmentor.Pipeline(tmpdir)
+    p.random_erasing(probability=1, rectangle_area=0.5)
+
+    with pytest.raises(ValueError):
+        p.set_image_cache(0)
+
+    p.set_image_cache(10 * 1024 * 1024)
+    p.sample(50, multi_threaded=True)
+
+    assert len(glob.glob(os.path.join(tmpdir, "output", "*.png"))) == 50
+    assert p.image_cache.misses >= 5
+    assert p.image_cache.hits + p.image_cache.misses == 50
+
+    # Random erasing paints onto the images it is given, but the cached
+    # images are not modified.
+    for image_path in glob.glob(os.path.join(tmpdir, "*.png")):
+        assert np.asarray(p.image_cache.open(image_path)).max() == 0
+
+    p.set_image_cache(None)
+    assert p.image_cache is None
+
+    # Worker processes keep their cache from one chunk to the next, and
+    # their hits and misses are counted by this process's cache.
+    p.set_image_cache(10 * 1024 * 1024)
+    p.sample(50, backend="process", workers=2, max_in_flight=1)
+    assert len(glob.glob(os.path.join(tmpdir, "output", "*.png"))) == 100
+    assert 5 <= p.image_cache.misses <= 10
+    assert p.image_cache.hits + p.image_cache.misses == 50
+    p.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_build_cache():
+    tmpdir = tempfile.mkdtemp()
+    cachedir = tempfile.mkdtemp()
+
+    modes = ["L", "RGB", "RGBA", "P"]
+    for i, mode in enumerate(modes):
+        Image.new(mode, (32 + i, 24), color=i + 1).save(os.path.join(tmpdir, "%s.png" % i))
+
+    p = Augmentor.Pipeline(tmpdir)
+    p.build_cache(cachedir)
+
+    assert len(p.dataset_cache) == len(modes)
+    assert os.path.exists(os.path.join(cachedir, "data.npy"))
+
+    for i, mode in enumerate(modes):
+        image_path = os.path.join(tmpdir, "%s.png" % i)
+        image = p._open_image(image_path)
+        assert image.mode == mode
+        assert np.array_equal(np.asarray(image), np.asarray(Image.open(image_path)))
+
+    # Palette images are read from their original files.
+    assert p.dataset_cache.open(os.path.join(tmpdir, "3.png")) is None
+
+    # Images read from the store can be modified by operations.
+    p.random_erasing(probability=1, rectangle_area=0.5)
+    p.sample(8, multi_threaded=False)
+    assert len(glob.glob(os.path.join(tmpdir, "output", "*.png"))) == 8
+    assert np.asarray(p._open_image(os.path.join(tmpdir, "0.png"))).max() == 1
+
+    # The store is reused by later pipelines, and survives pickling.
+    data_mtime = os.stat(os.path.join(cachedir, "data.npy")).st_mtime
+    q = Augmentor.Pipeline(tmpdir)
+    q.build_cache(cachedir)
+    assert os.stat(os.path.join(cachedir, "data.npy")).st_mtime == data_mtime
+    q = pickle.loads(pickle.dumps(q))
+    assert np.asarray(q._open_image(os.path.join(tmpdir, "1.png"))).max() == 2
+
+    # Changed images invalidate the store, which is rebuilt.
+    Image.new("L", (40, 30), color=9).save(os.path.join(tmpdir, "0.png"))
+    q = Augmentor.Pipeline(tmpdir)
+    q.build_cache(cachedir)
+    image = q._open_image(os.path.join(tmpdir, "0.png"))
+    assert image.size == (40, 30)
+    assert np.asarray(image).max() == 9
+
+    shutil.rmtree(tmpdir)
+    shutil.rmtree(cachedir)
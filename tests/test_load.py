@@ -307,3 +307,43 @@ def test_class_image_scan():
 
     shutil.rmtree(os.path.join(initial_temp_directory, output_directory))
     shutil.rmtree(initial_temp_directory)
+
+
+def test_scan_directory_extensions_and_recursion():
+
+    tmpdir = tempfile.mkdtemp()
+    sub_directory = os.path.join(tmpdir, "nested")
+    os.mkdir(sub_directory)
+
+    im = Image.new('RGB', (10, 10))
+    for file_name in ["b.png", "a.JPG", "c.Tiff", "d.JpEg"]:
+        im.save(os.path.join(tmpdir, file_name), 'PNG')
+    im.save(os.path.join(sub_directory, "e.png"), 'PNG')
+    im.save(os.path.join(tmpdir, ".hidden.png"), 'PNG')
+
+    with open(os.path.join(tmpdir, "notes.txt"), "w") as f:
+        f.write("not an image")
+
+    # A directory with an image extension is not an image.
+    os.mkdir(os.path.join(tmpdir, "folder.png"))
+
+    found = ImageUtilities.scan_directory(tmpdir)
+    assert found == [os.path.join(tmpdir, x) for x in ["a.JPG", "b.png", "c.Tiff", "d.JpEg"]]
+
+    found = ImageUtilities.scan_directory(tmpdir, recursive=True)
+    assert len(found) == 5
+    assert os.path.join(sub_directory, "e.png") in found
+    assert found == sorted(found)
+
+    # The recursive scan applies within each class directory.
+    augmentor_images, class_labels = ImageUtilities.scan(tmpdir, os.path.join(tmpdir, "output"), recursive=True)
+    assert [label for label, _ in class_labels] == ["folder.png", "nested"]
+    assert len(augmentor_images) == 1
+
+    # And is available when creating a pipeline.
+    os.mkdir(os.path.join(sub_directory, "deeper"))
+    im.save(os.path.join(sub_directory, "deeper", "f.png"), 'PNG')
+    assert len(Augmentor.Pipeline(tmpdir).augmentor_images) == 1
+    assert len(Augmentor.Pipeline(tmpdir, recursive=True).augmentor_images) == 2
+
+    shutil.rmtree(tmpdir)
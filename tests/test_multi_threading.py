@@ -11,6 +11,8 @@ import shutil
 from PIL import Image
 from Augmentor import Operations
 import glob
+import random
+import numpy as np
 
 original_dimensions = (640, 480)
 larger_dimensions = (1200, 1000)
@@ -112,3 +114,310 @@ def test_multi_threading_override():
         t.close()
 
     shutil.rmtree(tmpdir)
+
+
+def test_process_backend():
+
+    tmpdir = tempfile.mkdtemp()
+
+    n = 20
+    tmpfiles = []
+    # Identical source images, so that differences in the output are caused by the augmentation alone.
+    im = Image.fromarray(np.uint8(np.random.rand(original_dimensions[1], original_dimensions[0], 3) * 255))
+    for i in range(n):
+        tmpfiles.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im.save(tmpfiles[i].name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir)
+    assert len(p.augmentor_images) == n
+
+    p.resize(probability=1, width=larger_dimensions[0], height=larger_dimensions[1])
+    p.rotate(probability=1, max_left_rotation=5, max_right_rotation=5)
+
+    # The default start method differs between platforms, so test both.
+    p.sample(n, backend="process", workers=2, start_method="fork")
+    p.sample(n, backend="process", workers=2, start_method="spawn")
+
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == 2 * n
+
+    for im_path in generated_images:
+        im_g = Image.open(im_path)
+        assert im_g.size == larger_dimensions
+
+    # Augmentations must be random in every worker process.
+    outputs = set()
+    for im_path in generated_images:
+        outputs.add(Image.open(im_path).tobytes())
+    assert len(outputs) > 1
+
+    # Choosing a start method requires Python 3.7.
+    version_info = sys.version_info
+    sys.version_info = (3, 6)
+    try:
+        p.sample(n, backend="process", workers=3, start_method="spawn")
+        assert False
+    except ValueError:
+        pass
+    finally:
+        sys.version_info = version_info
+
+    p.close()
+
+    # Clean up
+    for t in tmpfiles:
+        t.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_persistent_worker_pool():
+
+    tmpdir = tempfile.mkdtemp()
+
+    n = 10
+    tmpfiles = []
+    for i in range(n):
+        tmpfiles.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im = Image.new('RGB', original_dimensions)
+        im.save(tmpfiles[i].name, 'JPEG')
+
+    with Augmentor.Pipeline(tmpdir, workers=2) as p:
+        p.resize(probability=1, width=smaller_dimensions[0], height=smaller_dimensions[1])
+
+        p.sample(n)
+        executor = p._get_executor()
+        assert len(p._executors) == 1
+
+        # The same pool is reused by later calls and by the generators.
+        p.sample(n)
+        p.process()
+        next(p.generator_threading_tests(batch_size=5))
+        assert p._get_executor() is executor
+        assert len(p._executors) == 1
+
+        # Different settings get a pool of their own.
+        assert p._get_executor(workers=1) is not executor
+        assert p._get_executor() is executor
+
+    assert p._executors == {}
+
+    # generator_threading_tests() also saves its batch to disk.
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == 3 * n + 5
+
+    # Clean up
+    for t in tmpfiles:
+        t.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_bounded_in_flight_window():
+    from concurrent.futures import ThreadPoolExecutor
+    from Augmentor.Pipeline import _bounded_map
+
+    drawn = []
+    completed = []
+    max_outstanding = [0]
+
+    def items():
+        for i in range(1000):
+            drawn.append(i)
+            max_outstanding[0] = max(max_outstanding[0], len(drawn) - len(completed))
+            yield i
+
+    def square(x):
+        return x * x
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = []
+        for result in _bounded_map(executor, square, items(), max_in_flight=8):
+            completed.append(result)
+            results.append(result)
+
+    assert sorted(results) == [i * i for i in range(1000)]
+    # One more item than the window may be drawn before a slot becomes free.
+    assert max_outstanding[0] <= 8 + 1
+
+
+def test_sample_with_max_in_flight():
+
+    tmpdir = tempfile.mkdtemp()
+
+    n = 5
+    tmpfiles = []
+    for i in range(n):
+        tmpfiles.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im = Image.new('RGB', smaller_dimensions)
+        im.save(tmpfiles[i].name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=2)
+    p.flip_left_right(probability=1)
+    p.sample(50, max_in_flight=3)
+    p.sample(50, backend="process", max_in_flight=2)
+    p.close()
+
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == 100
+
+    # Clean up
+    for t in tmpfiles:
+        t.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_largest_first_schedule():
+
+    tmpdir = tempfile.mkdtemp()
+
+    sizes = [(20, 20), (200, 100), (50, 50), (120, 120)]
+    tmpfiles = []
+    for i, size in enumerate(sizes):
+        tmpfiles.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im = Image.new('RGB', size)
+        im.save(tmpfiles[i].name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=2)
+    p.flip_left_right(probability=1)
+
+    scheduled = [a.image_size for a in p._largest_first(p.augmentor_images)]
+    assert scheduled == sorted(sizes, key=lambda s: s[0] * s[1], reverse=True)
+
+    scheduled = [a.image_size for a in p._largest_first(p.augmentor_images, 40)]
+    assert len(scheduled) == 40
+    assert [s[0] * s[1] for s in scheduled] == sorted([s[0] * s[1] for s in scheduled], reverse=True)
+
+    # The draws follow set_seed().
+    Augmentor.Pipeline.set_seed(7)
+    first = [a.image_path for a in p._largest_first(p.augmentor_images, 40)]
+    Augmentor.Pipeline.set_seed(7)
+    assert [a.image_path for a in p._largest_first(p.augmentor_images, 40)] == first
+
+    p.sample(20, schedule="largest_first")
+    p.process(schedule="largest_first")
+    p.close()
+
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == 24
+
+    try:
+        p.sample(10, schedule="smallest_first")
+        assert False
+    except ValueError:
+        pass
+
+    # Clean up
+    for t in tmpfiles:
+        t.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_sharding():
+
+    tmpdir = tempfile.mkdtemp()
+
+    n = 7
+    tmpfiles = []
+    for i in range(n):
+        tmpfiles.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im = Image.new('RGB', smaller_dimensions)
+        im.save(tmpfiles[i].name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=2)
+    p.flip_left_right(probability=1)
+
+    # Every image belongs to exactly one shard, whatever the order the
+    # images were found in.
+    shards = [[a.image_path for a in p._shard(i, 3)] for i in range(3)]
+    assert sorted(sum(shards, [])) == sorted(a.image_path for a in p.augmentor_images)
+    random.shuffle(p.augmentor_images)
+    assert [[a.image_path for a in p._shard(i, 3)] for i in range(3)] == shards
+
+    for i in range(3):
+        p.sample(10, shard_index=i, num_shards=3)
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == 10
+
+    for i in range(3):
+        p.process(shard_index=i, num_shards=3)
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == 10 + n
+
+    # Shards seeded alike on different machines produce different samples.
+    for i in range(n):
+        noise = np.random.randint(0, 256, (smaller_dimensions[1], smaller_dimensions[0], 3)).astype('uint8')
+        Image.fromarray(noise).save(tmpfiles[i].name, 'JPEG')
+    p.rotate(probability=1, max_left_rotation=20, max_right_rotation=20)
+    outputs = []
+    for i in range(2):
+        existing = set(glob.glob(os.path.join(tmpdir, "output", "*.JPEG")))
+        Augmentor.Pipeline.set_seed(5)
+        p.sample(10, shard_index=i, num_shards=2)
+        new_images = set(glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))) - existing
+        outputs.append(sorted(np.asarray(Image.open(path)).tobytes() for path in new_images))
+    assert len(outputs[0]) + len(outputs[1]) == 10
+    assert outputs[0] != outputs[1]
+
+    for shard_index, num_shards in [(3, 3), (-1, 2), (0, 0)]:
+        try:
+            p.sample(10, shard_index=shard_index, num_shards=num_shards)
+            assert False
+        except ValueError:
+            pass
+
+    p.close()
+
+    # Clean up
+    for t in tmpfiles:
+        t.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_resumable_process():
+
+    tmpdir = tempfile.mkdtemp()
+
+    n = 6
+    tmpfiles = []
+    for i in range(n):
+        tmpfiles.append(tempfile.NamedTemporaryFile(dir=tmpdir, suffix='.JPEG'))
+        im = Image.new('RGB', smaller_dimensions)
+        im.save(tmpfiles[i].name, 'JPEG')
+
+    p = Augmentor.Pipeline(tmpdir, workers=2)
+    p.flip_left_right(probability=1)
+
+    # Simulate an interrupted run which processed the first shard only.
+    p.process(resume=True, shard_index=0, num_shards=2)
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == n // 2
+
+    with open(os.path.join(tmpdir, "output", ".augmentor_journal")) as journal:
+        assert len(journal.readlines()) == n // 2
+
+    p.process(resume=True, backend="process")
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))
+    assert len(generated_images) == n
+
+    # Names are deterministic, so processing again overwrites images.
+    os.remove(os.path.join(tmpdir, "output", ".augmentor_journal"))
+    p.process(resume=True)
+    assert sorted(glob.glob(os.path.join(tmpdir, "output", "*.JPEG"))) == sorted(generated_images)
+
+    try:
+        p.sample(10, resume=True)
+        assert False
+    except ValueError:
+        pass
+
+    p.close()
+
+    # Clean up
+    for t in tmpfiles:
+        t.close()
+
+    shutil.rmtree(tmpdir)
@@ -92,4 +92,47 @@ def test_random_brightness_in_memory():
     tmp.close()
     tmp_bw.close()
     shutil.rmtree(tmpdir)
-    shutil.rmtree(tmpdir_bw)
\ No newline at end of file
+    shutil.rmtree(tmpdir_bw)
+
+def test_hsv_shift():
+    import numpy as np
+    import pytest
+    import Augmentor
+
+    image = Image.fromarray(np.random.randint(0, 256, (60, 80, 3), dtype=np.uint8))
+    mask = Image.fromarray(np.random.randint(0, 256, (60, 80), dtype=np.uint8))
+
+    op = Operations.HSVShifting(1, 0.1, 0.2, 0.1, 0.2, 0.1)
+    shifted = op.perform_operation([image, mask])
+
+    assert shifted[0].mode == "RGB"
+    assert shifted[0].size == image.size
+    assert shifted[1] is mask
+
+    # Without any shift or scale, only the conversion to HSV and back
+    # changes the image.
+    op = Operations.HSVShifting(1, 0, 0, 0, 0, 0)
+    expected = image.convert("HSV").convert("RGB")
+    assert np.array_equal(np.asarray(op.perform_operation([image])[0]), np.asarray(expected))
+
+    # Hues wrap around.
+    op = Operations.HSVShifting(1, 1, 0, 0, 0, 0)
+    np.random.seed(0)
+    hue_shift = np.random.uniform(-1, 1)
+    np.random.seed(0)
+    shifted = np.asarray(op.perform_operation([image])[0].convert("HSV")).astype(int)
+    hsv = np.asarray(image.convert("HSV")).astype(int)
+    hue_difference = (shifted[..., 0] - hsv[..., 0]) % 256
+    # Converting to HSV and back may move a hue by one step.
+    assert abs((np.median(hue_difference) - int(round(hue_shift * 255)) + 128) % 256 - 128) <= 1
+
+    p = Augmentor.Pipeline()
+    p.hsv_shift(probability=1, hue_shift=0.1, value_scale=0.5)
+    assert isinstance(p.operations[0], Operations.HSVShifting)
+
+    with pytest.raises(ValueError):
+        p.hsv_shift(probability=1, hue_shift=1.5)
+    with pytest.raises(ValueError):
+        p.hsv_shift(probability=1, saturation_scale=-1)
+    with pytest.raises(ValueError):
+        p.hsv_shift(probability=1, value_shift=2)
@@ -53,3 +53,25 @@ def test_rotate_images_custom_temp_files():
 
     tmp.close()
     shutil.rmtree(tmpdir)
+
+
+def test_rotate_range_single_pass():
+    import numpy as np
+    from PIL import ImageFilter
+
+    im = Image.fromarray(np.random.randint(0, 256, (150, 200, 3), dtype=np.uint8)).filter(ImageFilter.GaussianBlur(3))
+
+    r = Operations.RotateRange(probability=1, max_left_rotation=20, max_right_rotation=20)
+
+    for rotation in [-17, -3, 0, 5, 19]:
+        r._random_rotation = lambda: rotation
+        im_r = r.perform_operation([im, im.copy()])
+
+        assert im_r[0].size == im.size
+        assert np.array_equal(np.asarray(im_r[0]), np.asarray(im_r[1]))
+
+        # Matches rotating, cropping and resizing in separate steps.
+        rotated = im.rotate(rotation, expand=True, resample=Image.BICUBIC)
+        expected = rotated.crop(r._crop_box(rotation, rotated.size)).resize(im.size, resample=Image.BICUBIC)
+        difference = np.abs(np.asarray(expected, dtype=np.int16) - np.asarray(im_r[0], dtype=np.int16))
+        assert difference[5:-5, 5:-5].mean() < 1
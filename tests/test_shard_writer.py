@@ -0,0 +1,119 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import Augmentor
+import tempfile
+import shutil
+import tarfile
+import json
+import glob
+import io
+import pytest
+from PIL import Image
+from Augmentor.ShardWriter import ShardWriter
+
+
+def test_shard_writer_rolls_over():
+    tmpdir = tempfile.mkdtemp()
+
+    writer = ShardWriter(tmpdir, max_count=3, max_bytes=100)
+    for i in range(5):
+        writer.write("sample%s" % i, [("txt", b"x" * 10), ("json", b"{}")])
+    # Larger than max_bytes, so written to a shard of its own.
+    writer.write("large", [("txt", b"x" * 200)])
+    writer.close()
+
+    shards = sorted(glob.glob(os.path.join(tmpdir, "*.tar")))
+    assert [os.path.basename(shard) for shard in shards] == ["shard-000000.tar", "shard-000001.tar",
+                                                             "shard-000002.tar"]
+
+    with tarfile.open(shards[0]) as tar:
+        assert tar.getnames() == ["sample0.txt", "sample0.json", "sample1.txt", "sample1.json",
+                                  "sample2.txt", "sample2.json"]
+
+    with tarfile.open(shards[2]) as tar:
+        assert tar.getnames() == ["large.txt"]
+
+    # Existing shards are not overwritten.
+    writer = ShardWriter(tmpdir)
+    writer.write("sample", [("txt", b"x")])
+    writer.close()
+    assert os.path.exists(os.path.join(tmpdir, "shard-000003.tar"))
+
+    # A shard created by another writer in the meantime is skipped.
+    writer = ShardWriter(tmpdir)
+    open(os.path.join(tmpdir, "shard-000004.tar"), "wb").close()
+    writer.write("sample", [("txt", b"x")])
+    writer.close()
+    assert os.path.getsize(os.path.join(tmpdir, "shard-000004.tar")) == 0
+    assert os.path.exists(os.path.join(tmpdir, "shard-000005.tar"))
+
+    # Writers with other names number their shards separately.
+    writer = ShardWriter(tmpdir, name="shard-1")
+    writer.write("sample", [("txt", b"x")])
+    writer.close()
+    assert os.path.exists(os.path.join(tmpdir, "shard-1-000000.tar"))
+
+    shutil.rmtree(tmpdir)
+
+
+def test_sample_to_shards():
+    tmpdir = tempfile.mkdtemp()
+    gtdir = tempfile.mkdtemp()
+
+    for i in range(4):
+        Image.new("RGB", (40, 30)).save(os.path.join(tmpdir, "%s.png" % i))
+        Image.new("L", (40, 30)).save(os.path.join(gtdir, "%s.png" % i))
+
+    p = Augmentor.Pipeline(tmpdir)
+    p.ground_truth(gtdir)
+    p.flip_left_right(probability=1)
+
+    with pytest.raises(ValueError):
+        p.set_output_shards(0)
+
+    p.set_output_shards(max_count=4)
+    p.sample(10)
+
+    output_directory = os.path.join(tmpdir, "output")
+    assert len(glob.glob(os.path.join(output_directory, "*.png"))) == 0
+
+    shards = sorted(glob.glob(os.path.join(output_directory, "*.tar")))
+    assert len(shards) == 3
+
+    samples = {}
+    for shard in shards:
+        with tarfile.open(shard) as tar:
+            for member in tar.getmembers():
+                key, extension = member.name.split(".", 1)
+                samples.setdefault(key, {})[extension] = tar.extractfile(member).read()
+
+    assert len(samples) == 10
+    for files in samples.values():
+        assert sorted(files) == ["groundtruth_1.png", "json", "png"]
+        assert Image.open(io.BytesIO(files["png"])).mode == "RGB"
+        assert Image.open(io.BytesIO(files["groundtruth_1.png"])).mode == "L"
+        assert json.loads(files["json"].decode("utf-8"))["source"] in ["%s.png" % i for i in range(4)]
+
+    # Processing every image with a resumable run, using worker processes.
+    p.set_output_shards(max_count=100)
+    p.process(backend="process", workers=2, resume=True)
+    p.process(backend="process", workers=2, resume=True)
+
+    with tarfile.open(os.path.join(output_directory, "shard-000003.tar")) as tar:
+        assert len(tar.getnames()) == 12
+    assert not os.path.exists(os.path.join(output_directory, "shard-000004.tar"))
+
+    # Machines sharing the work write shards of their own.
+    for shard_index in range(2):
+        p.sample(4, shard_index=shard_index, num_shards=2)
+    for shard_index in range(2):
+        with tarfile.open(os.path.join(output_directory, "shard-%d-000000.tar" % shard_index)) as tar:
+            assert len(tar.getnames()) == 6
+
+    p.close()
+    shutil.rmtree(tmpdir)
+    shutil.rmtree(gtdir)
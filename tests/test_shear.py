@@ -0,0 +1,31 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import numpy as np
+from PIL import Image, ImageFilter
+from Augmentor import Operations
+
+
+def test_shear_single_pass():
+    image = Image.fromarray(np.random.randint(0, 256, (151, 203, 3), dtype=np.uint8)).filter(ImageFilter.GaussianBlur(3))
+
+    s = Operations.Shear(1, 15, 15)
+
+    for angle_to_shear in [-15, -4, 1, 9, 15]:
+        for direction in ["x", "y"]:
+            s._random_shear = lambda: (angle_to_shear, direction)
+            sheared = s.perform_operation([image, image.copy()])
+
+            assert sheared[0].size == image.size
+            assert np.array_equal(np.asarray(sheared[0]), np.asarray(sheared[1]))
+
+            # Matches shearing, cropping and resizing in separate steps.
+            transform_matrix, canvas_size, crop_box = s._shear_geometry(image.size, angle_to_shear, direction)
+            expected = image.transform(canvas_size, Image.AFFINE, transform_matrix, Image.BICUBIC)
+            expected = expected.crop(crop_box).resize(image.size, resample=Image.BICUBIC)
+
+            difference = np.abs(np.asarray(expected, dtype=np.int16) - np.asarray(sheared[0], dtype=np.int16))
+            assert difference[5:-5, 5:-5].mean() < 1
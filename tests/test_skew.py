@@ -0,0 +1,43 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import numpy as np
+from PIL import Image
+from Augmentor import Operations
+
+
+def test_skew_homography():
+    w, h = 120, 80
+
+    for skew_type in ["TILT", "TILT_LEFT_RIGHT", "TILT_TOP_BOTTOM", "CORNER", "RANDOM", "ALL"]:
+        s = Operations.Skew(1, skew_type, 0.5)
+        for _ in range(10):
+            coefficients = s._perspective_coefficients(w, h)
+            assert len(coefficients) == 8
+
+    original_plane = [(0, 0), (w, 0), (w, h), (0, h)]
+    new_plane = [(-10, 0), (w, 0), (w, h), (0, h)]
+
+    a, b, c, d, e, f, g, k = Operations._homography(original_plane, new_plane)
+
+    # The skewed corners are mapped onto the corners of the image.
+    for (x, y), (u, v) in zip(new_plane, original_plane):
+        denominator = g * x + k * y + 1
+        assert np.isclose((a * x + b * y + c) / denominator, u)
+        assert np.isclose((d * x + e * y + f) / denominator, v)
+
+    # The coefficients are only computed once for each set of corners.
+    assert Operations._homography(original_plane, new_plane) is Operations._homography(original_plane, new_plane)
+
+
+def test_skew_images():
+    image = Image.fromarray(np.random.randint(0, 256, (80, 120, 3), dtype=np.uint8))
+
+    s = Operations.Skew(1, "CORNER", 0.5)
+    augmented_images = s.perform_operation([image, image.copy()])
+
+    assert augmented_images[0].size == image.size
+    assert np.array_equal(np.asarray(augmented_images[0]), np.asarray(augmented_images[1]))
@@ -0,0 +1,146 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import Augmentor
+import tempfile
+import shutil
+import glob
+import pytest
+import numpy as np
+from PIL import Image
+
+
+def create_images(tmpdir, n=5):
+    y, x = np.mgrid[0:48, 0:64]
+    for i in range(n):
+        image = np.stack([x * 4, y * 5, (x + y + i) % 256], -1).astype(np.uint8)
+        Image.fromarray(image).save(os.path.join(tmpdir, "%s.png" % i))
+
+
+def test_save_options():
+    tmpdir = tempfile.mkdtemp()
+    create_images(tmpdir)
+
+    p = Augmentor.Pipeline(tmpdir)
+    p.flip_left_right(probability=1)
+
+    with pytest.raises(ValueError):
+        p.set_save_options(compress_level=10)
+    with pytest.raises(ValueError):
+        p.set_save_options(quality=101)
+
+    sizes = []
+    for compress_level in [0, 9]:
+        output_directory = os.path.join(tmpdir, "output")
+        shutil.rmtree(output_directory)
+        os.makedirs(output_directory)
+
+        p.set_save_options(compress_level=compress_level, optimize=False)
+        assert p.save_options == {"compress_level": compress_level, "optimize": False}
+        p.process()
+
+        sizes.append(sum(os.path.getsize(path) for path in glob.glob(os.path.join(output_directory, "*.png"))))
+
+    assert sizes[0] > sizes[1]
+
+    shutil.rmtree(tmpdir)
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_writers(backend):
+    tmpdir = tempfile.mkdtemp()
+    create_images(tmpdir)
+
+    p = Augmentor.Pipeline(tmpdir)
+    p.flip_left_right(probability=1)
+
+    with pytest.raises(ValueError):
+        p.set_writers(-1)
+    with pytest.raises(ValueError):
+        p.set_writers(2, max_pending=0)
+
+    p.set_writers(2, max_pending=2)
+    p.sample(40, backend=backend, workers=2)
+
+    # Every image is written by the time sample() returns.
+    generated_images = glob.glob(os.path.join(tmpdir, "output", "*.png"))
+    assert len(generated_images) == 40
+    for image_path in generated_images:
+        assert Image.open(image_path).size == (64, 48)
+
+    p.process(backend=backend, workers=2, resume=True)
+    assert len(glob.glob(os.path.join(tmpdir, "output", "*.png"))) == 45
+
+    p.close()
+    assert p._writer_pool is None
+
+    shutil.rmtree(tmpdir)
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_writer_errors(backend):
+    tmpdir = tempfile.mkdtemp()
+    create_images(tmpdir)
+
+    p = Augmentor.Pipeline(tmpdir)
+    p.flip_left_right(probability=1)
+    p.set_save_format("pngx")
+    p.set_writers(2)
+
+    # Errors on the writer threads are raised, and no image is journalled.
+    with pytest.raises(ValueError):
+        p.sample(5, backend=backend, workers=2)
+    with pytest.raises(ValueError):
+        p.process(backend=backend, workers=2, resume=True)
+    assert not os.path.exists(os.path.join(tmpdir, "output", ".augmentor_journal"))
+
+    # The error is forgotten once the pipeline saves images again.
+    p.set_save_format("png")
+    p.process(backend=backend, workers=2, resume=True)
+    assert len(glob.glob(os.path.join(tmpdir, "output", "*.png"))) == 5
+
+    p.close()
+
+    shutil.rmtree(tmpdir)
+
+
+def test_worker_writer_pool():
+    from Augmentor.Pipeline import _worker_writer_pool, _worker_writer_pools
+
+    # A worker process keeps a single pool for every chunk it executes.
+    assert _worker_writer_pool(2, None) is _worker_writer_pool(2, None)
+    assert _worker_writer_pool(3, None) is not _worker_writer_pool(2, None)
+
+    _worker_writer_pools.clear()
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_writer_os_errors(backend):
+    from Augmentor.Pipeline import _journal_key
+
+    tmpdir = tempfile.mkdtemp()
+    create_images(tmpdir)
+
+    p = Augmentor.Pipeline(tmpdir)
+    p.flip_left_right(probability=1)
+    p.set_writers(2)
+
+    # A directory in place of one of the resumed images blocks its path.
+    blocked = p.augmentor_images[0]
+    os.makedirs(os.path.join(blocked.output_directory, "%s_original_%s_%s.png" % (
+        blocked.class_label, os.path.basename(blocked.image_path), _journal_key(blocked.image_path))))
+
+    with pytest.raises(OSError):
+        p.process(backend=backend, workers=2, resume=True)
+
+    journal_path = os.path.join(tmpdir, "output", ".augmentor_journal")
+    if os.path.exists(journal_path):
+        with open(journal_path) as journal_file:
+            assert _journal_key(blocked.image_path) not in journal_file.read()
+
+    p.close()
+
+    shutil.rmtree(tmpdir)
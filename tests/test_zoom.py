@@ -0,0 +1,45 @@
+# Context
+import os
+import sys
+sys.path.insert(0, os.path.abspath('.'))
+
+# Imports
+import numpy as np
+from PIL import Image, ImageFilter
+from Augmentor import Operations
+
+
+def _zoom_in_two_passes(image, factor):
+    w, h = image.size
+
+    image_zoomed = image.resize((int(round(w * factor)), int(round(h * factor))), resample=Image.BICUBIC)
+    w_zoomed, h_zoomed = image_zoomed.size
+
+    return image_zoomed.crop((np.floor((float(w_zoomed) / 2) - (float(w) / 2)),
+                              np.floor((float(h_zoomed) / 2) - (float(h) / 2)),
+                              np.floor((float(w_zoomed) / 2) + (float(w) / 2)),
+                              np.floor((float(h_zoomed) / 2) + (float(h) / 2))))
+
+
+def test_zoom():
+    image = Image.fromarray(np.random.randint(0, 256, (151, 203, 3), dtype=np.uint8)).filter(ImageFilter.GaussianBlur(3))
+
+    for factor in [0.5, 0.8, 1.0, 1.3, 2.5]:
+        for operation in [Operations.Zoom(1, factor, factor), Operations.ZoomGroundTruth(1, factor, factor)]:
+            zoomed = operation.perform_operation([image, image.copy()])
+
+            assert zoomed[0].size == image.size
+            assert np.array_equal(np.asarray(zoomed[0]), np.asarray(zoomed[1]))
+
+            expected = np.asarray(_zoom_in_two_passes(image, factor), dtype=np.int16)
+            assert np.abs(expected - np.asarray(zoomed[0], dtype=np.int16)).max() <= 1
+
+
+def test_zoom_random():
+    image = Image.fromarray(np.random.randint(0, 256, (151, 203, 3), dtype=np.uint8))
+
+    z = Operations.ZoomRandom(1, 0.5, randomise=True)
+    zoomed = z.perform_operation([image, image.copy()])
+
+    assert zoomed[0].size == image.size
+    assert np.array_equal(np.asarray(zoomed[0]), np.asarray(zoomed[1]))